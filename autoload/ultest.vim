@@ -13,24 +13,15 @@
 " 'failed': Number of tests failed
 "
 " 'running': Number of tests running
+"
+" The same counts for each namespace in a file are kept in the
+" 'namespaces' dict of the b:ultest_status variable, keyed by namespace ID.
 function! ultest#status(...) abort
   try
     let file = a:0 == 1 ? a:1 : expand("%:.")
-    let ids = getbufvar(file, "ultest_sorted_tests", [])
-    let tests = getbufvar(file, "ultest_tests", {})
-    let results = getbufvar(file, "ultest_results", {})
-    let status = {"tests": len(ids), "passed": 0, "failed": 0, "running": 0}
-    for test_id in ids
-      if get(get(tests, test_id, {}), "type", "") != "test" | continue | endif
-      let result = get(results, test_id, {})
-      if result != {}
-        let key = result.code ? "failed" : "passed"
-        let status[key] += 1
-      elseif get(get(tests, test_id, {}), "running")
-        let status.running += 1
-      endif
-    endfor
-    return status
+    " Counts are kept up to date by the remote plugin
+    let status = get(getbufvar(file, "ultest_status", {}), "file", {})
+    return extend({"tests": 0, "passed": 0, "failed": 0, "running": 0}, status)
   catch /.*/
     return {"tests": 0, "passed": 0, "failed": 0, "running": 0}
   endtry
@@ -12,10 +12,26 @@ function! ultest#adapter#get_runner(file)
 endfunction
 
 function! ultest#adapter#build_cmd(test, scope) abort
+  return ultest#handler#safe_split(ultest#adapter#build_cmds([a:test], a:scope)[0])
+endfunction
+
+" Build commands for many positions, changing to the project root only once.
+" Commands are not split, so the caller must split them as safe_split does.
+function! ultest#adapter#build_cmds(tests, scope) abort
   if exists('g:test#project_root')
     let cwd = getcwd()
     execute 'cd' g:test#project_root
   endif
+  try
+    return map(copy(a:tests), {_, test -> s:BuildCmd(test, a:scope)})
+  finally
+    if exists('g:test#project_root')
+      exec 'cd'.cwd
+    endif
+  endtry
+endfunction
+
+function! s:BuildCmd(test, scope) abort
   let a:test.file = fnamemodify(a:test.file, get(g:, "test#filename_modifier", ":."))
   call ultest#process#pre(a:test)
   let runner = test#determine_runner(a:test.file)
@@ -36,10 +52,6 @@ function! ultest#adapter#build_cmd(test, scope) abort
       let cmd[index] = shellescape(a:test.file)
     end
   endfor
-  let cmd = ultest#handler#safe_split(cmd)
-  if exists('g:test#project_root')
-    exec 'cd'.cwd
-  endif
   return cmd
 endfunction
 
@@ -54,13 +66,13 @@ function ultest#adapter#get_patterns(file_name) abort
   let file_type = split(runner, "#")[0]
   let ultest_pattern = get(g:ultest_patterns, runner, get(g:ultest_patterns, file_type))
   if type(ultest_pattern) == v:t_dict
-    return ultest_pattern
+    return extend({"runner": runner}, ultest_pattern)
   endif
   try
     try
-      return eval("g:test#".runner."#patterns")
+      return extend({"runner": runner}, eval("g:test#".runner."#patterns"))
     catch /.*/
-      return eval("g:test#".file_type."#patterns")
+      return extend({"runner": runner}, eval("g:test#".file_type."#patterns"))
     endtry
   catch /.*/
   endtry
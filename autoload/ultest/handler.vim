@@ -82,3 +82,71 @@ endfunction
 function! ultest#handler#clear_results(...) abort
   return s:Call('_ultest_clear_results', a:000)
 endfunction
+
+function! ultest#handler#render_summary(...) abort
+  return s:Call('_ultest_render_summary', a:000)
+endfunction
+
+function! ultest#handler#toggle_summary(...) abort
+  return s:Call('_ultest_toggle_summary', a:000)
+endfunction
+
+function! ultest#handler#lines_changed(...) abort
+  return s:Call('_ultest_lines_changed', a:000)
+endfunction
+
+function! ultest#handler#clear_pattern_cache(...) abort
+  return s:Call('_ultest_clear_pattern_cache', a:000)
+endfunction
+
+function! ultest#handler#refresh_config(...) abort
+  return s:Call('_ultest_refresh_config', [])
+endfunction
+
+let s:visible_files = v:null
+
+" Send the files shown in any window, or in the summary if it is open, so
+" updates for other files can be held back until they are shown.
+function! ultest#handler#update_visible_files() abort
+  " Nothing to hold back until tests have been found
+  if empty(g:ultest_buffers) | return | endif
+  let buffers = []
+  for tab in range(1, tabpagenr("$"))
+    call extend(buffers, tabpagebuflist(tab))
+  endfor
+  let files = map(uniq(sort(buffers)), {_, buf -> fnamemodify(bufname(buf), ":p")})
+  if ultest#summary#is_open()
+    call extend(files, g:ultest_buffers)
+  endif
+  let files = uniq(sort(files))
+  if files == s:visible_files
+    return
+  endif
+  let s:visible_files = files
+  return s:Call('_ultest_set_visible_files', [files])
+endfunction
+
+let s:cwd = ""
+
+function! ultest#handler#set_cwd(cwd) abort
+  if a:cwd == s:cwd
+    return
+  endif
+  let s:cwd = a:cwd
+  return s:Call('_ultest_set_cwd', [a:cwd])
+endfunction
+
+" Send lines edited in a buffer as they change, so stored positions can be
+" shifted without parsing the file again.
+function! ultest#handler#attach_buffer(buffer, file) abort
+  if has("nvim-0.5")
+    call luaeval("require('ultest').attach_buffer(_A[1], _A[2])", [a:buffer, a:file])
+  elseif exists("*listener_add")
+    call listener_add({buf, start, end, added, changes -> s:OnLinesChanged(a:file, changes)}, a:buffer)
+  endif
+endfunction
+
+function! s:OnLinesChanged(file, changes) abort
+  let edits = map(copy(a:changes), {_, change -> [change.lnum - 1, change.end - 1, change.end - 1 + change.added]})
+  call ultest#handler#lines_changed(a:file, edits)
+endfunction
@@ -22,93 +22,154 @@ function s:ClearBuffer(buf_name) abort
 endfunction
 
 function ultest#process#new(test) abort
-  call ultest#process#pre(a:test)
-  if index(g:ultest_buffers, a:test.file) == -1
-    let g:ultest_buffers = add(g:ultest_buffers, a:test.file)
-  endif
-  let tests = getbufvar(a:test.file, "ultest_tests", {})
-  let tests[a:test.id] = a:test
-  for processor in g:ultest#active_processors
-    let new = get(processor, "new", "")
-    if new != ""
-      call function(new)(a:test)
+  call ultest#process#new_many([a:test])
+endfunction
+
+function ultest#process#new_many(tests) abort
+  let new_buffer = v:false
+  for test in a:tests
+    call ultest#process#pre(test)
+    if index(g:ultest_buffers, test.file) == -1
+      let g:ultest_buffers = add(g:ultest_buffers, test.file)
+      let new_buffer = v:true
     endif
+    let tests = getbufvar(test.file, "ultest_tests", {})
+    let tests[test.id] = test
   endfor
+  call s:Dispatch("new", a:tests)
+  if new_buffer
+    call ultest#handler#update_visible_files()
+  endif
 endfunction
 
 function ultest#process#start(test) abort
-  call ultest#process#pre(a:test)
-  let tests = getbufvar(a:test.file, "ultest_tests", {})
-  let tests[a:test.id] = a:test
-  let results = getbufvar(a:test.file, "ultest_results")
-  if has_key(results, a:test.id)
-    call remove(results, a:test.id)
-  endif
-  for processor in g:ultest#active_processors
-    let start = get(processor, "start", "")
-    if start != ""
-      call function(start)(a:test)
+  call ultest#process#start_many([a:test])
+endfunction
+
+function ultest#process#start_many(tests) abort
+  for test in a:tests
+    call ultest#process#pre(test)
+    let tests = getbufvar(test.file, "ultest_tests", {})
+    let tests[test.id] = test
+    let results = getbufvar(test.file, "ultest_results")
+    if has_key(results, test.id)
+      call remove(results, test.id)
     endif
   endfor
+  call s:Dispatch("start", a:tests)
 endfunction
 
 function ultest#process#move(test) abort
-  call ultest#process#pre(a:test)
-  let tests = getbufvar(a:test.file, "ultest_tests")
-  let tests[a:test.id] = a:test
-  for processor in g:ultest#active_processors
-    let start = get(processor, "move", "")
-    if start != ""
-      call function(start)(a:test)
-    endif
+  call ultest#process#move_many([a:test])
+endfunction
+
+function ultest#process#move_many(tests) abort
+  for test in a:tests
+    call ultest#process#pre(test)
+    let tests = getbufvar(test.file, "ultest_tests")
+    let tests[test.id] = test
   endfor
+  call s:Dispatch("move", a:tests)
 endfunction
 
 function ultest#process#replace(test, result) abort
-  call ultest#process#pre(a:test)
-  let tests = getbufvar(a:test.file, "ultest_tests")
-  let tests[a:test.id] = a:test
-  let results = getbufvar(a:result.file, "ultest_results")
-  let results[a:result.id] = a:result
-  for processor in g:ultest#active_processors
-    let exit = get(processor, "replace", "")
-    if exit != ""
-      call function(exit)(a:result)
-    endif
+  call ultest#process#replace_many([[a:test, a:result]])
+endfunction
+
+function ultest#process#replace_many(pairs) abort
+  let results = []
+  for [test, result] in a:pairs
+    call ultest#process#pre(test)
+    let tests = getbufvar(test.file, "ultest_tests")
+    let tests[test.id] = test
+    let file_results = getbufvar(result.file, "ultest_results")
+    let file_results[result.id] = result
+    call add(results, result)
   endfor
+  call s:Dispatch("replace", results)
 endfunction
 
 function ultest#process#clear(test) abort
-  call ultest#process#pre(a:test)
-  let tests = getbufvar(a:test.file, "ultest_tests")
-  if has_key(tests, a:test.id)
-    call remove(tests, a:test.id)
-  endif
-  let results = getbufvar(a:test.file, "ultest_results")
-  if has_key(results, a:test.id)
-    call remove(results, a:test.id)
-  endif
-  for processor in g:ultest#active_processors
-    let clear = get(processor, "clear", "")
-    if clear != ""
-      call function(clear)(a:test)
+  call ultest#process#clear_many([a:test])
+endfunction
+
+function ultest#process#clear_many(tests) abort
+  for test in a:tests
+    call ultest#process#pre(test)
+    let tests = getbufvar(test.file, "ultest_tests")
+    if has_key(tests, test.id)
+      call remove(tests, test.id)
+    endif
+    let results = getbufvar(test.file, "ultest_results")
+    if has_key(results, test.id)
+      call remove(results, test.id)
     endif
   endfor
+  call s:Dispatch("clear", a:tests)
 endfunction
 
-function ultest#process#exit(test, result) abort
-  call ultest#process#pre(a:test)
-  if !has_key(getbufvar(a:result.file, "ultest_tests", {}), a:result.id)
-    return
+function ultest#process#apply_diff(file, diff) abort
+  let structure = getbufvar(a:file, "ultest_file_structure")
+  for [path, start, end, items] in a:diff.structure
+    call s:Splice(structure, path, start, end, items)
+  endfor
+  let sorted_tests = getbufvar(a:file, "ultest_sorted_tests")
+  for [path, start, end, items] in a:diff.sorted_tests
+    call s:Splice(sorted_tests, path, start, end, items)
+  endfor
+  call ultest#process#clear_many(a:diff.removed + map(copy(a:diff.renamed), {_, pair -> pair[0]}))
+  call ultest#process#move_many(a:diff.moved)
+  call ultest#process#new_many(a:diff.inserted + map(copy(a:diff.renamed), {_, pair -> pair[1]}))
+  call ultest#process#replace_many(a:diff.replaced)
+  doautocmd User UltestPositionsUpdate
+endfunction
+
+function! s:Splice(list, path, start, end, items) abort
+  let target = a:list
+  for index in a:path
+    let target = target[index]
+  endfor
+  if a:end > a:start
+    call remove(target, a:start, a:end - 1)
   endif
-  let tests = getbufvar(a:test.file, "ultest_tests", {})
-  let tests[a:test.id] = a:test
-  let results = getbufvar(a:result.file, "ultest_results")
-  let results[a:result.id] = a:result
+  call extend(target, a:items, a:start)
+endfunction
+
+function ultest#process#exit(test, result) abort
+  call ultest#process#exit_many([[a:test, a:result]])
+endfunction
+
+function ultest#process#exit_many(pairs) abort
+  let results = []
+  for [test, result] in a:pairs
+    call ultest#process#pre(test)
+    if !has_key(getbufvar(result.file, "ultest_tests", {}), result.id)
+      continue
+    endif
+    let tests = getbufvar(test.file, "ultest_tests", {})
+    let tests[test.id] = test
+    let file_results = getbufvar(result.file, "ultest_results")
+    let file_results[result.id] = result
+    call add(results, result)
+  endfor
+  call s:Dispatch("exit", results)
+endfunction
+
+" Processors receive a whole batch through their '<event>_many' key if they
+" have one, otherwise each item is passed to their '<event>' key.
+function! s:Dispatch(event, items) abort
+  if empty(a:items) | return | endif
   for processor in g:ultest#active_processors
-    let exit = get(processor, "exit", "")
-    if exit != ""
-      call function(exit)(a:result)
+    let batch = get(processor, a:event."_many", "")
+    if batch != ""
+      call function(batch)(a:items)
+      continue
+    endif
+    let single = get(processor, a:event, "")
+    if single != ""
+      for item in a:items
+        call function(single)(item)
+      endfor
     endif
   endfor
 endfunction
@@ -1,35 +1,65 @@
+if has("nvim")
+  let s:namespace = nvim_create_namespace("ultest")
+endif
+
 function! ultest#signs#move(test) abort
-  if (a:test.type != "test") | return | endif
-  let result = get(getbufvar(a:test.file, "ultest_results"), a:test.id, {})
-  if result != {}
-    call ultest#signs#process(result)
-  else
-    call ultest#signs#start(a:test)
-  endif
+  call ultest#signs#move_many([a:test])
+endfunction
+
+function! ultest#signs#move_many(tests) abort
+  let started = []
+  let results = []
+  for test in s:Tests(a:tests)
+    let result = get(getbufvar(test.file, "ultest_results"), test.id, {})
+    if result != {}
+      call add(results, result)
+    else
+      call add(started, test)
+    endif
+  endfor
+  call ultest#signs#process_many(results)
+  call ultest#signs#start_many(started)
 endfunction
 
 function! ultest#signs#start(test) abort
-    if (a:test.type != "test") | return | endif
-    call ultest#signs#unplace(a:test)
-    if !a:test.running | return | endif
+  call ultest#signs#start_many([a:test])
+endfunction
+
+function! ultest#signs#start_many(tests) abort
+    let tests = s:Tests(a:tests)
+    if empty(tests) | return | endif
+    call s:Unplace(tests)
+    let running = filter(copy(tests), {_, test -> test.running})
     if s:UseVirtual()
-        call s:PlaceVirtualText(a:test, g:ultest_running_text, "UltestRunning")
+        call s:PlaceVirtualText(map(running, {_, test -> [test, g:ultest_running_text, "UltestRunning"]}))
     else
-        call s:PlaceSign(a:test, "test_running")
+        call s:PlaceSigns(map(running, {_, test -> [test, "test_running"]}))
     endif
 endfunction
 
 function! ultest#signs#process(result) abort
-    let test = getbufvar(a:result.file, "ultest_tests")[a:result.id]
-    if (test.type != "test") | return | endif
-    call ultest#signs#unplace(test)
+  call ultest#signs#process_many([a:result])
+endfunction
+
+function! ultest#signs#process_many(results) abort
+    let placements = []
+    for result in a:results
+        let test = getbufvar(result.file, "ultest_tests")[result.id]
+        if (test.type != "test") | continue | endif
+        if s:UseVirtual()
+            let text_highlight = result.code ? "UltestFail" : "UltestPass"
+            let text = result.code ? g:ultest_fail_text : g:ultest_pass_text
+            call add(placements, [test, text, text_highlight])
+        else
+            call add(placements, [test, result.code ? "test_fail" : "test_pass"])
+        endif
+    endfor
+    if empty(placements) | return | endif
+    call s:Unplace(map(copy(placements), {_, placement -> placement[0]}))
     if s:UseVirtual()
-        let text_highlight = a:result.code ? "UltestFail" : "UltestPass"
-        let text = a:result.code ? g:ultest_fail_text : g:ultest_pass_text
-        call s:PlaceVirtualText(test, text, text_highlight)
+        call s:PlaceVirtualText(placements)
     else
-        let test_icon = a:result.code ? "test_fail" : "test_pass"
-        call s:PlaceSign(test, test_icon)
+        call s:PlaceSigns(placements)
     endif
 endfunction
 
@@ -37,26 +67,92 @@ function! s:UseVirtual() abort
     return get(g:, "ultest_virtual_text", 1) && exists("*nvim_buf_set_virtual_text")
 endfunction
 
-function! s:PlaceSign(test, test_icon) abort
-    call sign_place(0, a:test.id, a:test_icon, a:test.file, {"lnum": a:test.line, "priority": 1000})
+function! s:UseExtmarks() abort
+    return has("nvim-0.5")
+endfunction
+
+function! s:Tests(positions) abort
+    return filter(copy(a:positions), {_, position -> position.type == "test"})
+endfunction
+
+" Place signs given as [test, sign name] pairs, redrawing once
+function! s:PlaceSigns(placements) abort
+    let signs = map(copy(a:placements), {_, placement -> {
+          \ "group": placement[0].id,
+          \ "name": placement[1],
+          \ "buffer": placement[0].file,
+          \ "lnum": placement[0].line,
+          \ "priority": 1000,
+          \ }})
+    if exists("*sign_placelist")
+        call sign_placelist(signs)
+    else
+        for sign in signs
+            call sign_place(0, sign.group, sign.name, sign.buffer, {"lnum": sign.lnum, "priority": sign.priority})
+        endfor
+    endif
     redraw
 endfunction
 
-function! s:PlaceVirtualText(test, text, highlight) abort
-    let namespace = s:GetNamespace(a:test)
-    let buffer =  nvim_win_get_buf(win_getid(bufwinnr(a:test.file)))
-    call nvim_buf_set_virtual_text(buffer, namespace, str2nr(a:test.line) - 1, [[a:text, a:highlight]], {})
+" Place virtual text given as [test, text, highlight] lists
+function! s:PlaceVirtualText(placements) abort
+    for [test, text, highlight] in a:placements
+        if s:UseExtmarks()
+            let buffer = bufnr(test.file)
+            if buffer == -1 | continue | endif
+            call nvim_buf_set_extmark(buffer, s:namespace, str2nr(test.line) - 1, 0, {
+                  \ "id": s:ExtmarkId(test),
+                  \ "virt_text": [[text, highlight]],
+                  \ })
+        else
+            let namespace = s:GetNamespace(test)
+            let buffer =  nvim_win_get_buf(win_getid(bufwinnr(test.file)))
+            call nvim_buf_set_virtual_text(buffer, namespace, str2nr(test.line) - 1, [[text, highlight]], {})
+        endif
+    endfor
 endfunction
 
 function! ultest#signs#unplace(test)
-    if (a:test.type != "test") | return | endif
+  call ultest#signs#unplace_many([a:test])
+endfunction
+
+function! ultest#signs#unplace_many(tests)
+    let tests = s:Tests(a:tests)
+    if empty(tests) | return | endif
+    call s:Unplace(tests)
+    if !s:UseVirtual()
+        redraw
+    endif
+endfunction
+
+function! s:Unplace(tests) abort
     if s:UseVirtual()
-        let namespace = s:GetNamespace(a:test)
-        call nvim_buf_clear_namespace(0, namespace, 0, -1)
+        for test in a:tests
+            if s:UseExtmarks()
+                let buffer = bufnr(test.file)
+                if buffer == -1 | continue | endif
+                call nvim_buf_del_extmark(buffer, s:namespace, s:ExtmarkId(test))
+            else
+                call nvim_buf_clear_namespace(0, s:GetNamespace(test), 0, -1)
+            endif
+        endfor
+    elseif exists("*sign_unplacelist")
+        call sign_unplacelist(map(copy(a:tests), {_, test -> {"group": test.id, "buffer": test.file}}))
     else
-        call sign_unplace(a:test.id, {"buffer": a:test.file})
-      redraw
+        for test in a:tests
+            call sign_unplace(test.id, {"buffer": test.file})
+        endfor
+    endif
+endfunction
+
+" Extmarks of a buffer share one namespace, with an ID kept for each test
+function! s:ExtmarkId(test) abort
+    let ids = getbufvar(a:test.file, "ultest_extmark_ids", {})
+    if !has_key(ids, a:test.id)
+        let ids[a:test.id] = len(ids) + 1
+        call setbufvar(a:test.file, "ultest_extmark_ids", ids)
     endif
+    return ids[a:test.id]
 endfunction
 
 function! s:GetNamespace(test)
@@ -1,5 +1,9 @@
 let s:buffer_name = "Ultest Summary"
-let s:test_line_map = {}
+" File and ID of the position on each line
+let s:test_line_map = []
+if has("nvim")
+  let s:namespace = nvim_create_namespace("ultest_summary")
+endif
 let s:mappings = {
       \ "run": "r",
       \ "jumpto": "<CR>",
@@ -8,6 +12,7 @@ let s:mappings = {
       \ "stop": "s",
       \ "next_fail": "<S-j>",
       \ "prev_fail": "<S-k>",
+      \ "collapse": "c",
       \ }
 
 call extend(s:mappings, g:ultest_summary_mappings)
@@ -27,12 +32,17 @@ function! s:CreateMappings()
   exec "nnoremap <silent><buffer> ".s:mappings["stop"]." :call <SID>StopCurrent()<CR>"
   exec "nnoremap <silent><buffer> ".s:mappings["next_fail"]." :call <SID>JumpToFail(1)<CR>"
   exec "nnoremap <silent><buffer> ".s:mappings["prev_fail"]." :call <SID>JumpToFail(-1)<CR>"
+  exec "nnoremap <silent><buffer> ".s:mappings["collapse"]." :call <SID>CollapseCurrent()<CR>"
 endfunction
 
 function! s:IsOpen() abort
   return bufexists(s:buffer_name) && bufwinnr(s:buffer_name) != -1
 endfunction
 
+function! ultest#summary#is_open() abort
+  return s:IsOpen()
+endfunction
+
 function! ultest#summary#jumpto() abort
   call ultest#summary#open()
   call ultest#util#goToBuffer(s:buffer_name)
@@ -67,10 +77,44 @@ endfunction
 
 function! ultest#summary#render(...) abort
   if s:IsOpen()
+    call s:Render(v:false)
+  endif
+endfunction
+
+" Neovim gets lines from the remote plugin, which only sends changed lines
+function! s:Render(reset) abort
+  if has("nvim")
+    call ultest#handler#render_summary(g:ultest_buffers, a:reset)
+  else
     call s:RenderSummary()
   endif
 endfunction
 
+" Apply changes to lines of the summary, given as a list of [start, end, rows]
+" to replace lines start to end (exclusive, -1 for the end of the buffer).
+" Each row has its text, highlights and the file and ID of its position.
+function! ultest#summary#patch(splices) abort
+  if !s:IsOpen() | return | endif
+  let buf = bufnr(s:buffer_name)
+  call setbufvar(buf, "&modifiable", 1)
+  for [start, end, rows] in a:splices
+    call nvim_buf_clear_namespace(buf, s:namespace, start, end)
+    call nvim_buf_set_lines(buf, start, end, v:false, map(copy(rows), {_, row -> row.text}))
+    if end == -1
+      let s:test_line_map = start ? s:test_line_map[:start - 1] : []
+    elseif end > start
+      call remove(s:test_line_map, start, end - 1)
+    endif
+    call extend(s:test_line_map, map(copy(rows), {_, row -> [row.file, row.id]}), start)
+    for index in range(len(rows))
+      for [group, col_start, col_end] in rows[index].highlights
+        call nvim_buf_add_highlight(buf, s:namespace, group, start + index, col_start, col_end)
+      endfor
+    endfor
+  endfor
+  call setbufvar(buf, "&modifiable", 0)
+endfunction
+
 function! s:OpenNewWindow() abort
   exec g:ultest_summary_open
   let buf = bufnr(s:buffer_name)
@@ -107,7 +151,8 @@ function! s:OpenNewWindow() abort
     au!
     " au CursorMoved <buffer> norm! 0
   augroup END
-  call s:RenderSummary()
+  let s:test_line_map = []
+  call s:Render(v:true)
   exec "norm! \<C-w>p"
 endfunction
 
@@ -121,7 +166,7 @@ function! s:RenderSummary() abort
   let lines = []
   let matches = []
   let win = bufwinnr(s:buffer_name)
-  let s:test_line_map = {}
+  let s:test_line_map = []
   for test_file in g:ultest_buffers
     let structure = getbufvar(test_file, "ultest_file_structure")
     let tests = getbufvar(test_file, "ultest_tests", {})
@@ -130,6 +175,7 @@ function! s:RenderSummary() abort
     call s:RenderGroup("", structure, 0, state)
     if test_file != g:ultest_buffers[-1]
       call add(lines, "")
+      call add(s:test_line_map, ["", ""])
     endif
   endfor
   if has("nvim")
@@ -193,7 +239,7 @@ function! s:RenderPosition(prefix, test, result, group_state) abort
   elseif a:test.type == "namespace"
     call add(a:group_state.matches, ["UltestSummaryNamespace", [len(a:group_state.lines), len(line) - len(a:test.name) + 1, len(a:test.name)]])
   endif
-  let s:test_line_map[len(a:group_state.lines)] = [a:test.file, a:test.id]
+  call add(s:test_line_map, [a:test.file, a:test.id])
 endfunction
 
 function! s:Clear() abort
@@ -218,6 +264,17 @@ function! s:GetFoldLevel() abort
   return ">"..string(len(position.namespaces) + 2)
 endfunction
 
+function! s:CollapseCurrent() abort
+  if !has("nvim")
+    " Vim renders every position, so regular folds are used
+    silent! normal! za
+    return
+  endif
+  let [cur_file, cur_test] = s:GetAtLine(s:GetCurrentLine())
+  if cur_file == "" | return | endif
+  call ultest#handler#toggle_summary(cur_file, cur_test)
+endfunction
+
 function! s:RunCurrent() abort
   let [cur_file, cur_test] = s:GetAtLine(s:GetCurrentLine())
   if cur_file == ""
@@ -311,5 +368,6 @@ function! s:GetCurrentLine() abort
 endfunction
 
 function! s:GetAtLine(line) abort
-  return get(s:test_line_map, a:line, ["", ""])
+  if a:line < 1 | return ["", ""] | endif
+  return get(s:test_line_map, a:line - 1, ["", ""])
 endfunction
@@ -107,6 +107,54 @@ function M.dap_run_nearest(config)
   dap_run_test(test, builder)
 end
 
+local attached = {}
+
+-- Send lines edited in a buffer to the remote plugin, once per event loop
+-- iteration. Called while text is locked, so the call itself is scheduled.
+--
+-- @param bufnr {number}
+-- @param file {string} File name the positions are stored under
+function M.attach_buffer(bufnr, file)
+  if attached[bufnr] then
+    return
+  end
+  local edits = {}
+  local function send(changes)
+    vim.fn["ultest#handler#lines_changed"](file, changes)
+  end
+  attached[bufnr] = vim.api.nvim_buf_attach(
+    bufnr,
+    false,
+    {
+      on_lines = function(_, _, _, first, last, new_last)
+        if #edits == 0 then
+          vim.schedule(
+            function()
+              local changes = edits
+              edits = {}
+              if #changes > 0 then
+                send(changes)
+              end
+            end
+          )
+        end
+        edits[#edits + 1] = {first, last, new_last}
+      end,
+      on_reload = function()
+        edits = {}
+        vim.schedule(
+          function()
+            send(vim.NIL)
+          end
+        )
+      end,
+      on_detach = function()
+        attached[bufnr] = nil
+      end
+    }
+  )
+end
+
 function M.setup(config)
   builders = config.builders
 end
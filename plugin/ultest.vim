@@ -10,7 +10,7 @@ let g:ultest_buffers = []
 
 ""
 " @section Introduction
-" @order introduction config commands functions highlights mappings debugging
+" @order introduction config commands functions highlights mappings debugging events
 " @stylized vim-ultest
 "
 " The ultimate testing plugin for Vim/NeoVim
@@ -63,6 +63,21 @@ hi default link UltestSummaryNamespace UltestSummaryInfo
 " (default: 2)
 let g:ultest_max_threads = get(g:, "ultest_max_threads", 2)
 
+""
+" Maximum number of times per second that the results of running tests are
+" sent to Vim. Results for files which aren't shown in a window (or the
+" summary) are sent once they are shown. Set to 0 to send results as soon as
+" they arrive.
+" (default: 30)
+let g:ultest_max_update_rate = get(g:, "ultest_max_update_rate", 30)
+
+""
+" Milliseconds that the remote plugin's event loop can be blocked for before
+" it is written to the log. Stalls delay running tests and their results, so
+" this can show what is slowing them down. Set to 0 to not check for them.
+" (default: 100)
+let g:ultest_loop_lag_threshold = get(g:, "ultest_loop_lag_threshold", 100)
+
 ""
 " Connect jobs to a pty. This will trick the process into thinking it is
 " running an interactive session which generally enables colour escape codes.
@@ -87,12 +102,57 @@ let g:ultest_use_pty = get(g:, "ultest_use_pty", 0)
 " (default: [])
 let g:ultest_disable_grouping = get(g:, "ultest_disable_grouping", [])
 
+""
+" Runners to read results of grouped runs from a report written by the runner,
+" instead of searching the output for failures. This gives the result and
+" duration of each test, and allows grouping runners that can't be parsed from
+" their output. Supported runners are python#pytest (JUnit XML), php#phpunit
+" (JUnit XML), go#gotest (go test -json) and javascript#jest (jest --json).
+" >
+"   let g:ultest_report_runners = ["python#pytest", "javascript#jest"]
+" <
+" (default: [])
+let g:ultest_report_runners = get(g:, "ultest_report_runners", [])
+
+""
+" Runners to receive events from as each test starts and finishes, so results
+" of grouped runs are shown as they happen. The pytest plugin shipped with
+" ultest is loaded for python#pytest, other runners can send events by
+" implementing the protocol in |ultest-events|.
+" >
+"   let g:ultest_event_runners = ["python#pytest"]
+" <
+" (default: [])
+let g:ultest_event_runners = get(g:, "ultest_event_runners", [])
+
+""
+" Run groups of tests for runners which can't be run as a group (see
+" |g:ultest_disable_grouping|) in a single process, instead of one process for
+" each test. If the process fails, halves of the tests are run in single
+" processes until the failing tests are found, so suites which mostly pass
+" need only a few processes. A test is only marked as failed when it fails in
+" a process of its own, so when the group fails only because its tests
+" interact, the group is marked as failed and its tests as passed. Supported
+" runners are go#gotest, go#richgo, javascript#jest, ruby#rspec,
+" python#pytest, python#pyunit and elixir#exunit. Runners in
+" |g:ultest_disable_grouping| are still run separately.
+" (default: 0)
+let g:ultest_bisect = get(g:, "ultest_bisect", 0)
+
 ""
 "
 " Custom environment variables for test processes in a dictionary.
 " (default: v:null)
 let g:ultest_env = get(g:, "ultest_env", v:null)
 
+""
+" Size in megabytes of the cache of parsed test files kept on disk, so files
+" that haven't changed don't need to be parsed again when opened in a new
+" session. The cache is stored in $XDG_CACHE_HOME/vim-ultest, or
+" $ULTEST_CACHE_DIR if set. Set to 0 to disable.
+" (default: 10)
+let g:ultest_parse_cache_size = get(g:, "ultest_parse_cache_size", 10)
+
 ""
 " Show failed outputs when completed run.
 " (default: 1)
@@ -257,6 +317,11 @@ let g:ultest_attach_width = get(g:, "ultest_attach_width", 0)
 " 'clear': A function which takes a position which has been removed for some
 " reason.
 "
+" Each key can also be given with a '_many' suffix (e.g. 'exit_many'), for a
+" function which takes a list of all the positions or results of an event
+" that happened together. This is used instead of the single version when
+" given, to avoid repeating expensive work such as redrawing.
+"
 " Positions can be either a file, namespace or test, distinguished with a
 " 'type' key.
 "
@@ -264,19 +329,19 @@ let g:ultest_custom_processors = get(g:, "ultest_custom_processors", [])
 let g:ultest#processors = [
       \   {
       \       "condition": g:ultest_show_in_file,
-      \       "start": "ultest#signs#start",
-      \       "clear": "ultest#signs#unplace",
-      \       "exit": "ultest#signs#process",
-      \       "move": "ultest#signs#move",
-      \       "replace": "ultest#signs#process"
+      \       "start_many": "ultest#signs#start_many",
+      \       "clear_many": "ultest#signs#unplace_many",
+      \       "exit_many": "ultest#signs#process_many",
+      \       "move_many": "ultest#signs#move_many",
+      \       "replace_many": "ultest#signs#process_many"
       \   },
       \   {
-      \       "new": "ultest#summary#render",
-      \       "start": "ultest#summary#render",
-      \       "clear": "ultest#summary#render",
-      \       "exit": "ultest#summary#render",
-      \       "move": "ultest#summary#render",
-      \       "replace": "ultest#summary#render"
+      \       "new_many": "ultest#summary#render",
+      \       "start_many": "ultest#summary#render",
+      \       "clear_many": "ultest#summary#render",
+      \       "exit_many": "ultest#summary#render",
+      \       "move_many": "ultest#summary#render",
+      \       "replace_many": "ultest#summary#render"
       \   },
       \] + get(g:, "ultest_custom_processors", [])
 
@@ -301,6 +366,16 @@ let g:ultest_patterns = extend({
       \}
     \ }, g:ultest_custom_patterns)
 
+if exists("*dictwatcheradd")
+  " Patterns are cached per runner, so they are only read again when changed
+  function! s:ClearPatternCache(...) abort
+    call ultest#handler#clear_pattern_cache()
+  endfunction
+  call dictwatcheradd(g:, "ultest_patterns", function("s:ClearPatternCache"))
+  call dictwatcheradd(g:, "ultest_custom_patterns", function("s:ClearPatternCache"))
+  call dictwatcheradd(g:ultest_patterns, "*", function("s:ClearPatternCache"))
+endif
+
 ""
 " Key mappings for the summary window (dict)
 " Possible values:
@@ -319,6 +394,10 @@ let g:ultest_patterns = extend({
 "
 " 'prev_fail': (default "<S-k>") Jump up to the next fail.
 "
+" 'collapse': (default "c") Collapse or expand the file or namespace currently
+" selected. In Neovim the positions within a collapsed file or namespace are
+" not rendered until it is expanded again, in Vim this toggles the fold.
+"
 " The summary window also defines folds for each files and namespaces so they
 " can be hidden as desired using the regular fold mappings.
 let g:ultest_summary_mappings = get(g:, "ultest_summary_mappings", {
@@ -328,7 +407,8 @@ let g:ultest_summary_mappings = get(g:, "ultest_summary_mappings", {
       \ "attach": "a",
       \ "stop": "s",
       \ "next_fail": "<S-j>",
-      \ "prev_fail": "<S-k>"
+      \ "prev_fail": "<S-k>",
+      \ "collapse": "c"
       \ })
 
 call sign_define("test_pass", {"text":g:ultest_pass_sign, "texthl": "UltestPass"})
@@ -461,6 +541,7 @@ function! s:MonitorFile(file) abort
   call ultest#handler#update_positions(a:file)
   exec 'au BufWrite <buffer='.buffer.'> call ultest#handler#update_positions("'.a:file.'")'
   exec 'au BufUnload <buffer='.buffer.'> au! * <buffer='.buffer.'>'
+  call ultest#handler#attach_buffer(buffer, a:file)
   if g:ultest_output_on_line
     exec 'au CursorHold <buffer='.buffer.'> call ultest#output#open(ultest#handler#get_nearest_test(line("."), expand("%:."), v:true))'
   endif
@@ -475,6 +556,19 @@ augroup UltestPositionUpdater
   endif
 augroup END
 
+augroup UltestVisibleFiles
+  au!
+  au BufEnter,BufWinEnter,WinEnter,TabEnter * call ultest#handler#update_visible_files()
+augroup END
+
+if exists("##DirChanged")
+  augroup UltestCurrentDirectory
+    au!
+    " Entering a window or tab with a local directory changes getcwd() too
+    au DirChanged,WinEnter,TabEnter * call ultest#handler#set_cwd(getcwd())
+  augroup END
+endif
+
 if !has("nvim")
   augroup UltestDummyCommand
     au!
@@ -581,3 +675,32 @@ end
 "     }
 "   end
 " < 
+
+
+""
+" @section Events
+"
+" Test processes of runners in |g:ultest_event_runners| are given a Unix socket
+" to report each test starting and finishing while they run. The path of the
+" socket is in $ULTEST_EVENT_SOCKET, and the ID of the process in
+" $ULTEST_EVENT_ID. The pytest plugin shipped with ultest is loaded with
+" "-p ultest_pytest", and a reporter for any other runner can send the same
+" events.
+"
+" Events are JSON objects, each on a single line. The first line identifies the
+" process:
+" >
+"   {"event": "connect", "process": "<$ULTEST_EVENT_ID>"}
+" <
+" Each line after is a test starting or finishing:
+" >
+"   {"event": "start", "name": "test_a", "namespaces": ["TestClass"]}
+"   {"event": "finish", "name": "test_a", "namespaces": ["TestClass"],
+"    "passed": false, "duration": 0.5}
+" <
+" "name" and "namespaces" are the names of the test and its enclosing
+" namespaces, outermost first. Extra leading namespaces such as a module path
+" are ignored. "passed" defaults to true and "duration" is optional, in
+" seconds. A test finishing more than once, such as a parametrized test, fails
+" if any finish fails. Tests which aren't reported take their result from the
+" output and exit code of the process.
@@ -64,6 +64,35 @@ try:
         _check_started()
         return HANDLER.clear_results(*args)
 
+    def _ultest_render_summary(*args):
+        _check_started()
+        HANDLER.render_summary(*args)
+
+    def _ultest_toggle_summary(*args):
+        _check_started()
+        HANDLER.toggle_summary(*args)
+
+    def _ultest_clear_pattern_cache(*args):
+        if HANDLER:
+            HANDLER.clear_pattern_cache()
+
+    def _ultest_refresh_config(*args):
+        if HANDLER:
+            HANDLER.refresh_config()
+
+    def _ultest_set_visible_files(*args):
+        if HANDLER:
+            HANDLER.set_visible_files(*args)
+
+    def _ultest_lines_changed(*args):
+        if HANDLER:
+            HANDLER.lines_changed(*args)
+
+    def _ultest_set_cwd(*args):
+        # The directory is read when the handler is created
+        if HANDLER:
+            HANDLER.set_cwd(*args)
+
 
 except ImportError:
     from pynvim import Nvim, function, plugin
@@ -125,3 +154,39 @@ except ImportError:
         @function("_ultest_clear_results", sync=True)
         def _clear_results(self, args):
             return self.handler.clear_results(*args)
+
+        @function("_ultest_render_summary", allow_nested=True)
+        def _render_summary(self, args):
+            self.handler.render_summary(*args)
+
+        @function("_ultest_toggle_summary", allow_nested=True)
+        def _toggle_summary(self, args):
+            self.handler.toggle_summary(*args)
+
+        @function("_ultest_clear_pattern_cache", allow_nested=True)
+        def _clear_pattern_cache(self, args):
+            # Nothing is cached before the handler is created
+            if self._handler:
+                self._handler.clear_pattern_cache()
+
+        @function("_ultest_refresh_config", allow_nested=True)
+        def _refresh_config(self, args):
+            if self._handler:
+                self._handler.refresh_config()
+
+        @function("_ultest_set_visible_files", allow_nested=True)
+        def _set_visible_files(self, args):
+            if self._handler:
+                self._handler.set_visible_files(*args)
+
+        @function("_ultest_set_cwd", allow_nested=True)
+        def _set_cwd(self, args):
+            # The directory is read when the handler is created
+            if self._handler:
+                self._handler.set_cwd(*args)
+
+        @function("_ultest_lines_changed", allow_nested=True)
+        def _lines_changed(self, args):
+            # Positions are only stored once the handler exists
+            if self._handler:
+                self._handler.lines_changed(*args)
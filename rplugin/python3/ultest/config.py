@@ -0,0 +1,80 @@
+from dataclasses import dataclass, field, fields
+from typing import Dict, List, Optional
+
+# Settings which aren't read from a g:ultest_ variable
+_EXPRESSIONS = {
+    "nvim": "has('nvim')",
+    "dict_watchers": "exists('*dictwatcheradd')",
+    "dir_changed": "exists('##DirChanged')",
+    "cwd": "getcwd()",
+    "project_root": "get(g:, 'test#project_root', v:null)",
+}
+
+
+@dataclass(frozen=True)
+class Config:
+    """
+    Snapshot of the plugin settings, fetched from Vim in a single request.
+
+    Fields are read from the g:ultest_ variable of the same name, falling back
+    to the default here when it isn't set.
+    """
+
+    max_threads: int = 2
+    max_update_rate: int = 30
+    loop_lag_threshold: int = 100
+    use_pty: int = 0
+    disable_grouping: List[str] = field(default_factory=list)
+    report_runners: List[str] = field(default_factory=list)
+    event_runners: List[str] = field(default_factory=list)
+    bisect: int = 0
+    env: Optional[Dict[str, str]] = None
+    output_on_run: int = 1
+    output_rows: int = 0
+    output_cols: int = 0
+    parse_cache_size: int = 0
+    pass_sign: str = "O"
+    fail_sign: str = "X"
+    running_sign: str = ">"
+    not_run_sign: str = "~"
+    nvim: int = 0
+    dict_watchers: int = 0
+    dir_changed: int = 0
+    cwd: str = ""
+    project_root: str = ""
+
+    @classmethod
+    def expression(cls) -> str:
+        """
+        Vim expression evaluating to a dictionary of all settings.
+        """
+        variables = cls.variables()
+        entries = ", ".join(
+            f"'{config_field.name}': "
+            + (
+                _EXPRESSIONS.get(config_field.name)
+                or f"get(g:, '{variables[config_field.name]}', v:null)"
+            )
+            for config_field in fields(cls)
+        )
+        return f"{{{entries}}}"
+
+    @classmethod
+    def variables(cls) -> Dict[str, str]:
+        """
+        Names of the global variables read for settings.
+        """
+        return {
+            config_field.name: f"ultest_{config_field.name}"
+            for config_field in fields(cls)
+            if config_field.name not in _EXPRESSIONS
+        }
+
+    @classmethod
+    def from_vim(cls, values: Dict) -> "Config":
+        """
+        :param values: Result of evaluating the config expression.
+        """
+        return cls(
+            **{name: value for name, value in values.items() if value is not None}
+        )
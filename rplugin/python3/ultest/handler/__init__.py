@@ -1,31 +1,48 @@
 import os
+import time
 from shlex import split
-from typing import Callable, Dict, List, Optional, Tuple, Union
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple, Union
 
 from pynvim import Nvim
 
 from ..logging import get_logger
 from ..models import File, Namespace, Position, Result, Test, Tree
 from ..vim_client import VimClient
-from .parsers import FileParser, OutputParser, Position
+from .parsers import FileParser, ParseCache, Position
 from .runner import PositionRunner, ProcessManager
+from .scheduler import UpdateScheduler
 from .tracker import PositionTracker
 
+if TYPE_CHECKING:
+    from .summary import SummaryModel
+
 logger = get_logger()
 
 
 class HandlerFactory:
     @staticmethod
     def create(vim: Nvim) -> "Handler":
+        start = time.monotonic()
         client = VimClient(vim)
-        file_parser = FileParser(client)
+        cache_size = client.config.parse_cache_size
+        file_parser = FileParser(
+            client,
+            cache=(
+                ParseCache(ParseCache.default_directory(), cache_size * 1024 * 1024)
+                if cache_size
+                else None
+            ),
+            executor=client.executor,
+        )
         process_manager = ProcessManager(client)
-        output_parser = OutputParser(client.sync_eval("g:ultest_disable_grouping"))
         runner = PositionRunner(
-            vim=client, process_manager=process_manager, output_parser=output_parser
+            vim=client, process_manager=process_manager, executor=client.executor
         )
         tracker = PositionTracker(file_parser=file_parser, runner=runner, vim=client)
-        return Handler(client, tracker=tracker, runner=runner)
+        handler = Handler(client, tracker=tracker, runner=runner)
+        elapsed = time.monotonic() - start
+        logger.info(f"Handler created in {elapsed:.3f}s")
+        return handler
 
 
 class Handler:
@@ -39,19 +56,43 @@ class Handler:
         self._runner = runner
         self._tracker = tracker
         self._prepare_env()
-        self._show_on_run = self._vim.sync_eval("get(g:, 'ultest_output_on_run', 1)")
         self._last_run = None
+        # Test events are sent from the event loop thread, so their positions
+        # are moved to where edits have put them once they reach Vim's thread
+        self._scheduler = UpdateScheduler(
+            nvim, status=runner.file_status, current=tracker.current
+        )
+        self._summary_model: Optional["SummaryModel"] = None
         logger.debug("Handler created")
 
+    @property
+    def _summary(self) -> "SummaryModel":
+        # Only needed once the summary is opened, so imported then
+        if self._summary_model is None:
+            from .summary import SummaryModel
+
+            self._summary_model = SummaryModel(
+                self._vim, tracker=self._tracker, runner=self._runner
+            )
+        return self._summary_model
+
+    def refresh_config(self):
+        self._vim.refresh_config()
+        self._runner.clear_cache()
+        self._prepare_env()
+
+    def set_cwd(self, cwd: str):
+        self._vim.set_cwd(cwd)
+
     def _prepare_env(self):
-        rows = self._vim.sync_eval("g:ultest_output_rows")
+        rows = self._vim.config.output_rows
         if rows:
             logger.debug(f"Setting ROWS to {rows}")
             os.environ["ROWS"] = str(rows)
         elif "ROWS" in os.environ:
             logger.debug("Clearing ROWS value")
             os.environ.pop("ROWS")
-        cols = self._vim.sync_eval("g:ultest_output_cols")
+        cols = self._vim.config.output_cols
         if cols:
             logger.debug(f"Setting COLUMNS to {cols}")
             os.environ["COLUMNS"] = str(cols)
@@ -61,7 +102,10 @@ class Handler:
 
     @property
     def _user_env(self):
-        return self._vim.sync_call("get", "g:", "ultest_env") or None
+        if not self._vim.config.dict_watchers:
+            # Changes can't be watched for in Vim, so the env is read every run
+            self._vim.refresh_config()
+        return self._vim.config.env or None
 
     def safe_split(self, cmd: Union[str, List[str]]) -> List[str]:
         # Some runner position builders in vim-test don't split args properly (e.g. go test)
@@ -75,7 +119,7 @@ class Handler:
             )
             raise ValueError(f"Unknown file {file_name}")
 
-        position = tree.search(pos_id, lambda pos: pos.id)
+        position = self._tracker.find_position(file_name, pos_id)
         if not position:
             logger.error(f"Attempted to register unknown test as started {pos_id}")
             return
@@ -91,7 +135,7 @@ class Handler:
                 "Attempted to register test result for unknown file {file_name}"
             )
             raise ValueError(f"Unknown file {file_name}")
-        position = tree.search(pos_id, lambda pos: pos.id)
+        position = self._tracker.find_position(file_name, pos_id)
         if not position:
             logger.error(f"Attempted to register unknown test result {pos_id}")
             return
@@ -100,13 +144,16 @@ class Handler:
         )
 
     def _on_test_start(self, position: Position):
-        self._vim.call("ultest#process#start", position)
+        self._scheduler.queue("start", position.file, position)
 
     def _on_test_finish(self, position: Position, result: Result):
-        self._vim.call("ultest#process#exit", position, result)
-        if self._show_on_run and result.code and result.output:
+        self._scheduler.queue("exit", position.file, [position, result])
+        if self._vim.config.output_on_run and result.code and result.output:
             self._vim.schedule(self._present_output, result)
 
+    def set_visible_files(self, file_names: List[str]):
+        self._scheduler.set_visible(file_names)
+
     def _present_output(self, result):
         if result.code and self._vim.sync_call("expand", "%") == result.file:
             logger.fdebug("Showing {result.id} output")
@@ -169,11 +216,8 @@ class Handler:
         positions = self._tracker.file_positions(file_name)
         if not positions:
             return
-        match = None
-        for position in positions.nodes():
-            if test_id == position.data.id:
-                match = position
-
+        # The last match is run when IDs are shared, as run_single always has
+        match = self._tracker.find_position(file_name, test_id, last=True)
         if not match:
             return
 
@@ -206,6 +250,9 @@ class Handler:
             return
         self._tracker.update(file_name, callback)
 
+    def lines_changed(self, file_name: str, edits: Optional[List[List[int]]]):
+        self._tracker.lines_changed(file_name, edits)
+
     def get_nearest_position(
         self, line: int, file_name: str, strict: bool
     ) -> Optional[Tree[Position]]:
@@ -237,12 +284,13 @@ class Handler:
             logger.error(f"Invalid dict passed for position {pos_dict}")
             return
 
-        tree = self._tracker.file_positions(pos.file)
-        if not tree:
+        positions = self._tracker.position_index(pos.file)
+        if not positions:
             logger.error(f"Positions not found for file {pos.file}")
             return
 
-        self._runner.stop(pos, tree)
+        for stopped in self._runner.stop(pos, positions):
+            self._scheduler.queue("move", stopped.file, stopped)
 
     def clear_results(self, file_name: str):
         logger.fdebug("Clearing results for file {file_name}")
@@ -254,11 +302,28 @@ class Handler:
         if not positions:
             logger.error("Successfully cleared results for unknown file")
 
+        to_clear = []
         for position in positions:
             if position.id in cleared:
                 position.running = 0
-                self._vim.sync_call("ultest#process#clear", position)
-                self._vim.sync_call("ultest#process#new", position)
+                to_clear.append(position)
+        self._vim.sync_call(
+            "setbufvar",
+            file_name,
+            "ultest_status",
+            self._runner.file_status(file_name),
+        )
+        self._vim.sync_call("ultest#process#clear_many", to_clear)
+        self._vim.sync_call("ultest#process#new_many", to_clear)
+
+    def clear_pattern_cache(self):
+        self._tracker.clear_pattern_cache()
+
+    def render_summary(self, files: List[str], reset: int = 0):
+        self._summary.render(files, reset=bool(reset))
+
+    def toggle_summary(self, file_name: str, pos_id: str):
+        self._summary.toggle(file_name, pos_id)
 
     def _parse_position(self, pos_dict: Dict) -> Optional[Position]:
         pos_type = pos_dict.get("type")
@@ -0,0 +1,196 @@
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..models import Position, Result, Tree
+
+# A list edit (path, start, end, items): the items from start to end of the
+# nested list found by indexing through path are replaced by the new items.
+Splice = Tuple[List[int], int, int, List[Any]]
+
+
+@dataclass
+class TreeDiff:
+    """
+    Changes between two position trees of a file, in the form Vim applies them.
+
+    Structure splices use indexes of the old structure and are ordered so they
+    can be applied one after the other.
+    """
+
+    structure: List[Splice] = field(default_factory=list)
+    sorted_tests: List[Splice] = field(default_factory=list)
+    inserted: List[Position] = field(default_factory=list)
+    removed: List[Position] = field(default_factory=list)
+    moved: List[Position] = field(default_factory=list)
+    renamed: List[Tuple[Position, Position]] = field(default_factory=list)
+    replaced: List[Tuple[Position, Result]] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return any(
+            (
+                self.structure,
+                self.sorted_tests,
+                self.inserted,
+                self.removed,
+                self.moved,
+                self.renamed,
+                self.replaced,
+            )
+        )
+
+    def dict(self) -> Dict:
+        return {
+            "structure": self.structure,
+            "sorted_tests": self.sorted_tests,
+            "inserted": [pos.dict() for pos in self.inserted],
+            "removed": [pos.dict() for pos in self.removed],
+            "moved": [pos.dict() for pos in self.moved],
+            "renamed": [[old.dict(), new.dict()] for old, new in self.renamed],
+            "replaced": [[pos.dict(), res.dict()] for pos, res in self.replaced],
+        }
+
+
+def diff_trees(old: Optional[Tree[Position]], new: Tree[Position]) -> TreeDiff:
+    """
+    Find the changes needed to turn one position tree into another.
+
+    Children of positions that exist in both trees are aligned by ID, so only
+    subtrees which were added or removed are sent. Tests replaced one for one
+    by tests with different names are reported as renamed.
+
+    :param old: Previous tree, if there was one.
+    :param new: Newly parsed tree.
+    """
+    diff = TreeDiff()
+    if old is None:
+        diff.structure.append(([], 0, 0, _structure(new)))
+        diff.sorted_tests.append(([], 0, 0, [pos.id for pos in new]))
+        diff.inserted.extend(new)
+        return diff
+
+    diff.sorted_tests.extend(
+        _diff_sequence([pos.id for pos in old], [pos.id for pos in new])
+    )
+    if old.data.line != new.data.line:
+        diff.moved.append(new.data)
+
+    # Walked with an explicit stack so deep nesting can't exceed the recursion
+    # limit.
+    stack: List[Tuple[List[int], Tree[Position], Tree[Position]]] = [([], old, new)]
+    while stack:
+        path, old_node, new_node = stack.pop()
+        old_children, new_children = old_node.children, new_node.children
+        for tag, old_start, old_end, new_start, new_end in opcodes(
+            [_key(child) for child in old_children],
+            [_key(child) for child in new_children],
+        ):
+            if tag == "equal":
+                for offset in range(old_end - old_start):
+                    old_child = old_children[old_start + offset]
+                    new_child = new_children[new_start + offset]
+                    if old_child.data.line != new_child.data.line:
+                        diff.moved.append(new_child.data)
+                    index = old_start + offset + 1
+                    if bool(old_child.children) != bool(new_child.children):
+                        diff.structure.append(
+                            (path, index, index + 1, [_structure(new_child)])
+                        )
+                        diff.removed.extend(list(old_child)[1:])
+                        diff.inserted.extend(list(new_child)[1:])
+                    elif old_child.children:
+                        stack.append(([*path, index], old_child, new_child))
+                continue
+            removed = old_children[old_start:old_end]
+            inserted = new_children[new_start:new_end]
+            diff.structure.append(
+                (
+                    path,
+                    old_start + 1,
+                    old_end + 1,
+                    [_structure(child) for child in inserted],
+                )
+            )
+            for old_child, new_child in zip(removed, inserted):
+                if _is_test(old_child) and _is_test(new_child):
+                    diff.renamed.append((old_child.data, new_child.data))
+                else:
+                    diff.removed.extend(old_child)
+                    diff.inserted.extend(new_child)
+            for old_child in removed[len(inserted) :]:
+                diff.removed.extend(old_child)
+            for new_child in inserted[len(removed) :]:
+                diff.inserted.extend(new_child)
+
+    # Later and deeper edits first, so indexes of edits still to be applied
+    # aren't shifted.
+    diff.structure.sort(key=lambda splice: [*splice[0], splice[1]], reverse=True)
+    return diff
+
+
+def _key(node: Tree[Position]) -> Tuple[str, str]:
+    return (node.data.id, node.data.type)
+
+
+def _is_test(node: Tree[Position]) -> bool:
+    return node.data.type == "test" and not node.children
+
+
+def _structure(node: Tree[Position]) -> Any:
+    structure = node.map(lambda pos: {"type": pos.type, "id": pos.id}).to_list()
+    return structure if node.children or node.data.type == "file" else structure[0]
+
+
+def opcodes(old: List, new: List) -> List[Tuple[str, int, int, int, int]]:
+    """
+    Opcodes as given by SequenceMatcher, with common ends trimmed first as most
+    changes only touch a few positions in long sequences.
+    """
+    start, old_end, new_end = _trim(old, new)
+    codes = []
+    if start:
+        codes.append(("equal", 0, start, 0, start))
+    if start < old_end or start < new_end:
+        matcher = SequenceMatcher(
+            None, old[start:old_end], new[start:new_end], autojunk=False
+        )
+        for tag, old_from, old_to, new_from, new_to in matcher.get_opcodes():
+            codes.append(
+                (
+                    tag,
+                    old_from + start,
+                    old_to + start,
+                    new_from + start,
+                    new_to + start,
+                )
+            )
+    if old_end < len(old):
+        codes.append(("equal", old_end, len(old), new_end, len(new)))
+    return codes
+
+
+def _diff_sequence(old: List[str], new: List[str]) -> List[Splice]:
+    """
+    A single splice covering everything between the common ends of two lists.
+    """
+    start, old_end, new_end = _trim(old, new)
+    if start == old_end and start == new_end:
+        return []
+    return [([], start, old_end, new[start:new_end])]
+
+
+def _trim(old: List, new: List) -> Tuple[int, int, int]:
+    """
+    Find the span which differs between two lists.
+
+    :return: Start of the span and its ends in the old and new lists.
+    """
+    start = 0
+    limit = min(len(old), len(new))
+    while start < limit and old[start] == new[start]:
+        start += 1
+    old_end, new_end = len(old), len(new)
+    while old_end > start and new_end > start and old[old_end - 1] == new[new_end - 1]:
+        old_end -= 1
+        new_end -= 1
+    return start, old_end, new_end
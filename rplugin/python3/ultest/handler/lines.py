@@ -0,0 +1,102 @@
+from dataclasses import replace
+from typing import Dict, List, Optional, Tuple
+
+from ..models import Tree
+from .parsers import Position
+
+
+class LineShifts:
+    """
+    Lines of a file's positions, following edits made since they were stored.
+
+    Positions are indexed in preorder, which is also line order, so an edit
+    shifts every position from some index onwards. Shifts are held in a Fenwick
+    tree over those indexes, so an edit is recorded and a position's current
+    line is found in logarithmic time, however many positions follow it.
+    """
+
+    def __init__(self, tree: Tree[Position]):
+        self._tree = tree
+        self._nodes = list(tree.nodes())
+        self._base = [node.data.line for node in self._nodes]
+        # Fenwick tree of differences between neighbouring shifts, 1-based
+        self._sums = [0] * (len(self._nodes) + 1)
+        # Same differences by index, so all lines can be found in one pass
+        self._deltas = [0] * len(self._nodes)
+        self._edited = False
+
+    @property
+    def edited(self) -> bool:
+        return self._edited
+
+    def line(self, index: int) -> int:
+        """
+        :param index: Preorder index of a position.
+        :return: Current line of the position.
+        """
+        shift = 0
+        fenwick_index = index + 1
+        while fenwick_index > 0:
+            shift += self._sums[fenwick_index]
+            fenwick_index -= fenwick_index & -fenwick_index
+        return self._base[index] + shift
+
+    def edit(self, first: int, last: int, new_last: int):
+        """
+        Record lines being replaced, in the form sent by nvim_buf_attach.
+
+        :param first: First changed line, 0-based.
+        :param last: Line after the changed lines, before the edit.
+        :param new_last: Line after the changed lines, after the edit.
+        """
+        delta = new_last - last
+        if not delta:
+            return
+        self._edited = True
+        # Position lines are 1-based, so those after the edit have line > last
+        after = self._first_after(last)
+        self._add(after, len(self._nodes), delta)
+        if delta < 0:
+            # Positions on removed lines are kept on the last line of the edit
+            # so lines stay in order, as Vim does with signs.
+            target = max(first, new_last - 1) + 1
+            for index in range(self._first_after(target, after), after):
+                self._add(index, index + 1, target - self.line(index))
+
+    def apply(self) -> Tuple[Tree[Position], List[Position]]:
+        """
+        :return: Tree with positions at their current lines, and the positions
+        which moved. Unmoved positions are reused.
+        """
+        moved: Dict[int, Position] = {}
+        shift = 0
+        for index, node in enumerate(self._nodes):
+            shift += self._deltas[index]
+            line = self._base[index] + shift
+            if line != node.data.line:
+                moved[id(node.data)] = replace(node.data, line=line)
+        if not moved:
+            return self._tree, []
+        tree = self._tree.map(lambda pos: moved.get(id(pos), pos))
+        return tree, list(moved.values())
+
+    def _first_after(self, line: int, end: Optional[int] = None) -> int:
+        low, high = 0, len(self._nodes) if end is None else end
+        while low < high:
+            mid = (low + high) // 2
+            if self.line(mid) > line:
+                high = mid
+            else:
+                low = mid + 1
+        return low
+
+    def _add(self, start: int, end: int, delta: int):
+        # Shift positions from start to end, exclusive
+        for index, value in ((start, delta), (end, -delta)):
+            if index >= len(self._nodes):
+                continue
+            self._deltas[index] += value
+            fenwick_index = index + 1
+            while fenwick_index < len(self._sums):
+                self._sums[fenwick_index] += value
+                fenwick_index += fenwick_index & -fenwick_index
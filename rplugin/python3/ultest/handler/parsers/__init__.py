@@ -1,2 +1,16 @@
+from .cache import ParseCache
 from .file import FileParser, Position
-from .output import OutputParser, OutputPatterns, ParseResult
+from .patterns import PositionPatterns
+
+
+def __getattr__(name):
+    # Output and report parsing are only needed once tests are run, so it's imported then
+    if name in ("OutputParser", "OutputPatterns", "ParseResult"):
+        from . import output
+
+        return getattr(output, name)
+    if name in ("ReportParser", "ReportResult"):
+        from . import reports
+
+        return getattr(reports, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
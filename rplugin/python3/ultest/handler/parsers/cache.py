@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+import zlib
+from typing import Any, List, Optional
+
+from ...logging import get_logger
+
+logger = get_logger()
+
+
+class ParseCache:
+    """
+    Parsed positions of files stored on disk, so files which haven't changed
+    since they were last parsed don't need to be parsed again in a new session.
+
+    Each file has a single entry, named by a hash of its path. An entry starts
+    with a JSON header line holding the path, the digest of the contents that
+    were parsed and the fingerprint of the patterns used, followed by the
+    compressed positions. Entries are replaced atomically so multiple editor
+    instances can share a cache, and the least recently used entries are
+    removed once the cache grows past its size budget.
+    """
+
+    VERSION = 1
+    PRUNE_INTERVAL = 32
+    # Seconds after which a temporary file is taken to be left by a crashed write
+    STALE_TEMP_AGE = 3600
+
+    def __init__(self, directory: str, max_size: int):
+        """
+        :param directory: Directory to store entries in, created when needed.
+        :param max_size: Size budget of all entries in bytes.
+        """
+        self._directory = directory
+        self._max_size = max_size
+        self._writes = 0
+
+    @staticmethod
+    def default_directory() -> str:
+        if os.getenv("ULTEST_CACHE_DIR"):
+            return os.environ["ULTEST_CACHE_DIR"]
+        cache_home = os.getenv("XDG_CACHE_HOME") or os.path.join(
+            os.path.expanduser("~"), ".cache"
+        )
+        return os.path.join(cache_home, "vim-ultest", "positions")
+
+    @staticmethod
+    def digest(data: str) -> str:
+        return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+    def get(self, file_name: str, digest: str, fingerprint: str) -> Optional[Any]:
+        """
+        Read the positions stored for a file.
+
+        :param file_name: Absolute path of the file.
+        :param digest: Digest of the file's current contents.
+        :param fingerprint: Fingerprint of the patterns used to parse.
+        :return: Stored positions if they were parsed from the same contents
+        with the same patterns.
+        """
+        entry = self._entry_path(file_name)
+        try:
+            with open(entry, "rb") as cache_file:
+                header = json.loads(cache_file.readline())
+                if header != self._header(file_name, digest, fingerprint):
+                    return None
+                positions = json.loads(zlib.decompress(cache_file.read()))
+            os.utime(entry)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.fdebug("Unable to read cache entry {entry} for {file_name}")
+            return None
+        return positions
+
+    def put(self, file_name: str, digest: str, fingerprint: str, positions: Any):
+        """
+        Store the positions parsed for a file, replacing any previous entry.
+
+        :param file_name: Absolute path of the file.
+        :param digest: Digest of the parsed contents.
+        :param fingerprint: Fingerprint of the patterns used to parse.
+        :param positions: JSON serialisable positions.
+        """
+        entry = self._entry_path(file_name)
+        header = json.dumps(self._header(file_name, digest, fingerprint))
+        body = zlib.compress(json.dumps(positions, separators=(",", ":")).encode())
+        try:
+            os.makedirs(self._directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self._directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as temp_file:
+                    temp_file.write(header.encode() + b"\n" + body)
+                os.replace(temp_path, entry)
+            except BaseException:
+                os.remove(temp_path)
+                raise
+        except OSError:
+            logger.exception(f"Unable to write cache entry for {file_name}")
+            return
+        if self._writes % self.PRUNE_INTERVAL == 0:
+            self._prune(keep=entry)
+        self._writes += 1
+
+    def _header(self, file_name: str, digest: str, fingerprint: str) -> List:
+        return [self.VERSION, file_name, digest, fingerprint]
+
+    def _entry_path(self, file_name: str) -> str:
+        name = hashlib.blake2b(file_name.encode(), digest_size=16).hexdigest()
+        return os.path.join(self._directory, name)
+
+    def _prune(self, keep: str):
+        """
+        Remove the least recently used entries until the cache fits its budget.
+
+        :param keep: Entry which was just written and so is never removed.
+        """
+        entries = []
+        try:
+            total = os.path.getsize(keep)
+            with os.scandir(self._directory) as scanned:
+                for entry in scanned:
+                    if entry.path == keep:
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    if entry.name.endswith(".tmp"):
+                        # May be a write in progress by another instance
+                        if time.time() - stat.st_mtime > self.STALE_TEMP_AGE:
+                            self._remove(entry.path)
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            return
+        total += sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self._max_size:
+                break
+            self._remove(path)
+            total -= size
+        logger.fdebug("Pruned parse cache to {total} bytes")
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            # Already removed by another instance
+            pass
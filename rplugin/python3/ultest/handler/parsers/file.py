@@ -1,9 +1,17 @@
+import asyncio
+import hashlib
+import json
 import re
+from concurrent.futures import Executor
+from dataclasses import dataclass, field, replace
+from threading import Lock
 from typing import Dict, List, Optional, Pattern, Tuple, Union
 
 from ...logging import get_logger
 from ...models import File, Namespace, Test, Tree
 from ...vim_client import VimClient
+from .cache import ParseCache
+from .patterns import PositionPatterns
 
 REGEX_CONVERSIONS = {r"\\v": "", r"%\((.*?)\)": r"(?:\1)", r"\\zs": "", r"\\ze": ""}
 INDENT_PATTERN = re.compile(r"(^\s*)\S")
@@ -13,29 +21,411 @@ PosList = Union[Position, List["PosList"]]
 
 logger = get_logger()
 
+# Converted patterns are shared by every parser in the process, keyed by runner
+# and the raw vim patterns.
+_compiled_patterns: Dict[Tuple, PositionPatterns] = {}
+
+
+def clear_pattern_cache():
+    _compiled_patterns.clear()
+
+
+@dataclass(frozen=True)
+class LineChange:
+    """
+    A single changed span between two versions of a file.
+
+    The first `start` lines are identical in both versions, as are the lines
+    from `old_end` in the old version and `new_end` in the new version. Indexes
+    are 0-based and ends are exclusive.
+    """
+
+    start: int
+    old_end: int
+    new_end: int
+
+    @property
+    def delta(self) -> int:
+        return self.new_end - self.old_end
+
+    def followed_by(self, change: "LineChange") -> "LineChange":
+        """
+        Single span covering this change and a later one.
+
+        :param change: Change made after this one, in lines of the new version.
+        """
+        end = max(self.new_end, change.old_end)
+        return LineChange(
+            start=min(self.start, change.start),
+            old_end=end - self.delta,
+            new_end=end + change.delta,
+        )
+
+
+@dataclass
+class _NamespaceFrame:
+    position: Optional[Namespace]
+    indent: int
+    namespaces: List[str]
+    last_test_indent: int
+    keep: bool
+    children: List[PosList] = field(default_factory=list)
+
+
+@dataclass
+class ParsedFile:
+    lines: List[str]
+    vim_patterns: Dict
+    tree: Tree[Position]
+
 
 class FileParser:
-    def __init__(self, vim: VimClient):
+    def __init__(
+        self,
+        vim: VimClient,
+        cache: Optional[ParseCache] = None,
+        executor: Optional[Executor] = None,
+    ):
+        """
+        :param executor: Runs file reading and parsing off the event loop,
+        defaults to the event loop's default executor.
+        """
         self._vim = vim
+        self._cache = cache
+        self._executor = executor
+        self._parsed: Dict[str, ParsedFile] = {}
+        self._locks: Dict[str, Lock] = {}
 
     async def parse_file_structure(
-        self, file_name: str, vim_patterns: Dict
+        self, file_name: str, vim_patterns: Dict, change: Optional[LineChange] = None
+    ) -> Tree[Position]:
+        """
+        Parse the positions in a file.
+
+        If the file has been parsed before with the same patterns, only the
+        namespace enclosing the lines changed since then is parsed again and
+        spliced into the previous tree.
+
+        :param file_name: File to parse.
+        :param vim_patterns: Test and namespace patterns for the file's runner.
+        :param change: Span changed since the last parse, if already known.
+        Otherwise it is found by comparing with the previous contents.
+        """
+        return await asyncio.get_event_loop().run_in_executor(
+            self._executor, self._parse_file, file_name, vim_patterns, change
+        )
+
+    def _parse_file(
+        self, file_name: str, vim_patterns: Dict, change: Optional[LineChange]
+    ) -> Tree[Position]:
+        # Parses of one file are based on the previous one, so can't overlap
+        with self._locks.setdefault(file_name, Lock()):
+            return self._parse_file_locked(file_name, vim_patterns, change)
+
+    def _parse_file_locked(
+        self, file_name: str, vim_patterns: Dict, change: Optional[LineChange]
     ) -> Tree[Position]:
         patterns = self._convert_patterns(vim_patterns)
-        logger.fdebug("Converted pattern {vim_patterns} to {patterns}")
         with open(file_name, "r") as test_file:
             lines = test_file.readlines()
-        res, _ = self._parse_position_tree(
-            file_name, patterns["test"], patterns["namespace"], lines
+        previous = self._parsed.get(file_name)
+        tree = None
+        if previous and previous.vim_patterns == vim_patterns:
+            tree = self._parse_incremental(file_name, patterns, previous, lines, change)
+            if tree is previous.tree:
+                return tree
+        elif self._cache:
+            tree = self._read_cache(file_name, vim_patterns, lines)
+            if tree is not None:
+                logger.fdebug("Using cached positions for {file_name}")
+                self._parsed[file_name] = ParsedFile(
+                    lines=lines, vim_patterns=vim_patterns, tree=tree
+                )
+                return tree
+        if tree is None:
+            res = self._parse_position_tree(file_name, patterns, lines)
+            tree = Tree[Position].from_list(
+                [File(id=file_name, name=file_name, file=file_name, running=0), *res]
+            )
+        if self._cache:
+            self._write_cache(file_name, vim_patterns, lines, tree)
+        self._parsed[file_name] = ParsedFile(
+            lines=lines, vim_patterns=vim_patterns, tree=tree
+        )
+        return tree
+
+    def _parse_incremental(
+        self,
+        file_name: str,
+        patterns: PositionPatterns,
+        previous: ParsedFile,
+        lines: List[str],
+        change: Optional[LineChange],
+    ) -> Optional[Tree[Position]]:
+        """
+        Parse only the innermost namespace that contains all changed lines.
+
+        Returns None when the change can't be isolated to a namespace, in which
+        case the whole file should be parsed.
+        """
+        if change is None or not self._valid_change(change, previous.lines, lines):
+            change = self._diff_lines(previous.lines, lines)
+            if change is None:
+                return previous.tree
+
+        namespace = self._enclosing_namespace(previous, change)
+        while namespace is not None:
+            replacement = self._reparse_namespace(
+                file_name, patterns, namespace, lines, change.delta
+            )
+            if replacement is not None:
+                logger.fdebug(
+                    "Reparsed namespace {namespace.data.id} in {file_name} for lines {change}"
+                )
+                return self._splice(previous.tree, namespace, replacement, change.delta)
+            namespace = self._namespace_parent(namespace)
+        return None
+
+    def _cache_key(self, vim_patterns: Dict, lines: List[str]) -> Tuple[str, str]:
+        return (
+            ParseCache.digest("".join(lines)),
+            ParseCache.digest(json.dumps(vim_patterns, sort_keys=True)),
+        )
+
+    def _read_cache(
+        self, file_name: str, vim_patterns: Dict, lines: List[str]
+    ) -> Optional[Tree[Position]]:
+        records = self._cache.get(file_name, *self._cache_key(vim_patterns, lines))
+        if records is None:
+            return None
+        try:
+            return self._decode_tree(file_name, records)
+        except Exception:
+            logger.exception(f"Invalid cached positions for {file_name}")
+            return None
+
+    def _write_cache(
+        self, file_name: str, vim_patterns: Dict, lines: List[str], tree: Tree
+    ):
+        self._cache.put(
+            file_name, *self._cache_key(vim_patterns, lines), self._encode_tree(tree)
+        )
+
+    def _encode_tree(self, tree: Tree[Position]) -> List:
+        """
+        Flatten a tree to records of type, name, line, column and the preorder
+        index of the parent. IDs are left out as they are derived from names.
+        """
+        indexes = {id(tree): 0}
+        records = []
+        for index, node in enumerate(tree.nodes()):
+            if index:
+                indexes[id(node)] = index
+                pos = node.data
+                records.append(
+                    [pos.type, pos.name, pos.line, pos.col, indexes[id(node.parent)]]
+                )
+        return records
+
+    def _decode_tree(self, file_name: str, records: List) -> Tree[Position]:
+        root: List = [File(id=file_name, name=file_name, file=file_name, running=0)]
+        lists: List[List] = [root]
+        for pos_type, name, line, col, parent_index in records:
+            parent_list = lists[parent_index]
+            parent = parent_list[0]
+            namespaces = (
+                [*parent.namespaces, parent.id] if isinstance(parent, Namespace) else []
+            )
+            cls = Namespace if pos_type == "namespace" else Test
+            position = cls(
+                id=self._position_id(file_name, namespaces, name),
+                file=file_name,
+                line=line,
+                col=col,
+                name=name,
+                running=0,
+                namespaces=namespaces,
+            )
+            if cls is Namespace:
+                entry = [position]
+                parent_list.append(entry)
+                lists.append(entry)
+            else:
+                parent_list.append(position)
+                lists.append([position])
+        return Tree[Position].from_list(root)
+
+    def _diff_lines(
+        self, old_lines: List[str], new_lines: List[str]
+    ) -> Optional[LineChange]:
+        start = 0
+        limit = min(len(old_lines), len(new_lines))
+        while start < limit and old_lines[start] == new_lines[start]:
+            start += 1
+        if start == len(old_lines) == len(new_lines):
+            return None
+        old_end, new_end = len(old_lines), len(new_lines)
+        while (
+            old_end > start
+            and new_end > start
+            and old_lines[old_end - 1] == new_lines[new_end - 1]
+        ):
+            old_end -= 1
+            new_end -= 1
+        return LineChange(start=start, old_end=old_end, new_end=new_end)
+
+    def _valid_change(
+        self, change: LineChange, old_lines: List[str], new_lines: List[str]
+    ) -> bool:
+        return (
+            0 <= change.start <= min(change.old_end, change.new_end)
+            and change.old_end <= len(old_lines)
+            and len(old_lines) - change.old_end == len(new_lines) - change.new_end
         )
-        x = Tree[Position].from_list(
-            [File(id=file_name, name=file_name, file=file_name, running=0), *res]
+
+    def _enclosing_namespace(
+        self, previous: ParsedFile, change: LineChange
+    ) -> Optional[Tree[Position]]:
+        """
+        Find the deepest namespace whose body contains every changed line,
+        without its declaration line being changed.
+        """
+        nearest = previous.tree.sorted_search(
+            change.start, key=lambda pos: pos.line, strict=False
         )
-        return x
+        namespace = nearest if nearest and nearest.data.type == "namespace" else None
+        if namespace is None and nearest is not None:
+            namespace = self._namespace_parent(nearest)
+        while namespace is not None:
+            if change.old_end <= self._region_end(namespace, len(previous.lines)):
+                return namespace
+            namespace = self._namespace_parent(namespace)
+        return None
 
-    def _convert_patterns(
-        self, vim_patterns: Dict[str, List[str]]
-    ) -> Dict[str, List[Pattern]]:
+    def _namespace_parent(self, node: Tree[Position]) -> Optional[Tree[Position]]:
+        parent = node.parent
+        return parent if parent and parent.data.type == "namespace" else None
+
+    def _region_end(self, node: Tree[Position], num_lines: int) -> int:
+        """
+        Last line that belongs to a namespace, which is the line before the
+        next position outside of it.
+        """
+        successor = node.successor
+        end = successor.data.line - 1 if successor else num_lines
+        last = node.node(len(node) - 1).data.line
+        # Positions should be in line order, anything else can't be trusted
+        return end if end >= last else -1
+
+    def _reparse_namespace(
+        self,
+        file_name: str,
+        patterns: PositionPatterns,
+        namespace: Tree[Position],
+        lines: List[str],
+        delta: int,
+    ) -> Optional[List[Tree[Position]]]:
+        header = namespace.data.line
+        end = self._region_end(namespace, len(lines) - delta) + delta
+        indent = self._indent(lines[header - 1])
+        for line_index in range(header, end):
+            line = lines[line_index]
+            if self._indent(line) <= indent and patterns.match(line):
+                # A position which is not nested would close the namespace
+                # and change the structure around it.
+                return None
+
+        parent = namespace.parent
+        parent_indent = (
+            self._indent(lines[parent.data.line - 1])
+            if parent and parent.data.type == "namespace"
+            else -1
+        )
+        res = self._parse_position_tree(
+            file_name,
+            patterns,
+            lines,
+            start=header - 1,
+            end=end,
+            init_indent=parent_indent,
+            current_namespaces=namespace.data.namespaces,
+            last_test_indent=self._last_test_indent(namespace, lines),
+        )
+        # An emptied namespace is dropped, which can leave its parents empty too,
+        # so it is left to a parent or a full parse to remove.
+        if len(res) != 1 or any(
+            not isinstance(pos, list) or pos[0].id != namespace.data.id for pos in res
+        ):
+            return None
+        return [Tree[Position].from_list(pos) for pos in res]
+
+    def _last_test_indent(self, node: Tree[Position], lines: List[str]) -> int:
+        """
+        Indent of the last test before a node on the same or a parent level,
+        as it would be found while parsing down to the node.
+        """
+        parent = node.parent
+        while parent is not None:
+            siblings = parent.children
+            for sibling in reversed(siblings[: siblings.index(node)]):
+                if isinstance(sibling.data, Test):
+                    return self._indent(lines[sibling.data.line - 1])
+            node, parent = parent, parent.parent
+        return -1
+
+    def _indent(self, line: str) -> int:
+        match = INDENT_PATTERN.match(line)
+        return len(match[1]) if match else len(line)
+
+    def _splice(
+        self,
+        tree: Tree[Position],
+        target: Tree[Position],
+        replacement: List[Tree[Position]],
+        delta: int,
+    ) -> Tree[Position]:
+        """
+        Rebuild a tree with a subtree replaced, shifting all following
+        positions. Existing position objects are reused wherever they are
+        unchanged.
+        """
+        previous = {pos.id: pos for pos in target}
+        shifted = False
+
+        def reuse(pos: Position) -> Position:
+            old = previous.get(pos.id)
+            if old and old.line == pos.line and old.type == pos.type:
+                return old
+            return pos
+
+        def rebuild(node: Tree[Position]) -> List[Tree[Position]]:
+            nonlocal shifted
+            if node is target:
+                shifted = True
+                return [child.map(reuse) for child in replacement]
+            data = node.data
+            if shifted and delta:
+                data = replace(data, line=data.line + delta)
+            children = [
+                new_child for child in node.children for new_child in rebuild(child)
+            ]
+            return [Tree(data=data, children=children)]
+
+        return rebuild(tree)[0]
+
+    def _convert_patterns(self, vim_patterns: Dict[str, List[str]]) -> PositionPatterns:
+        key = (
+            vim_patterns.get("runner"),
+            tuple(vim_patterns.get("test", "")),
+            tuple(vim_patterns.get("namespace", "")),
+        )
+        patterns = _compiled_patterns.get(key)
+        if patterns is None:
+            patterns = _compiled_patterns[key] = self._compile_patterns(vim_patterns)
+            logger.fdebug("Converted pattern {vim_patterns} to {patterns}")
+        return patterns
+
+    def _compile_patterns(self, vim_patterns: Dict[str, List[str]]) -> PositionPatterns:
         tests = [
             self._convert_regex(pattern) for pattern in vim_patterns.get("test", "")
         ]
@@ -43,7 +433,7 @@ class FileParser:
             self._convert_regex(pattern)
             for pattern in vim_patterns.get("namespace", "")
         ]
-        return {"test": tests, "namespace": namespaces}
+        return PositionPatterns(tests=tests, namespaces=namespaces)
 
     def _convert_regex(self, vim_regex: str) -> Pattern:
         regex = vim_regex
@@ -54,88 +444,89 @@ class FileParser:
     def _parse_position_tree(
         self,
         file_name: str,
-        test_patterns: List[Pattern],
-        namespace_patterns: List[Pattern],
+        patterns: PositionPatterns,
         lines: List[str],
-        init_line: int = 1,
+        start: int = 0,
+        end: Optional[int] = None,
         init_indent: int = -1,
         current_namespaces: Optional[List[str]] = None,
-        last_test_indent=-1,
-    ) -> Tuple[List[PosList], int]:
+        last_test_indent: int = -1,
+    ) -> List[PosList]:
         """
         This function tries to emulate how vim-test will parse files based off
         of indents. This means that if a namespace is on the same indent as a
         test within it, the test will not detected correctly.  Since we fall
         back to vim-test for running there's no solution we can add here to
         avoid this without vim-test working around it too.
+
+        Lines from start to end are walked once, keeping a stack of the
+        namespaces which are still open. A namespace is closed by the first
+        position found at the same or a lower indent.
         """
-        positions = []
-        current_namespaces = current_namespaces or []
-        line_no = init_line
-        while line_no - init_line < len(lines):
-            line = lines[line_no - init_line]
-            test_name = self._find_match(line, test_patterns)
-            namespace_name = self._find_match(line, namespace_patterns)
-
-            if test_name:
-                cls = Test
-                name = test_name
-                children = None
-            elif namespace_name:
-                cls = Namespace
-                name = namespace_name
-            else:
-                line_no += 1
+        root = _NamespaceFrame(
+            position=None,
+            indent=init_indent,
+            namespaces=current_namespaces or [],
+            last_test_indent=last_test_indent,
+            keep=True,
+        )
+        stack = [root]
+        for line_index in range(start, len(lines) if end is None else end):
+            line = lines[line_index]
+            matched = patterns.match(line)
+            if not matched:
                 continue
 
-            current_indent = INDENT_PATTERN.match(line)
-            if current_indent and len(current_indent[1]) <= init_indent:
-                consumed = max(line_no - 1 - init_line, 1)
-                return positions, consumed
-
-            if cls is Test:
-                last_test_indent = len(current_indent[1])
+            current_indent = self._indent(line)
+            while len(stack) > 1 and current_indent <= stack[-1].indent:
+                self._close_namespace(stack)
+            frame = stack[-1]
+            if current_indent <= frame.indent:
+                break
 
-            id_suffix = hash((file_name, " ".join(current_namespaces)))
+            pos_type, name = matched
+            cls = Test if pos_type == "test" else Namespace
             position = cls(
-                id=self._clean_id(name + str(id_suffix)),
+                id=self._position_id(file_name, frame.namespaces, name),
                 file=file_name,
-                line=line_no,
+                line=line_index + 1,
                 col=1,
                 name=name,
                 running=0,
-                namespaces=current_namespaces,
+                namespaces=frame.namespaces,
             )
-
-            if cls is Namespace:
-                children, lines_consumed = self._parse_position_tree(
-                    file_name,
-                    test_patterns,
-                    namespace_patterns,
-                    lines[line_no - init_line + 1 :],
-                    init_line=line_no + 1,
-                    init_indent=len(current_indent[1]),
-                    current_namespaces=[*current_namespaces, position.id],
-                    last_test_indent=last_test_indent,
-                )
-                lines_consumed += 1
-                if children and (
-                    last_test_indent == -1 or last_test_indent >= len(current_indent[1])
-                ):
-                    positions.append([position, *children])
+            if cls is Test:
+                frame.last_test_indent = current_indent
+                frame.children.append(position)
             else:
-                lines_consumed = 1
-                positions.append(position)
+                stack.append(
+                    _NamespaceFrame(
+                        position=position,
+                        indent=current_indent,
+                        namespaces=[*frame.namespaces, position.id],
+                        last_test_indent=frame.last_test_indent,
+                        keep=frame.last_test_indent == -1
+                        or frame.last_test_indent >= current_indent,
+                    )
+                )
+
+        while len(stack) > 1:
+            self._close_namespace(stack)
+        return root.children
 
-            line_no += lines_consumed
-        return positions, line_no
+    def _close_namespace(self, stack: List["_NamespaceFrame"]):
+        frame = stack.pop()
+        # Namespaces nested deeper than the last test found around them are
+        # ignored, along with everything in them (e.g. classes defined in tests)
+        if frame.children and frame.keep:
+            stack[-1].children.append([frame.position, *frame.children])
+
+    def _position_id(self, file_name: str, namespaces: List[str], name: str) -> str:
+        # A stable digest rather than hash() so IDs are the same in every process
+        id_suffix = hashlib.blake2b(
+            "\0".join([file_name, *namespaces, name]).encode(), digest_size=8
+        ).hexdigest()
+        return self._clean_id(name + id_suffix)
 
     def _clean_id(self, id: str) -> str:
         return re.subn(r"[.'\" \\/]", "_", id)[0]
-
-    def _find_match(self, line: str, patterns: List[Pattern]) -> Optional[str]:
-        for pattern in patterns:
-            matched = pattern.match(line)
-            if matched:
-                return matched[1]
-        return None
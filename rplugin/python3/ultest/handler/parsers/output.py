@@ -1,6 +1,6 @@
 import re
 from dataclasses import dataclass
-from typing import Iterator, List, Optional
+from typing import Iterable, Iterator, List, Optional
 
 from ...logging import get_logger
 
@@ -59,7 +59,7 @@ class OutputParser:
     def can_parse(self, runner: str) -> bool:
         return runner in self._patterns
 
-    def parse_failed(self, runner: str, output: List[str]) -> Iterator[ParseResult]:
+    def parse_failed(self, runner: str, output: Iterable[str]) -> Iterator[ParseResult]:
         pattern = self._patterns[runner]
         fail_pattern = re.compile(pattern.failed_test)
         for line in output:
@@ -0,0 +1,147 @@
+import re
+from typing import FrozenSet, List, Optional, Pattern, Tuple
+
+try:
+    from re import _parser as sre_parse  # type: ignore
+except ImportError:
+    import sre_parse  # type: ignore
+
+from ...logging import get_logger
+
+logger = get_logger()
+
+_BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=")
+_REPEATS = {"MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT"}
+
+
+class PositionPatterns:
+    """
+    Test and namespace patterns of a runner, fused into a single regex.
+
+    Each pattern is wrapped in a named group of one alternation, tests first, so
+    a line is matched with one regex call rather than one per pattern. Lines
+    that don't contain any literal text required by the patterns (e.g. "def
+    test_") are rejected before any regex is run.
+    """
+
+    def __init__(self, tests: List[Pattern], namespaces: List[Pattern]):
+        self.tests = tests
+        self.namespaces = namespaces
+        self._combined = self._combine()
+        self._literals = self._required_literals()
+
+    def match(self, line: str) -> Optional[Tuple[str, str]]:
+        """
+        Find the position declared on a line.
+
+        :return: Type and name of the position, if any.
+        """
+        if self._literals is not None and not any(
+            literal in line for literal in self._literals
+        ):
+            return None
+        if self._combined is None:
+            return self._match_each(line)
+        matched = self._combined.match(line)
+        if not matched:
+            return None
+        name = matched[self._combined.groupindex[matched.lastgroup] + 1]
+        if not name:
+            # The pattern matched without a name, so later patterns may
+            # still provide one.
+            return self._match_each(line)
+        return ("test" if matched.lastgroup[0] == "t" else "namespace", name)
+
+    def _match_each(self, line: str) -> Optional[Tuple[str, str]]:
+        for pos_type, patterns in (
+            ("test", self.tests),
+            ("namespace", self.namespaces),
+        ):
+            for pattern in patterns:
+                matched = pattern.match(line)
+                if matched:
+                    if matched[1]:
+                        return pos_type, matched[1]
+                    break
+        return None
+
+    def _combine(self) -> Optional[Pattern]:
+        alternatives = [
+            *(
+                f"(?P<t{index}>{pattern.pattern})"
+                for index, pattern in enumerate(self.tests)
+            ),
+            *(
+                f"(?P<n{index}>{pattern.pattern})"
+                for index, pattern in enumerate(self.namespaces)
+            ),
+        ]
+        patterns = [*self.tests, *self.namespaces]
+        if not patterns or any(
+            not pattern.groups
+            or pattern.flags != patterns[0].flags
+            or _BACKREFERENCE.search(pattern.pattern)
+            for pattern in patterns
+        ):
+            return None
+        try:
+            return re.compile("|".join(alternatives), patterns[0].flags)
+        except re.error:
+            logger.fdebug("Unable to combine patterns {patterns}")
+            return None
+
+    def _required_literals(self) -> Optional[FrozenSet[str]]:
+        literals: FrozenSet[str] = frozenset()
+        for pattern in [*self.tests, *self.namespaces]:
+            if pattern.flags & re.IGNORECASE:
+                return None
+            try:
+                required = _literal_requirement(sre_parse.parse(pattern.pattern))
+            except Exception:
+                required = None
+            if not required:
+                return None
+            literals = literals | required
+        return literals or None
+
+
+def _literal_requirement(parsed) -> Optional[FrozenSet[str]]:
+    """
+    Find a set of strings, one of which must be in any text matched by a parsed
+    regex. The longest candidate is chosen to reject as many lines as possible.
+    """
+    candidates: List[FrozenSet[str]] = []
+    run: List[str] = []
+
+    def end_run():
+        if run:
+            candidates.append(frozenset(["".join(run)]))
+            run.clear()
+
+    def walk(items):
+        for op, av in items:
+            name = getattr(op, "name", str(op))
+            if name == "LITERAL":
+                run.append(chr(av))
+            elif name == "SUBPATTERN":
+                walk(av[-1])
+            elif name == "AT":
+                continue
+            else:
+                end_run()
+                if name == "BRANCH":
+                    branches = [_literal_requirement(branch) for branch in av[1]]
+                    if all(branches):
+                        candidates.append(frozenset().union(*branches))  # type: ignore
+                elif name in _REPEATS and av[0] >= 1:
+                    repeated = _literal_requirement(av[2])
+                    if repeated:
+                        candidates.append(repeated)
+
+    walk(parsed)
+    end_run()
+    return max(
+        candidates,
+        key=lambda candidate: min(len(literal) for literal in candidate),
+        default=None,
+    )
@@ -0,0 +1,146 @@
+import json
+import re
+from dataclasses import dataclass
+from typing import IO, Callable, Iterator, List, Optional, Tuple
+from xml.etree.ElementTree import iterparse
+
+from ...logging import get_logger
+
+logger = get_logger()
+
+
+@dataclass(frozen=True)
+class ReportResult:
+    name: str
+    namespaces: List[str]
+    passed: bool
+    # Seconds
+    duration: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class ReportFormat:
+    # Added to the command, with {path} replaced by the report's path
+    args: Tuple[str, ...]
+    parse: Callable[[IO[bytes]], Iterator[ReportResult]]
+    # Report is written to the process output rather than its own file
+    to_output: bool = False
+
+
+def _junit_parser(
+    name_suffix: str,
+) -> Callable[[IO[bytes]], Iterator[ReportResult]]:
+    """
+    :param name_suffix: Pattern of text added to names of parametrized tests.
+    """
+    suffix_pattern = re.compile(name_suffix)
+
+    def parse(report: IO[bytes]) -> Iterator[ReportResult]:
+        for _, element in iterparse(report):
+            if element.tag != "testcase":
+                continue
+            time = element.get("time")
+            yield ReportResult(
+                name=suffix_pattern.sub("", element.get("name", "")),
+                namespaces=[
+                    namespace
+                    for namespace in re.split(
+                        r"[.\\]", element.get("classname") or element.get("class", "")
+                    )
+                    if namespace
+                ],
+                passed=not any(child.tag in ("failure", "error") for child in element),
+                duration=float(time) if time else None,
+            )
+            # Finished elements are dropped so large reports aren't held
+            element.clear()
+
+    return parse
+
+
+def _parse_go_json(report: IO[bytes]) -> Iterator[ReportResult]:
+    for line in report:
+        if not line.startswith(b"{"):
+            continue
+        try:
+            event = json.loads(line)
+        except ValueError:
+            continue
+        if not event.get("Test") or event.get("Action") not in ("pass", "fail", "skip"):
+            continue
+        # Subtests are named after their parents, e.g. TestA/sub_test
+        *namespaces, name = event["Test"].split("/")
+        yield ReportResult(
+            name=name,
+            namespaces=namespaces,
+            passed=event["Action"] != "fail",
+            duration=event.get("Elapsed"),
+        )
+
+
+def _parse_jest_json(report: IO[bytes]) -> Iterator[ReportResult]:
+    # Jest writes a single JSON document, so it can't be read incrementally
+    for suite in json.load(report).get("testResults", []):
+        for assertion in suite.get("assertionResults", []):
+            duration = assertion.get("duration")
+            yield ReportResult(
+                name=assertion["title"],
+                namespaces=assertion.get("ancestorTitles", []),
+                passed=assertion.get("status") != "failed",
+                duration=duration / 1000 if duration is not None else None,
+            )
+
+
+_REPORT_FORMATS = {
+    "python#pytest": ReportFormat(
+        args=("--junitxml={path}",), parse=_junit_parser(r"\[.*\]$")
+    ),
+    "php#phpunit": ReportFormat(
+        args=("--log-junit", "{path}"), parse=_junit_parser(r" with data set .*$")
+    ),
+    "go#gotest": ReportFormat(args=("-json",), parse=_parse_go_json, to_output=True),
+    "javascript#jest": ReportFormat(
+        args=("--json", "--outputFile={path}"), parse=_parse_jest_json
+    ),
+}
+
+
+class ReportParser:
+    """
+    Reads results of grouped runs from reports written by the test runner,
+    giving exact results and durations for each test instead of scraping
+    failures from the output.
+    """
+
+    def __init__(self, runners: List[str], disable_runners: List[str]) -> None:
+        """
+        :param runners: Runners to request reports from.
+        :param disable_runners: Runners which aren't run in groups.
+        """
+        self._formats = {
+            runner: report_format
+            for runner, report_format in _REPORT_FORMATS.items()
+            if runner in runners and runner not in disable_runners
+        }
+
+    def can_parse(self, runner: str) -> bool:
+        return runner in self._formats
+
+    def report_path(self, runner: str, output_path: str) -> str:
+        """
+        :param output_path: Path that the process output is written to.
+        """
+        if self._formats[runner].to_output:
+            return output_path
+        return f"{output_path}_report"
+
+    def args(self, runner: str, report_path: str) -> List[str]:
+        """
+        Arguments to add to a command so it writes a report to the given path.
+        """
+        return [arg.format(path=report_path) for arg in self._formats[runner].args]
+
+    def parse(self, runner: str, report_path: str) -> Iterator[ReportResult]:
+        logger.finfo("Reading {runner} report {report_path}")
+        with open(report_path, "rb") as report:
+            yield from self._formats[runner].parse(report)
@@ -1,15 +1,38 @@
+import asyncio
+import os
 from collections import defaultdict
+from concurrent.futures import Executor
 from functools import partial
-from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from shlex import split
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
 from ...logging import get_logger
 from ...models import File, Namespace, Position, Result, Test, Tree
 from ...vim_client import VimClient
-from ..parsers import OutputParser, ParseResult, Position
+from ..parsers import Position
 from .processes import ProcessManager
+from .status import StatusCounter
+
+if TYPE_CHECKING:
+    from ..parsers import OutputParser, ParseResult, ReportParser
+    from .events import TestEvent
+    from .tail import OutputTail
 
 logger = get_logger()
 
+# Seconds between reads of the output of running groups
+OUTPUT_POLL_INTERVAL = 0.2
+
 
 class PositionRunner:
     """
@@ -20,14 +43,43 @@ class PositionRunner:
         self,
         vim: VimClient,
         process_manager: ProcessManager,
-        output_parser: OutputParser,
+        output_parser: Optional["OutputParser"] = None,
+        report_parser: Optional["ReportParser"] = None,
+        executor: Optional[Executor] = None,
     ):
+        """
+        :param executor: Runs reading and parsing of output off the event loop,
+        defaults to the event loop's default executor.
+        """
         self._vim = vim
+        self._executor = executor
         self._results = defaultdict(dict)
         self._processes = process_manager
-        self._output_parser = output_parser
+        self._parser = output_parser
+        self._reports = report_parser
         self._running: Set[str] = set()
+        self._status = StatusCounter()
         self._external_outputs = {}
+        self._runners: Dict[str, str] = {}
+        self._commands: Dict[str, Dict[Tuple[str, str, int], List[str]]] = {}
+
+    @property
+    def _output_parser(self) -> "OutputParser":
+        # Only needed once tests are run, so imported then
+        if self._parser is None:
+            from ..parsers.output import OutputParser
+
+            self._parser = OutputParser(self._vim.config.disable_grouping)
+        return self._parser
+
+    @property
+    def _report_parser(self) -> "ReportParser":
+        if self._reports is None:
+            from ..parsers.reports import ReportParser
+
+            config = self._vim.config
+            self._reports = ReportParser(config.report_runners, config.disable_grouping)
+        return self._reports
 
     def run(
         self,
@@ -39,32 +91,77 @@ class PositionRunner:
         env: Optional[Dict] = None,
     ):
 
-        runner = self._vim.sync_call("ultest#adapter#get_runner", file_name)
-        if not self._output_parser.can_parse(runner) or len(tree) == 1:
+        runner = self._get_runner(file_name)
+        if len(tree) == 1 or not (
+            self._output_parser.can_parse(runner)
+            or self._report_parser.can_parse(runner)
+            or self._events_enabled(runner)
+        ):
+            if len(tree) > 1 and self._bisect_enabled(runner):
+                self._run_bisect(tree, runner, on_start, on_finish, env)
+                return
             self._run_separately(tree, on_start, on_finish, env)
             return
-        self._run_group(tree, file_tree, file_name, on_start, on_finish, env)
+        self._run_group(tree, file_tree, runner, on_start, on_finish, env)
 
-    def stop(self, pos: Position, tree: Tree[Position]):
+    def stop(
+        self, pos: Position, positions: Dict[str, Tree[Position]]
+    ) -> List[Position]:
+        """
+        Stop the job running a position.
+
+        :return: Positions which are no longer running.
+        """
         root = None
         if self._vim.stop(pos.id):
-            root = tree.search(pos.id, lambda data: data.id)
+            root = positions.get(pos.id)
         else:
             for namespace in [*pos.namespaces, pos.file]:
                 if self._vim.stop(namespace):
-                    root = tree.search(namespace, lambda data: data.id)
+                    root = positions.get(namespace)
                     break
         if not root:
             logger.warn(f"No matching job found for position {pos}")
-            return
+            return []
 
         for node in root:
+            old_state = self._state(node)
             node.running = 0
-            self._vim.call("ultest#process#move", node)
+            self._running.discard(node.id)
+            self._status.move(node, old_state, self._state(node))
+        return list(root)
+
+    def clear_cache(self, file_name: Optional[str] = None):
+        """
+        Forget runners and commands built for positions, so they are fetched from
+        Vim again.
+
+        :param file_name: File to forget commands for, all are forgotten if not
+        given.
+        """
+        if file_name is None:
+            logger.debug("Clearing runner and command cache")
+            self._runners.clear()
+            self._commands.clear()
+        else:
+            self._commands.pop(file_name, None)
 
     def clear_results(self, file_name: str) -> Iterable[str]:
+        self._status.clear_results(file_name)
         return self._results.pop(file_name, {}).keys()
 
+    def reset_status(self, file_name: str, positions: Tree[Position]):
+        """
+        Recount the states of tests in a file after its positions changed.
+        """
+        self._status.reset(file_name, ((pos, self._state(pos)) for pos in positions))
+
+    def file_status(self, file_name: str) -> Dict:
+        """
+        Counts of tests in each state for a file and each of its namespaces.
+        """
+        return self._status.file_status(file_name)
+
     def register_external_start(
         self,
         tree: Tree[Position],
@@ -86,8 +183,7 @@ class PositionRunner:
         code: int,
         on_finish: Callable[[Position, Result], None],
     ):
-        file_name = tree.data.file
-        runner = self._vim.sync_call("ultest#adapter#get_runner", file_name)
+        runner = self._get_runner(tree.data.file)
         path = self._external_outputs.pop(tree.data.id)
         logger.finfo(
             "Saving external result for process '{tree.data.id}' with exit code {code}"
@@ -103,13 +199,16 @@ class PositionRunner:
                     on_finish=on_finish,
                 )
             return
-        self._process_results(
-            tree=tree,
-            file_tree=file_tree,
-            code=code,
-            output_path=path,
-            runner=runner,
-            on_finish=on_finish,
+        self._vim.launch(
+            self._process_results(
+                tree=tree,
+                file_tree=file_tree,
+                code=code,
+                output_path=path,
+                runner=runner,
+                on_finish=on_finish,
+            ),
+            tree.data.id,
         )
 
     def is_running(self, position_id: str) -> int:
@@ -122,11 +221,40 @@ class PositionRunner:
         return self._processes.create_attach_script(process_id)
 
     def _get_cwd(self) -> Optional[str]:
-        return (
-            self._vim.sync_call("get", "g:", "test#project_root")
-            or self._vim.sync_call("getcwd")
-            or None
-        )
+        config = self._vim.config
+        return config.project_root or config.cwd or None
+
+    def _use_cache(self) -> bool:
+        # Without dict watchers, changes to vim-test settings can't be seen
+        return bool(self._vim.config.dict_watchers)
+
+    def _get_runner(self, file_name: str) -> str:
+        if file_name in self._runners:
+            return self._runners[file_name]
+        runner = self._vim.sync_call("ultest#adapter#get_runner", file_name)
+        if self._use_cache():
+            self._runners[file_name] = runner
+        return runner
+
+    def _build_commands(self, positions: List[Position], scope: str) -> List[List[str]]:
+        """
+        Get the commands to run positions, building any that aren't cached in a
+        single request.
+
+        :param positions: Positions to run.
+        :param scope: vim-test scope to run them with.
+        """
+        commands: Dict[Tuple[str, str, int], List[str]] = {}
+        if self._use_cache():
+            commands = self._commands.setdefault(positions[0].file, {})
+        keys = [(scope, pos.id, pos.line) for pos in positions]
+        missing = [pos for pos, key in zip(positions, keys) if key not in commands]
+        if missing:
+            logger.fdebug("Building {len(missing)} commands with scope {scope}")
+            built = self._vim.sync_call("ultest#adapter#build_cmds", missing, scope)
+            for pos, cmd in zip(missing, built):
+                commands[(scope, pos.id, pos.line)] = split(" ".join(cmd))
+        return [commands[key] for key in keys]
 
     def _run_separately(
         self,
@@ -144,10 +272,11 @@ class PositionRunner:
         for pos in tree:
             if isinstance(pos, Test):
                 tests.append(pos)
+        if not tests:
+            return
 
-        for test in tests:
+        for test, cmd in zip(tests, self._build_commands(tests, "nearest")):
             self._register_started(test, on_start)
-            cmd = self._vim.sync_call("ultest#adapter#build_cmd", test, "nearest")
 
             async def run(cmd=cmd, test=test):
                 (code, output_path) = await self._processes.run(
@@ -161,57 +290,379 @@ class PositionRunner:
 
             self._vim.launch(run(), test.id)
 
+    def _bisect_enabled(self, runner: str) -> bool:
+        from .merge import can_merge
+
+        config = self._vim.config
+        return (
+            bool(config.bisect)
+            and can_merge(runner)
+            and runner not in config.disable_grouping
+        )
+
+    def _run_bisect(
+        self,
+        tree: Tree[Position],
+        runner: str,
+        on_start: Callable[[Position], None],
+        on_finish: Callable[[Position, Result], None],
+        env: Optional[Dict] = None,
+    ):
+        """
+        Run a group in a single process, and only if it fails find the failing
+        tests by running halves of them in single processes. Passing groups take
+        one process however many tests they hold, and a single failure among N
+        tests takes around 2 * log2(N) more.
+
+        Both halves of a failed run are always run, so a test is only reported
+        as failed when it fails alone. A group failing only because of tests
+        interacting is reported as failed while its tests pass.
+        """
+        tests = [pos for pos in tree if isinstance(pos, Test)]
+        if not tests:
+            return
+        scope = "file" if isinstance(tree.data, File) else "nearest"
+        (group_cmd,) = self._build_commands([tree.data], scope)
+        # Commands can only be built on the Vim thread, so all are built up front
+        commands = {
+            test.id: cmd
+            for test, cmd in zip(tests, self._build_commands(tests, "nearest"))
+        }
+        for pos in tree:
+            self._register_started(pos, on_start)
+
+        self._vim.launch(
+            self._bisect(
+                tree,
+                runner,
+                group_cmd,
+                tests,
+                commands,
+                self._get_cwd(),
+                on_finish,
+                env,
+            ),
+            tree.data.id,
+        )
+
+    async def _bisect(
+        self,
+        tree: Tree[Position],
+        runner: str,
+        group_cmd: List[str],
+        tests: List[Test],
+        commands: Dict[str, List[str]],
+        root: Optional[str],
+        on_finish: Callable[[Position, Result], None],
+        env: Optional[Dict] = None,
+    ):
+        codes: Dict[str, int] = {}
+
+        def register(position: Position, code: int, output_path: str):
+            codes[position.id] = code
+            if position.id in self._running:
+                self._register_result(
+                    position,
+                    Result(
+                        id=position.id,
+                        file=position.file,
+                        code=code,
+                        output=output_path,
+                    ),
+                    on_finish,
+                )
+
+        async def search(
+            tests: List[Test], failure: Optional[Tuple[int, str]] = None
+        ) -> bool:
+            """
+            Find the failing tests in a list, registering results as they are
+            found.
+
+            :param failure: Exit code and output of a failed run of the tests,
+            when they have already been run together.
+            :return: Whether any of the tests failed.
+            """
+            if failure is None:
+                from .merge import merge_commands
+
+                cmd = merge_commands(runner, [commands[test.id] for test in tests])
+                if cmd is not None:
+                    process_id = (
+                        tests[0].id
+                        if len(tests) == 1
+                        else f"{tests[0].id}..{tests[-1].id}"
+                    )
+                    (code, output_path) = await self._processes.run(
+                        cmd, tree.data.file, process_id, cwd=root, env=env
+                    )
+                    if not code:
+                        for test in tests:
+                            register(test, 0, output_path)
+                        return False
+                    failure = (code, output_path)
+            if len(tests) == 1 and failure is not None:
+                register(tests[0], *failure)
+                return True
+            middle = len(tests) // 2
+            first_failed = await search(tests[:middle])
+            second_failed = await search(tests[middle:])
+            return first_failed or second_failed
+
+        (code, output_path) = await self._processes.run(
+            group_cmd, tree.data.file, tree.data.id, cwd=root, env=env
+        )
+        if code:
+            logger.fdebug("Group {tree.data.id} failed, searching for failed tests")
+            if not await search(tests, (code, output_path)):
+                logger.finfo(
+                    "Group {tree.data.id} failed but all of its tests pass alone"
+                )
+        else:
+            for test in tests:
+                register(test, 0, output_path)
+
+        for node in tree.nodes():
+            pos = node.data
+            if isinstance(pos, Test):
+                continue
+            pos_code = (
+                code
+                if pos is tree.data
+                else next((codes[test.id] for test in node if codes.get(test.id)), 0)
+            )
+            register(pos, pos_code, output_path)
+
     def _run_group(
         self,
         tree: Tree[Position],
         file_tree: Tree[Position],
-        file_name: str,
+        runner: str,
         on_start: Callable[[Position], None],
         on_finish: Callable[[Position, Result], None],
         env: Optional[Dict] = None,
     ):
-        runner = self._vim.sync_call("ultest#adapter#get_runner", file_name)
         scope = "file" if isinstance(tree.data, File) else "nearest"
-        cmd = self._vim.sync_call("ultest#adapter#build_cmd", tree[0], scope)
+        (cmd,) = self._build_commands([tree[0]], scope)
         root = self._get_cwd()
+        group_output = self._processes.output_path(tree.data.file, tree.data.id)
+        failed: Set[Tuple[str, ...]] = set()
+        on_event = None
+        if self._events_enabled(runner):
+            from .events import RUNNER_ARGS
+
+            cmd = [*cmd, *RUNNER_ARGS.get(runner, [])]
+            on_event = self._event_handler(
+                tree, file_tree, group_output, failed, on_start, on_finish
+            )
 
         for pos in tree:
             self._register_started(pos, on_start)
 
+        if self._report_parser.can_parse(runner):
+            report_path = self._report_parser.report_path(runner, group_output)
+            cmd = [*cmd, *self._report_parser.args(runner, report_path)]
+            separate_report = report_path != group_output
+
+            async def run_with_report(cmd=cmd):
+                if separate_report:
+                    # A report left by a previous run would be read if this one
+                    # failed to write it
+                    try:
+                        os.remove(report_path)
+                    except FileNotFoundError:
+                        pass
+                (code, output_path) = await self._processes.run(
+                    cmd,
+                    tree.data.file,
+                    tree.data.id,
+                    cwd=root,
+                    env=env,
+                    on_event=on_event,
+                )
+                await self._process_report(
+                    tree, file_tree, code, output_path, report_path, runner, on_finish
+                )
+
+            self._vim.launch(run_with_report(), tree.data.id)
+            return
+
+        # Runners can be grouped for their events alone, without output patterns
+        parse_output = self._output_parser.can_parse(runner)
+
         async def run(cmd=cmd):
-            (code, output_path) = await self._processes.run(
-                cmd, tree.data.file, tree.data.id, cwd=root, env=env
+            from .tail import OutputTail
+
+            tail = OutputTail(group_output)
+            exited = asyncio.Event()
+            follow = None
+            if parse_output:
+                follow = asyncio.ensure_future(
+                    self._follow_output(
+                        tree, file_tree, tail, runner, failed, on_finish, exited
+                    )
+                )
+            try:
+                (code, output_path) = await self._processes.run(
+                    cmd,
+                    tree.data.file,
+                    tree.data.id,
+                    cwd=root,
+                    env=env,
+                    on_event=on_event,
+                )
+            finally:
+                if follow:
+                    # Cancelling would drop lines taken by a read in progress
+                    exited.set()
+                    await follow
+            if parse_output:
+                failed.update(
+                    await asyncio.get_event_loop().run_in_executor(
+                        self._executor, self._tail_failures, tree, tail, runner, True
+                    )
+                )
+            await self._process_results(
+                tree, file_tree, code, output_path, runner, on_finish, failed=failed
             )
-            self._process_results(tree, file_tree, code, output_path, runner, on_finish)
 
         self._vim.launch(run(), tree.data.id)
 
-    def _process_results(
+    def _events_enabled(self, runner: str) -> bool:
+        config = self._vim.config
+        return runner in config.event_runners and runner not in config.disable_grouping
+
+    def _event_handler(
         self,
         tree: Tree[Position],
         file_tree: Tree[Position],
-        code: int,
         output_path: str,
+        failed: Set[Tuple[str, ...]],
+        on_start: Callable[[Position], None],
+        on_finish: Callable[[Position, Result], None],
+    ) -> Callable[["TestEvent"], None]:
+        """
+        Handle events sent by a group while it runs, registering each test's
+        result as soon as it finishes. Parametrized tests finish once for each
+        case, so they are started again by the next case and fail if any case
+        fails.
+
+        :param failed: Updated with failed tests, so results of namespaces can
+        be found when the group exits.
+        """
+        tests = self._test_keys(tree, self._namespaces(file_tree))
+        reported: Dict[str, Tuple[int, Optional[float]]] = {}
+
+        def on_event(event: "TestEvent"):
+            pos = self._match_test(tests, event.name, event.namespaces)
+            if pos is None:
+                logger.fdebug("No position found for test event {event}")
+                return
+            if event.event == "start":
+                if pos.id not in self._running:
+                    self._register_started(pos, on_start)
+            elif event.event == "finish":
+                _add_result(reported, pos.id, event.passed, event.duration)
+                code, duration = reported[pos.id]
+                if code:
+                    failed.update(self._get_failed_set(iter([event]), tree))
+                self._register_result(
+                    pos,
+                    Result(
+                        id=pos.id,
+                        file=pos.file,
+                        code=code,
+                        output=output_path,
+                        duration=duration,
+                    ),
+                    on_finish,
+                )
+
+        return on_event
+
+    async def _follow_output(
+        self,
+        tree: Tree[Position],
+        file_tree: Tree[Position],
+        tail: "OutputTail",
         runner: str,
+        failed: Set[Tuple[str, ...]],
         on_finish: Callable[[Position, Result], None],
+        exited: asyncio.Event,
     ):
+        """
+        Parse the output of a group as it is written, registering tests as
+        failed as soon as their failure appears. Other results wait for the
+        process to exit.
 
-        namespaces = {
-            position.id: position
-            for position in file_tree
-            if isinstance(position, Namespace)
-        }
-        output = []
-        if code:
-            with open(output_path, "r") as cmd_out:
-                output = cmd_out.readlines()
+        :param exited: Set when the process exits, stopping once the read in
+        progress has been added to failed.
+        """
+        namespaces = self._namespaces(file_tree)
+        while True:
+            try:
+                await asyncio.wait_for(exited.wait(), OUTPUT_POLL_INTERVAL)
+                return
+            except asyncio.TimeoutError:
+                pass
+            found = await asyncio.get_event_loop().run_in_executor(
+                self._executor, self._tail_failures, tree, tail, runner
+            )
+            if not found - failed:
+                continue
+            failed.update(found)
+            for pos in tree:
+                if (
+                    isinstance(pos, Test)
+                    and pos.id in self._running
+                    and self._get_exit_code(tree.data, 1, failed, namespaces, pos)
+                ):
+                    logger.fdebug("Found failure of {pos.id} in running group")
+                    self._register_result(
+                        pos,
+                        Result(id=pos.id, file=pos.file, code=1, output=tail.path),
+                        on_finish,
+                    )
+
+    def _tail_failures(
+        self,
+        tree: Tree[Position],
+        tail: "OutputTail",
+        runner: str,
+        final: bool = False,
+    ) -> Set[Tuple[str, ...]]:
+        return self._get_failed_set(
+            self._output_parser.parse_failed(runner, tail.read(final)), tree
+        )
 
-        parsed_failures = self._output_parser.parse_failed(runner, output)
-        failed = self._get_failed_set(parsed_failures, tree)
+    async def _process_results(
+        self,
+        tree: Tree[Position],
+        file_tree: Tree[Position],
+        code: int,
+        output_path: str,
+        runner: str,
+        on_finish: Callable[[Position, Result], None],
+        failed: Optional[Set[Tuple[str, ...]]] = None,
+    ):
+        """
+        :param failed: Failures already parsed from the output, which is read
+        if not given.
+        """
+        namespaces = self._namespaces(file_tree)
+        if failed is None:
+            failed = set()
+            if code:
+                failed = await asyncio.get_event_loop().run_in_executor(
+                    self._executor, self._read_failures, tree, output_path, runner
+                )
 
         get_code = partial(self._get_exit_code, tree.data, code, failed, namespaces)
 
         for pos in tree:
+            if pos.id not in self._running:
+                # Already registered as failed while the group was running
+                continue
             self._register_result(
                 pos,
                 Result(
@@ -223,6 +674,130 @@ class PositionRunner:
                 on_finish,
             )
 
+    async def _process_report(
+        self,
+        tree: Tree[Position],
+        file_tree: Tree[Position],
+        code: int,
+        output_path: str,
+        report_path: str,
+        runner: str,
+        on_finish: Callable[[Position, Result], None],
+    ):
+        """
+        Register results of a group from the report written by the runner,
+        falling back to the exit code and output if it couldn't be read.
+        """
+        reported = await asyncio.get_event_loop().run_in_executor(
+            self._executor,
+            self._read_report,
+            tree,
+            self._namespaces(file_tree),
+            report_path,
+            runner,
+        )
+        if not reported:
+            logger.finfo("No results read from report of {tree.data.id}")
+            await self._process_results(
+                tree,
+                file_tree,
+                code,
+                output_path,
+                runner,
+                on_finish,
+                failed=None if self._output_parser.can_parse(runner) else set(),
+            )
+            return
+
+        for node in tree.nodes():
+            pos = node.data
+            if pos.id not in self._running:
+                continue
+            if isinstance(pos, Test):
+                # Tests missing from the report take the result of the group
+                pos_code, duration = reported.get(pos.id, (code, None))
+            else:
+                tests = [reported.get(child.id) for child in node if child is not pos]
+                pos_code = next(
+                    (result[0] for result in tests if result and result[0]), 0
+                )
+                durations = [
+                    result[1] for result in tests if result and result[1] is not None
+                ]
+                duration = sum(durations) if durations else None
+            self._register_result(
+                pos,
+                Result(
+                    id=pos.id,
+                    file=pos.file,
+                    code=pos_code,
+                    output=output_path,
+                    duration=duration,
+                ),
+                on_finish,
+            )
+
+    def _read_report(
+        self,
+        tree: Tree[Position],
+        namespaces: Dict[str, Namespace],
+        report_path: str,
+        runner: str,
+    ) -> Dict[str, Tuple[int, Optional[float]]]:
+        """
+        :return: Exit code and duration of each reported test, by position ID.
+        """
+        tests = self._test_keys(tree, namespaces)
+        reported: Dict[str, Tuple[int, Optional[float]]] = {}
+        try:
+            for result in self._report_parser.parse(runner, report_path):
+                pos = self._match_test(tests, result.name, result.namespaces)
+                if pos is not None:
+                    _add_result(reported, pos.id, result.passed, result.duration)
+        except Exception:
+            logger.exception(f"Unable to read report {report_path}")
+            return {}
+        return reported
+
+    def _test_keys(
+        self, tree: Tree[Position], namespaces: Dict[str, Namespace]
+    ) -> Dict[Tuple[str, ...], Test]:
+        return {
+            (
+                pos.name,
+                *[namespaces[namespace_id].name for namespace_id in pos.namespaces],
+            ): pos
+            for pos in tree
+            if isinstance(pos, Test)
+        }
+
+    def _match_test(
+        self, tests: Dict[Tuple[str, ...], Test], name: str, namespaces: List[str]
+    ) -> Optional[Test]:
+        # Runners can give more namespaces than positions have, such as the
+        # module path, so the longest matching suffix is used
+        for start in range(len(namespaces) + 1):
+            pos = tests.get((name, *namespaces[start:]))
+            if pos is not None:
+                return pos
+        return None
+
+    def _namespaces(self, file_tree: Tree[Position]) -> Dict[str, Namespace]:
+        return {
+            position.id: position
+            for position in file_tree
+            if isinstance(position, Namespace)
+        }
+
+    def _read_failures(
+        self, tree: Tree[Position], output_path: str, runner: str
+    ) -> Set[Tuple[str, ...]]:
+        # Output is read a line at a time, as it can be too large to hold
+        with open(output_path, "r") as cmd_out:
+            return self._get_failed_set(
+                self._output_parser.parse_failed(runner, cmd_out), tree
+            )
+
     def _get_exit_code(
         self,
         root: Position,
@@ -258,7 +833,7 @@ class PositionRunner:
         return 0
 
     def _get_failed_set(
-        self, parsed_failures: Iterator[ParseResult], tree: Tree[Position]
+        self, parsed_failures: Iterator["ParseResult"], tree: Tree[Position]
     ) -> Set[Tuple[str, ...]]:
         def from_root(namespaces: List[str]):
             for index, namespace in enumerate(namespaces):
@@ -286,8 +861,10 @@ class PositionRunner:
         self, position: Position, on_start: Callable[[Position], None]
     ):
         logger.fdebug("Registering {position.id} as started")
+        old_state = self._state(position)
         position.running = 1
         self._running.add(position.id)
+        self._status.move(position, old_state, self._state(position))
         on_start(position)
 
     def _register_result(
@@ -297,6 +874,29 @@ class PositionRunner:
         on_finish: Callable[[Position, Result], None],
     ):
         logger.fdebug("Registering {position.id} as exited with result {result}")
+        old_state = self._state(position)
         self._results[position.file][position.id] = result
-        self._running.remove(position.id)
+        self._running.discard(position.id)
+        self._status.move(position, old_state, self._state(position))
         on_finish(position, result)
+
+    def _state(self, position: Position) -> Optional[str]:
+        if position.id in self._running:
+            return "running"
+        result = self._results[position.file].get(position.id)
+        if result:
+            return "failed" if result.code else "passed"
+        return None
+
+
+def _add_result(
+    reported: Dict[str, Tuple[int, Optional[float]]],
+    pos_id: str,
+    passed: bool,
+    duration: Optional[float],
+):
+    # Parametrized tests are reported once for each case
+    code, total = reported.get(pos_id, (0, None))
+    if duration is not None:
+        total = (total or 0) + duration
+    reported[pos_id] = (code or int(not passed), total)
@@ -0,0 +1,129 @@
+import asyncio
+import json
+from asyncio import Future, StreamReader, StreamWriter
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Set
+
+from ...logging import get_logger
+
+logger = get_logger()
+
+SOCKET_ENV = "ULTEST_EVENT_SOCKET"
+PROCESS_ENV = "ULTEST_EVENT_ID"
+
+# Arguments loading the plugins shipped with ultest which send events
+RUNNER_ARGS = {"python#pytest": ["-p", "ultest_pytest"]}
+
+
+@dataclass(frozen=True)
+class TestEvent:
+    event: str
+    name: str
+    namespaces: List[str]
+    passed: bool = True
+    # Seconds
+    duration: Optional[float] = None
+
+
+class EventServer:
+    """
+    Receives events sent by test processes while they run, over a Unix socket.
+
+    A process connects to the path in $ULTEST_EVENT_SOCKET and sends JSON
+    objects, one per line. The first identifies the process with the ID from
+    $ULTEST_EVENT_ID, {"event": "connect", "process": "<ID>"}, and each after
+    is a test starting or finishing, as described by :help ultest-events.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._server = None
+        self._handlers: Dict[str, Callable[[TestEvent], None]] = {}
+        # Futures completed when each connection closes, by process. Connections
+        # which haven't identified their process yet are under None.
+        self._connections: Dict[Optional[str], Set[Future]] = {}
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    async def subscribe(self, process_id: str, handler: Callable[[TestEvent], None]):
+        """
+        Send events from a process to a handler, starting the server if needed.
+        """
+        if self._server is None:
+            logger.finfo("Listening for test events on {self._path}")
+            self._server = await asyncio.start_unix_server(
+                self._on_connect, path=self._path
+            )
+        self._handlers[process_id] = handler
+
+    async def finish(self, process_id: str, timeout: float = 1):
+        """
+        Wait for events sent by an exited process to be read, then stop sending
+        them to its handler.
+
+        :param timeout: Seconds to wait, in case the connection is held open by
+        another process it started.
+        """
+        connections = {
+            *self._connections.get(process_id, ()),
+            *self._connections.get(None, ()),
+        }
+        if connections:
+            await asyncio.wait(connections, timeout=timeout)
+        self.unsubscribe(process_id)
+
+    def unsubscribe(self, process_id: str):
+        self._handlers.pop(process_id, None)
+        self._connections.pop(process_id, None)
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _on_connect(self, reader: StreamReader, writer: StreamWriter):
+        closed: Future = asyncio.get_event_loop().create_future()
+        process_id = None
+        self._connections.setdefault(None, set()).add(closed)
+        try:
+            try:
+                process_id = json.loads(await reader.readline())["process"]
+            except (ValueError, KeyError, TypeError):
+                logger.warn("Test event connection didn't identify its process")
+                return
+            finally:
+                self._connections[None].discard(closed)
+            if process_id not in self._handlers:
+                logger.warn(f"Test events received from unknown process {process_id}")
+                return
+            self._connections.setdefault(process_id, set()).add(closed)
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                self._on_line(process_id, line)
+        finally:
+            writer.close()
+            closed.set_result(None)
+            self._connections.get(process_id, set()).discard(closed)
+
+    def _on_line(self, process_id: str, line: bytes):
+        handler = self._handlers.get(process_id)
+        if not handler:
+            return
+        try:
+            data = json.loads(line)
+            event = TestEvent(
+                event=data["event"],
+                name=data["name"],
+                namespaces=data.get("namespaces", []),
+                passed=data.get("passed", True),
+                duration=data.get("duration"),
+            )
+        except (ValueError, KeyError, TypeError, AttributeError):
+            logger.warn(f"Invalid test event from process {process_id}: {line!r}")
+            return
+        handler(event)
@@ -0,0 +1,69 @@
+import re
+from typing import Callable, Dict, List, Optional
+
+# A whole name pattern, as vim-test builds for -run and --testNamePattern
+_ANCHORED = re.compile(r"^\^([^^$]*)\$$")
+_LINE = re.compile(r"^(.+?)((?::\d+)+)$")
+
+
+def _merge_patterns(values: List[str]) -> Optional[str]:
+    names = [_ANCHORED.match(value) for value in values]
+    if not all(names):
+        return None
+    return f"^({'|'.join(name[1] for name in names)})$"
+
+
+def _merge_lines(values: List[str]) -> Optional[str]:
+    locations = [_LINE.match(value) for value in values]
+    if not all(locations) or len({location[1] for location in locations}) > 1:
+        return None
+    return locations[0][1] + "".join(location[2] for location in locations)
+
+
+# How the argument selecting a test is combined to select several. None means
+# the runner accepts each of the arguments together.
+_MERGERS: Dict[str, Optional[Callable[[List[str]], Optional[str]]]] = {
+    "go#gotest": _merge_patterns,
+    "go#richgo": _merge_patterns,
+    "javascript#jest": _merge_patterns,
+    "ruby#rspec": _merge_lines,
+    "python#pytest": None,
+    "python#pyunit": None,
+    "elixir#exunit": None,
+}
+
+
+def can_merge(runner: str) -> bool:
+    return runner in _MERGERS
+
+
+def merge_commands(runner: str, commands: List[List[str]]) -> Optional[List[str]]:
+    """
+    Combine the commands running single tests into one running all of them.
+
+    :return: The combined command, or None if the commands differ in anything
+    other than a single argument selecting the test.
+    """
+    first = commands[0]
+    if len(commands) == 1:
+        return first
+    if not can_merge(runner) or any(len(cmd) != len(first) for cmd in commands):
+        return None
+    differing = [
+        index
+        for index in range(len(first))
+        if any(cmd[index] != first[index] for cmd in commands)
+    ]
+    if not differing:
+        return first
+    if len(differing) != 1:
+        return None
+    (index,) = differing
+    values = [cmd[index] for cmd in commands]
+    merger = _MERGERS[runner]
+    if merger is None:
+        return [*first[:index], *values, *first[index + 1 :]]
+    merged = merger(values)
+    if merged is None:
+        return None
+    return [*first[:index], merged, *first[index + 1 :]]
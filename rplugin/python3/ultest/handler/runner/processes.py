@@ -2,13 +2,17 @@ import inspect
 import os
 import re
 import tempfile
+import time
 from asyncio import CancelledError, subprocess
 from os import path
-from typing import Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
 
 from ...logging import get_logger
 from ...vim_client import VimClient
-from .handle import ProcessIOHandle
+
+if TYPE_CHECKING:
+    from .events import EventServer, TestEvent
+    from .handle import ProcessIOHandle
 
 logger = get_logger()
 
@@ -21,9 +25,11 @@ class ProcessManager:
     def __init__(self, vim: VimClient):
         self._vim = vim
         self._dir = tempfile.TemporaryDirectory(prefix="ultest")
-        self._processes: Dict[str, Optional[ProcessIOHandle]] = {}
+        self._processes: Dict[str, Optional["ProcessIOHandle"]] = {}
         self._external_stdout: Dict[str, str] = {}
-        self._use_pty = self._vim.sync_call("get", "g:", "ultest_use_pty")
+        self._created = time.monotonic()
+        self._spawned = False
+        self._event_server: Optional["EventServer"] = None
 
     async def run(
         self,
@@ -32,6 +38,7 @@ class ProcessManager:
         process_id: str,
         cwd: Optional[str] = None,
         env: Optional[Dict] = None,
+        on_event: Optional[Callable[["TestEvent"], None]] = None,
     ) -> Tuple[int, str]:
         """
         Run a test with the given command.
@@ -39,20 +46,33 @@ class ProcessManager:
         Constucts a result from the given test.
 
         :param cmd: Command arguments to run
+        :param on_event: Receives test events sent by the process, which is
+        given the socket to send them to in its environment.
         :return: Exit code and path to file containing stdout/stderr
         """
 
         parent_dir = self._create_group_dir(group_id)
         stdin_path = path.join(parent_dir, f"{self._safe_file_name(process_id)}_in")
-        stdout_path = path.join(parent_dir, f"{self._safe_file_name(process_id)}_out")
+        stdout_path = self.output_path(group_id, process_id)
+        # Only needed once tests are run, so imported then
+        from .handle import ProcessIOHandle
+
         io_handle = ProcessIOHandle(in_path=stdin_path, out_path=stdout_path)
+        if on_event:
+            try:
+                await self._events.subscribe(process_id, on_event)
+            except OSError:
+                logger.warn("Unable to listen for test events", exc_info=True)
+                on_event = None
+            else:
+                env = {**(env or {}), **self._event_env(process_id, env)}
         self._processes[process_id] = io_handle
         logger.fdebug(
             "Starting test process {process_id} with command {cmd}, cwd = {cwd}, env = {env}"
         )
         try:
             async with self._vim.semaphore:
-                with io_handle.open(use_pty=self._use_pty) as (in_, out_):
+                with io_handle.open(use_pty=self._vim.config.use_pty) as (in_, out_):
                     try:
                         process = await subprocess.create_subprocess_exec(
                             *cmd,
@@ -72,13 +92,56 @@ class ProcessManager:
                         )
                         code = 1
                     else:
+                        if not self._spawned:
+                            self._spawned = True
+                            logger.finfo(
+                                "First test process started {time.monotonic() - self._created:.3f}s after startup"
+                            )
                         code = await process.wait()
+                        if on_event:
+                            await self._events.finish(process_id)
                     logger.fdebug(
                         "Process {process_id} complete with exit code: {code}"
                     )
                     return (code, stdout_path)
         finally:
             del self._processes[process_id]
+            if on_event:
+                self._events.unsubscribe(process_id)
+
+    @property
+    def _events(self) -> "EventServer":
+        # Only needed once grouped tests are run, so imported then
+        if self._event_server is None:
+            from .events import EventServer
+
+            self._event_server = EventServer(path.join(self._dir.name, "events.sock"))
+        return self._event_server
+
+    def output_path(self, group_id: str, process_id: str) -> str:
+        """
+        Path that the stdout and stderr of a process are written to.
+        """
+        return path.join(
+            self._group_dir(group_id), f"{self._safe_file_name(process_id)}_out"
+        )
+
+    def _event_env(self, process_id: str, env: Optional[Dict]) -> Dict[str, str]:
+        plugin_dir = path.join(self._dir.name, "plugins")
+        if not path.isdir(plugin_dir):
+            os.mkdir(plugin_dir)
+            from . import pytest_plugin
+
+            with open(path.join(plugin_dir, "ultest_pytest.py"), "w") as plugin:
+                plugin.write(inspect.getsource(pytest_plugin))
+        from .events import PROCESS_ENV, SOCKET_ENV
+
+        python_path = (env or {}).get("PYTHONPATH", os.environ.get("PYTHONPATH"))
+        return {
+            SOCKET_ENV: self._events.path,
+            PROCESS_ENV: process_id,
+            "PYTHONPATH": os.pathsep.join(filter(None, [plugin_dir, python_path])),
+        }
 
     def _safe_file_name(self, name: str) -> str:
         return re.subn(r"[.'\" \\/]", "_", name.replace(os.sep, "__"))[0]
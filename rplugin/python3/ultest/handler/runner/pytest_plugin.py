@@ -0,0 +1,69 @@
+"""
+Pytest plugin sending the start and finish of each test to ultest, loaded with
+"-p ultest_pytest". Written to the temporary directory of ultest and imported
+by the test process, so only the standard library can be used.
+"""
+
+import json
+import os
+import re
+import socket
+
+_connection = None
+_reports = {}
+
+
+def pytest_configure(config):
+    global _connection
+    path = os.environ.get("ULTEST_EVENT_SOCKET")
+    # With pytest-xdist, events are sent by the controller rather than workers
+    if not path or hasattr(config, "workerinput"):
+        return
+    try:
+        _connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        _connection.connect(path)
+    except OSError:
+        _connection = None
+        return
+    _send({"event": "connect", "process": os.environ.get("ULTEST_EVENT_ID")})
+
+
+def pytest_unconfigure(config):
+    global _connection
+    if _connection is not None:
+        _connection.close()
+        _connection = None
+
+
+def pytest_runtest_logstart(nodeid, location):
+    _send({"event": "start", **_names(nodeid)})
+
+
+def pytest_runtest_logreport(report):
+    # Setup, call and teardown are each reported, failing if any of them fail
+    passed, duration = _reports.get(report.nodeid, (True, 0.0))
+    _reports[report.nodeid] = (
+        passed and not report.failed,
+        duration + (report.duration or 0.0),
+    )
+
+
+def pytest_runtest_logfinish(nodeid, location):
+    passed, duration = _reports.pop(nodeid, (True, None))
+    _send({"event": "finish", **_names(nodeid), "passed": passed, "duration": duration})
+
+
+def _names(nodeid):
+    *namespaces, name = nodeid.split("::")[1:] or [nodeid]
+    # Parametrized tests are sent under the name of the test function
+    return {"name": re.sub(r"\[.*\]$", "", name), "namespaces": namespaces}
+
+
+def _send(event):
+    global _connection
+    if _connection is None:
+        return
+    try:
+        _connection.sendall(json.dumps(event).encode() + b"\n")
+    except OSError:
+        _connection = None
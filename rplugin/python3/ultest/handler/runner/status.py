@@ -0,0 +1,93 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+from ...models import Position
+
+FILE_KEY = "file"
+
+
+@dataclass
+class Status:
+    tests: int = 0
+    passed: int = 0
+    failed: int = 0
+    running: int = 0
+
+    def dict(self) -> Dict:
+        return {
+            "tests": self.tests,
+            "passed": self.passed,
+            "failed": self.failed,
+            "running": self.running,
+        }
+
+
+class StatusCounter:
+    """
+    Counts of tests in each state for files and the namespaces within them.
+
+    Counts are moved between states as tests start and finish, so reading them
+    doesn't require looking at every test. Only tests are counted, files and
+    namespaces are not.
+    """
+
+    def __init__(self):
+        self._statuses: Dict[str, Dict[str, Status]] = {}
+
+    def reset(self, file_name: str, states: Iterable[Tuple[Position, Optional[str]]]):
+        """
+        Recount a file, when its positions have changed.
+
+        :param file_name: File to recount.
+        :param states: Position and state pairs for all positions in the file.
+        """
+        self._statuses[file_name] = {}
+        for position, state in states:
+            self.move(position, None, state, counted=False)
+
+    def move(
+        self,
+        position: Position,
+        old: Optional[str],
+        new: Optional[str],
+        counted: bool = True,
+    ):
+        """
+        Move a test from one state to another.
+
+        :param position: Position which changed.
+        :param old: Previous state, one of "passed", "failed", "running" or None.
+        :param new: New state.
+        :param counted: Whether the test is already included in the totals.
+        """
+        if position.type != "test" or (old == new and counted):
+            return
+        statuses = self._statuses.setdefault(position.file, {})
+        for key in [FILE_KEY, *position.namespaces]:
+            status = statuses.get(key)
+            if status is None:
+                status = statuses[key] = Status()
+            if not counted:
+                status.tests += 1
+            if old:
+                setattr(status, old, getattr(status, old) - 1)
+            if new:
+                setattr(status, new, getattr(status, new) + 1)
+
+    def clear_results(self, file_name: str):
+        for status in self._statuses.get(file_name, {}).values():
+            status.passed = status.failed = 0
+
+    def file_status(self, file_name: str) -> Dict:
+        """
+        :return: Counts of the file as a whole and of each namespace in it.
+        """
+        statuses = self._statuses.get(file_name, {})
+        return {
+            FILE_KEY: (statuses.get(FILE_KEY) or Status()).dict(),
+            "namespaces": {
+                key: status.dict()
+                for key, status in statuses.items()
+                if key != FILE_KEY
+            },
+        }
@@ -0,0 +1,43 @@
+import codecs
+from threading import Lock
+from typing import List
+
+
+class OutputTail:
+    """
+    Reads lines appended to a file while a process is writing it.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._offset = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._partial = ""
+        self._lock = Lock()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def read(self, final: bool = False) -> List[str]:
+        """
+        Read lines written since the last read. Can be called from any thread.
+
+        :param final: The file is complete, so a last line without a newline is
+        included.
+        :return: Complete lines, with line endings.
+        """
+        with self._lock:
+            try:
+                with open(self._path, "rb") as output:
+                    output.seek(self._offset)
+                    data = output.read()
+            except FileNotFoundError:
+                data = b""
+            self._offset += len(data)
+            text = self._partial + self._decoder.decode(data, final=final)
+            lines = text.splitlines(keepends=True)
+            self._partial = ""
+            if lines and not final and not lines[-1].endswith(("\n", "\r")):
+                self._partial = lines.pop()
+            return lines
@@ -0,0 +1,126 @@
+import time
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from ..logging import get_logger
+from ..models import Position
+from ..vim_client import VimClient
+
+logger = get_logger()
+
+
+class UpdateScheduler:
+    """
+    Collects process events for Vim and sends them at most a fixed number of
+    times a second, so streams of results don't flood Vim's main thread.
+
+    Consecutive events of the same kind are sent in one call to the matching
+    ultest#process#<event>_many function. Events for files which aren't shown
+    in any window are held back until the file is shown, keeping their order.
+    The status of each file that events were sent for is sent along with them.
+    """
+
+    def __init__(
+        self,
+        vim: VimClient,
+        status: Callable[[str], Dict],
+        current: Optional[Callable[[Position], Position]] = None,
+    ):
+        """
+        :param status: Gets the status of a file, to set as b:ultest_status.
+        :param current: Gets a position at the line it is on now, called on the
+        main Vim thread as events are sent, since edits are tracked there.
+        """
+        self._vim = vim
+        self._status = status
+        self._current = current
+        self._lock = Lock()
+        self._pending: List[Tuple[str, str, Any]] = []
+        self._deferred: Dict[str, List[Tuple[str, str, Any]]] = {}
+        self._visible: Optional[Set[str]] = None
+        self._scheduled = False
+        self._last_flush = float("-inf")
+
+    def queue(self, event: str, file_name: str, item: Any):
+        """
+        :param event: Name of the process event.
+        :param file_name: File the event belongs to.
+        :param item: Position, or position and result, to send.
+        """
+        with self._lock:
+            self._pending.append((event, file_name, item))
+        self._schedule()
+
+    def set_visible(self, file_names: Iterable[str]):
+        """
+        Record the files shown in Vim, sending any events held back for them.
+
+        :param file_names: Absolute paths of all files shown in a window.
+        """
+        with self._lock:
+            self._visible = set(file_names)
+            shown = [name for name in self._deferred if name in self._visible]
+            for file_name in shown:
+                self._pending.extend(self._deferred.pop(file_name))
+        if shown:
+            logger.fdebug("Sending held back events for {shown}")
+            self._schedule()
+
+    def flush(self):
+        """
+        Send all events for visible files. Must be called from the main Vim
+        thread.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._scheduled = False
+            self._last_flush = time.monotonic()
+            batches: List[Tuple[str, List[Any]]] = []
+            sent_files: Set[str] = set()
+            for event, file_name, item in pending:
+                if file_name in self._deferred or not self._is_visible(file_name):
+                    self._deferred.setdefault(file_name, []).append(
+                        (event, file_name, item)
+                    )
+                    continue
+                sent_files.add(file_name)
+                if batches and batches[-1][0] == event:
+                    batches[-1][1].append(item)
+                else:
+                    batches.append((event, [item]))
+        if self._current:
+            batches = [
+                (event, [self._resolve(item) for item in items])
+                for event, items in batches
+            ]
+        for file_name in sent_files:
+            self._vim.call(
+                "setbufvar", file_name, "ultest_status", self._status(file_name)
+            )
+        for event, items in batches:
+            logger.fdebug("Sending {len(items)} {event} events")
+            self._vim.call(f"ultest#process#{event}_many", items)
+
+    def _resolve(self, item: Any) -> Any:
+        if isinstance(item, list):
+            position, *rest = item
+            return [self._current(position), *rest]
+        return self._current(item)
+
+    def _is_visible(self, file_name: str) -> bool:
+        # Until Vim reports which files are shown, all of them are assumed to be
+        return self._visible is None or file_name in self._visible
+
+    def _schedule(self):
+        with self._lock:
+            if self._scheduled or not self._pending:
+                return
+            self._scheduled = True
+            max_rate = self._vim.config.max_update_rate
+            delay = (
+                self._last_flush + 1 / max_rate - time.monotonic() if max_rate else 0
+            )
+        if delay > 0:
+            self._vim.schedule_later(delay, self.flush)
+        else:
+            self._vim.schedule(self.flush)
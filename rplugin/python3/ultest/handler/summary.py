@@ -0,0 +1,154 @@
+import os
+from typing import Dict, List, Set, Tuple
+
+from ..logging import get_logger
+from ..models import Position, Tree
+from ..vim_client import VimClient
+from .diff import opcodes
+from .runner import PositionRunner
+from .tracker import PositionTracker
+
+logger = get_logger()
+
+# Text of a line, its highlights as (group, start byte, end byte) and the file
+# and ID of the position shown on it.
+Row = Tuple[str, Tuple[Tuple[str, int, int], ...], str, str]
+
+_BLANK: Row = ("", (), "", "")
+_COLLAPSED = " ▶"
+_INDENT = "  "
+
+
+class SummaryModel:
+    """
+    Lines of the summary window, built from the stored positions and results.
+
+    Each render is compared with the previous one so only lines which changed
+    are sent to Vim, along with their highlights. Children of collapsed
+    positions aren't built at all, so a large tree only costs what is shown.
+    """
+
+    def __init__(
+        self, vim: VimClient, tracker: PositionTracker, runner: PositionRunner
+    ):
+        self._vim = vim
+        self._tracker = tracker
+        self._runner = runner
+        self._rows: List[Row] = []
+        self._files: List[str] = []
+        self._collapsed: Set[Tuple[str, str]] = set()
+
+    def render(self, files: List[str], reset: bool = False):
+        """
+        Send the lines which changed since the last render.
+
+        :param files: Files to show, in order.
+        :param reset: The summary buffer was recreated, so all lines are sent.
+        """
+        self._files = files
+        rows = self._build()
+        if reset:
+            splices = [[0, -1, [self._row_dict(row) for row in rows]]]
+        else:
+            splices = [
+                [
+                    old_start,
+                    old_end,
+                    [self._row_dict(row) for row in rows[new_start:new_end]],
+                ]
+                for tag, old_start, old_end, new_start, new_end in opcodes(
+                    self._rows, rows
+                )
+                if tag != "equal"
+            ]
+            # Applied last to first so earlier line numbers are still valid
+            splices.reverse()
+        self._rows = rows
+        if splices:
+            logger.fdebug("Sending {len(splices)} changes to summary")
+            self._vim.call("ultest#summary#patch", splices)
+
+    def toggle(self, file_name: str, pos_id: str):
+        """
+        Collapse or expand a position, hiding or showing its children.
+        """
+        key = (file_name, pos_id)
+        if key in self._collapsed:
+            self._collapsed.remove(key)
+        else:
+            self._collapsed.add(key)
+        self.render(self._files)
+
+    def _build(self) -> List[Row]:
+        rows: List[Row] = []
+        for file_name in self._files:
+            tree = self._tracker.file_positions(file_name)
+            if not tree:
+                continue
+            if rows:
+                rows.append(_BLANK)
+            self._add_rows(tree, rows)
+        return rows
+
+    def _add_rows(self, tree: Tree[Position], rows: List[Row]):
+        stack = [(tree, 0)]
+        while stack:
+            node, depth = stack.pop()
+            position = node.data
+            collapsed = (position.file, position.id) in self._collapsed
+            rows.append(self._row(position, depth, collapsed and bool(node.children)))
+            if not collapsed:
+                stack.extend((child, depth + 1) for child in reversed(node.children))
+
+    def _row(self, position: Position, depth: int, collapsed: bool) -> Row:
+        config = self._vim.config
+        result = self._runner.get_result(position.id, position.file)
+        if self._runner.is_running(position.id):
+            icon, highlight = config.running_sign, "UltestRunning"
+        elif result:
+            icon, highlight = (
+                (config.fail_sign, "UltestFail")
+                if result.code
+                else (config.pass_sign, "UltestPass")
+            )
+        else:
+            icon, highlight = config.not_run_sign, "UltestDefault"
+
+        prefix = _INDENT * depth
+        name = (
+            self._relative(position.name) if position.type == "file" else position.name
+        )
+        text = f"{prefix}{icon} {name}"
+        icon_start = _width(prefix)
+        highlights = [(highlight, icon_start, icon_start + _width(icon))]
+        if position.type in ("file", "namespace"):
+            group = (
+                "UltestSummaryFile"
+                if position.type == "file"
+                else "UltestSummaryNamespace"
+            )
+            highlights.append((group, _width(text) - _width(name), _width(text)))
+        if collapsed:
+            text += _COLLAPSED
+        return (text, tuple(highlights), position.file, position.id)
+
+    def _relative(self, path: str) -> str:
+        # Same as fnamemodify(path, ":.")
+        cwd = self._vim.config.cwd
+        if cwd and path.startswith(cwd.rstrip(os.sep) + os.sep):
+            return path[len(cwd.rstrip(os.sep)) + 1 :]
+        return path
+
+    def _row_dict(self, row: Row) -> Dict:
+        text, highlights, file_name, pos_id = row
+        return {
+            "text": text,
+            "highlights": [list(highlight) for highlight in highlights],
+            "file": file_name,
+            "id": pos_id,
+        }
+
+
+def _width(text: str) -> int:
+    # Highlight columns are byte offsets
+    return len(text.encode())
@@ -1,14 +1,23 @@
 import os
-from typing import Callable, Dict, Optional
+import time
+from dataclasses import replace
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Tuple
 
 from ..logging import get_logger
 from ..models import Tree
 from ..vim_client import VimClient
+from .diff import diff_trees
+from .lines import LineShifts
 from .parsers import FileParser, Position
+from .parsers.file import LineChange, clear_pattern_cache
 from .runner import PositionRunner
 
 logger = get_logger()
 
+# Seconds without edits before shifted positions are sent to Vim
+SETTLE_DELAY = 0.5
+
 
 class PositionTracker:
     def __init__(
@@ -17,6 +26,18 @@ class PositionTracker:
         self._vim = vim
         self._file_parser = file_parser
         self._stored_positions: Dict[str, Tree[Position]] = {}
+        self._position_index: Dict[str, Dict[str, Tree[Position]]] = {}
+        # Last node of each ID which is shared by several positions
+        self._duplicate_index: Dict[str, Dict[str, Tree[Position]]] = {}
+        self._fingerprints: Dict[str, Tuple] = {}
+        self._file_patterns: Dict[str, Dict] = {}
+        self._shifts: Dict[str, LineShifts] = {}
+        # Lines edited since the last parse, None when they can't be known
+        self._changes: Dict[str, Optional[LineChange]] = {}
+        self._last_edits: Dict[str, float] = {}
+        # Edits are shifted on the main Vim thread while parsed positions are
+        # stored from the event loop
+        self._lock = Lock()
         self._runner = runner
 
     def update(self, file_name: str, callback: Optional[Callable] = None):
@@ -26,7 +47,7 @@ class PositionTracker:
         :param file_name: Name of file to clear results from.
         """
 
-        file_name = self._vim.sync_call("fnamemodify", file_name, ":p")
+        file_name = self._vim.absolute_path(file_name)
 
         if not os.path.isfile(file_name):
             return
@@ -36,14 +57,13 @@ class PositionTracker:
             logger.fdebug("No patterns found for {file_name}")
             return
 
-        recorded_tests: Dict[str, Position] = {
-            test.id: test for test in self._stored_positions.get(file_name, [])
-        }
-        if not recorded_tests:
+        if file_name not in self._stored_positions:
             self._init_test_file(file_name)
 
+        self._settle(file_name)
+        change = self._changes.pop(file_name, None)
         self._vim.launch(
-            self._async_update(file_name, vim_patterns, recorded_tests, callback),
+            self._async_update(file_name, vim_patterns, callback, change),
             "update_positions",
         )
 
@@ -51,48 +71,176 @@ class PositionTracker:
         self,
         file_name: str,
         vim_patterns: Dict,
-        recorded_tests: Dict[str, Position],
         callback: Optional[Callable],
+        change: Optional[LineChange] = None,
     ):
         logger.finfo("Updating positions in {file_name}")
 
-        positions = await self._parse_positions(file_name, vim_patterns)
-        tests = list(positions)
+        positions = await self._file_parser.parse_file_structure(
+            file_name, vim_patterns, change
+        )
+        fingerprint = self._fingerprint(positions)
+        previous = self._fingerprints.get(file_name)
+        if previous == fingerprint:
+            logger.fdebug("Positions unchanged in {file_name}")
+        else:
+            self._send_diff(file_name, positions)
+        self._fingerprints[file_name] = fingerprint
+        if callback:
+            callback()
+
+    def _fingerprint(self, positions: Tree[Position]) -> Tuple:
+        """
+        Structure of a tree that matters to Vim. IDs are derived from the chain
+        of namespaces, so their order determines the shape of the tree.
+        """
+        return tuple((pos.id, pos.type, pos.line) for pos in positions)
+
+    def _send_diff(self, file_name: str, positions: Tree[Position]):
+        with self._lock:
+            diff = diff_trees(self._stored_positions.get(file_name), positions)
+            self._store_positions(file_name, positions)
+            self._shifts.pop(file_name, None)
+        self._runner.clear_cache(file_name)
+        self._runner.reset_status(file_name, positions)
+        for test in diff.moved:
+            test.running = self._runner.is_running(test.id)
+        inserted = []
+        for test in diff.inserted:
+            existing_result = self._runner.get_result(test.id, test.file)
+            if existing_result:
+                diff.replaced.append((test, existing_result))
+            else:
+                inserted.append(test)
+        diff.inserted = inserted
+        logger.fdebug(
+            "Sending changes to {file_name}: {len(diff.inserted)} new, "
+            "{len(diff.replaced)} replaced, {len(diff.removed)} removed, "
+            "{len(diff.moved)} moved, {len(diff.renamed)} renamed"
+        )
         self._vim.call(
             "setbufvar",
             file_name,
-            "ultest_sorted_tests",
-            [test.id for test in tests],
+            "ultest_status",
+            self._runner.file_status(file_name),
         )
-        for test in tests:
-            if test.id in recorded_tests:
-                recorded = recorded_tests.pop(test.id)
-                if recorded.line != test.line:
-                    test.running = self._runner.is_running(test.id)
-                    logger.fdebug(
-                        "Moving test {test.id} from {recorded.line} to {test.line} in {file_name}"
-                    )
-                    self._vim.call("ultest#process#move", test)
-            else:
-                existing_result = self._runner.get_result(test.id, test.file)
-                if existing_result:
-                    logger.fdebug(
-                        "Replacing test {test.id} to {test.line} in {file_name}"
-                    )
-                    self._vim.call("ultest#process#replace", test, existing_result)
-                else:
-                    logger.fdebug("New test {test.id} found in {file_name}")
-                    self._vim.call("ultest#process#new", test)
-
-        self._remove_old_positions(recorded_tests)
-        self._vim.command("doau User UltestPositionsUpdate")
-        if callback:
-            callback()
+        self._vim.call("ultest#process#apply_diff", file_name, diff)
+
+    def lines_changed(self, file: str, edits: Optional[List[List[int]]]):
+        """
+        Shift stored positions for lines edited in a buffer. Shifted positions
+        are sent to Vim once edits pause, or when they are next read.
+
+        :param file: File of the edited buffer.
+        :param edits: First line, old last line and new last line of each edit,
+        0-based and exclusive, or None if the buffer was reloaded.
+        """
+        absolute_path = self._vim.absolute_path(file)
+        with self._lock:
+            tree = self._stored_positions.get(absolute_path)
+            if tree is None:
+                return
+            if edits is None:
+                logger.fdebug("Buffer reloaded for {absolute_path}, dropping edits")
+                self._shifts.pop(absolute_path, None)
+                self._changes[absolute_path] = None
+                return
+            shifts = self._shifts.get(absolute_path)
+            if shifts is None:
+                shifts = self._shifts[absolute_path] = LineShifts(tree)
+            change = self._changes.get(absolute_path)
+            known = change is not None or absolute_path not in self._changes
+            for first, last, new_last in edits:
+                shifts.edit(first, last, new_last)
+                if known:
+                    edit = LineChange(start=first, old_end=last, new_end=new_last)
+                    change = change.followed_by(edit) if change else edit
+            if known:
+                self._changes[absolute_path] = change
+        if shifts.edited:
+            self._schedule_settle(absolute_path)
+
+    def current(self, position: Position) -> Position:
+        """
+        Position with the line it is on now, as it may have moved since it was
+        read. Must be called from the main Vim thread, where edits are tracked.
+        """
+        # Stored positions already have absolute paths
+        node = self._find_position(position.file, position.id)
+        if node is None or node.data.line == position.line:
+            return position
+        return replace(position, line=node.data.line)
 
     def file_positions(self, file: str) -> Optional[Tree[Position]]:
-        absolute_path = self._vim.sync_call("fnamemodify", file, ":p")
+        absolute_path = self._vim.absolute_path(file)
+        self._settle(absolute_path)
         return self._stored_positions.get(absolute_path)
 
+    def find_position(
+        self, file: str, pos_id: str, last: bool = False
+    ) -> Optional[Tree[Position]]:
+        """
+        Find the node of a position in a file by its ID.
+
+        :param file: File containing the position.
+        :param pos_id: ID of the position.
+        :param last: Return the last position with the ID in file order, rather
+        than the first, when several share it.
+        :return: The position's node, if it exists
+        """
+        return self._find_position(self._vim.absolute_path(file), pos_id, last)
+
+    def _find_position(
+        self, absolute_path: str, pos_id: str, last: bool = False
+    ) -> Optional[Tree[Position]]:
+        self._settle(absolute_path)
+        if last and pos_id in self._duplicate_index.get(absolute_path, {}):
+            return self._duplicate_index[absolute_path][pos_id]
+        return self._position_index.get(absolute_path, {}).get(pos_id)
+
+    def position_index(self, file: str) -> Dict[str, Tree[Position]]:
+        absolute_path = self._vim.absolute_path(file)
+        self._settle(absolute_path)
+        return self._position_index.get(absolute_path, {})
+
+    def _schedule_settle(self, file: str):
+        scheduled = file in self._last_edits
+        self._last_edits[file] = time.monotonic()
+        if not scheduled:
+            self._vim.schedule_later(SETTLE_DELAY, self._settle_when_idle, file)
+
+    def _settle_when_idle(self, file: str):
+        last_edit = self._last_edits.get(file)
+        if last_edit is None:
+            return
+        remaining = last_edit + SETTLE_DELAY - time.monotonic()
+        if remaining > 0:
+            self._vim.schedule_later(remaining, self._settle_when_idle, file)
+        else:
+            self._settle(file)
+
+    def _settle(self, file: str):
+        """
+        Store positions at the lines they have been shifted to, and send those
+        which moved to Vim.
+        """
+        self._last_edits.pop(file, None)
+        with self._lock:
+            shifts = self._shifts.pop(file, None)
+            if not shifts or not shifts.edited:
+                return
+            positions, moved = shifts.apply()
+            if not moved:
+                return
+            self._store_positions(file, positions)
+            # The next parse is compared with the shifted positions
+            self._fingerprints[file] = self._fingerprint(positions)
+        for position in moved:
+            position.running = self._runner.is_running(position.id)
+        self._runner.clear_cache(file)
+        logger.fdebug("Moving {len(moved)} edited positions in {file}")
+        self._vim.call("ultest#process#move_many", moved)
+
     def _init_test_file(self, file: str):
         logger.info(f"Initialising test file {file}")
         self._vim.call("setbufvar", file, "ultest_results", {})
@@ -100,30 +248,40 @@ class PositionTracker:
         self._vim.call("setbufvar", file, "ultest_sorted_tests", [])
         self._vim.call("setbufvar", file, "ultest_file_structure", [])
 
+    def clear_pattern_cache(self):
+        """
+        Forget patterns fetched for files and those compiled from them, so they
+        are read from Vim again on the next update.
+        """
+        logger.debug("Clearing pattern cache")
+        self._file_patterns.clear()
+        clear_pattern_cache()
+
     def _get_file_patterns(self, file: str) -> Dict:
+        if file in self._file_patterns:
+            return self._file_patterns[file]
         try:
-            return self._vim.sync_call("ultest#adapter#get_patterns", file)
+            patterns = self._vim.sync_call("ultest#adapter#get_patterns", file)
         except Exception:
             logger.exception(f"Error while evaluating patterns for file {file}")
             return {}
+        # Patterns can only be cached when Vim can tell us they've changed
+        if patterns and self._vim.config.dict_watchers:
+            self._file_patterns[file] = patterns
+        return patterns
 
-    async def _parse_positions(self, file: str, vim_patterns: Dict) -> Tree[Position]:
-        positions = await self._file_parser.parse_file_structure(file, vim_patterns)
-        self._stored_positions[file] = positions
-        self._vim.call(
-            "setbufvar",
-            file,
-            "ultest_file_structure",
-            positions.map(lambda pos: {"type": pos.type, "id": pos.id}).to_list(),
-        )
-        return positions
-
-    def _remove_old_positions(self, positions: Dict[str, Position]):
-        if positions:
-            logger.fdebug(
-                "Removing tests {[recorded for recorded in recorded_tests]} from {file_name}"
-            )
-            for removed in positions.values():
-                self._vim.call("ultest#process#clear", removed)
-        else:
-            logger.fdebug("No tests removed")
+    def _store_positions(self, file: str, positions: Tree[Position]):
+        index: Dict[str, Tree[Position]] = {}
+        duplicates: Dict[str, Tree[Position]] = {}
+        for node in positions.nodes():
+            if node.data.id in index:
+                duplicates[node.data.id] = node
+            else:
+                index[node.data.id] = node
+        # All are replaced together so lookups never see a tree and index from
+        # different parses.
+        (
+            self._stored_positions[file],
+            self._position_index[file],
+            self._duplicate_index[file],
+        ) = (positions, index, duplicates)
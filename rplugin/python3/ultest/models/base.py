@@ -1,5 +1,5 @@
 import json
-from dataclasses import asdict, dataclass
+from dataclasses import dataclass
 from typing import List
 
 
@@ -20,4 +20,15 @@ class BasePosition:
         return json.dumps(props)
 
     def dict(self):
-        return asdict(self)
+        # Built directly as asdict deep copies every field, and this is called
+        # for every position sent to Vim.
+        return {
+            "id": self.id,
+            "name": self.name,
+            "file": self.file,
+            "line": self.line,
+            "col": self.col,
+            "running": self.running,
+            "namespaces": list(self.namespaces),
+            "type": self.type,
+        }
@@ -1,5 +1,6 @@
 import json
-from dataclasses import asdict, dataclass
+from dataclasses import dataclass
+from typing import Optional
 
 
 @dataclass
@@ -9,10 +10,18 @@ class Result:
     file: str
     code: int
     output: str
+    # Seconds taken by the test, when known
+    duration: Optional[float] = None
 
     def __str__(self):
         props = self.dict()
         return json.dumps(props)
 
     def dict(self):
-        return asdict(self)
+        return {
+            "id": self.id,
+            "file": self.file,
+            "code": self.code,
+            "output": self.output,
+            "duration": self.duration,
+        }
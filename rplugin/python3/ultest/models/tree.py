@@ -1,4 +1,4 @@
-from typing import Callable, Generic, Iterator, List, Optional, TypeVar
+from typing import Callable, Dict, Generic, Iterator, List, Optional, TypeVar
 
 from .types import Protocol
 
@@ -27,6 +27,8 @@ class Tree(Generic[TreeData]):
         self._children: List[Tree[TreeData]] = children
         self._data = data
         self._length = 1 + sum(len(child) for child in self._children)
+        self._index: Optional[_PreorderIndex[TreeData]] = None
+        self._offset = 0
 
     def __repr__(self) -> str:
         return f"Tree(data={self._data}, children={self._children})"
@@ -38,42 +40,48 @@ class Tree(Generic[TreeData]):
 
         The head of the list is the root of the tree, and all following elements are its children.
         """
-        if isinstance(data, List):
-            node_data = data[0]
-            children = [cls.from_list(child_data) for child_data in data[1:]]
-
-            return Tree(data=node_data, children=children)
-        else:
+        if not isinstance(data, List):
             return Tree(data=data, children=[])
 
+        # Built bottom up with an explicit stack so deep nesting can't exceed
+        # the recursion limit.
+        root: List[Optional[Tree]] = [None]
+        stack = [(data, root, 0)]
+        pending = []
+        while stack:
+            node_list, siblings, index = stack.pop()
+            children: List[Optional[Tree]] = [None] * (len(node_list) - 1)
+            pending.append((node_list[0], children, siblings, index))
+            for child_index, child_data in enumerate(node_list[1:]):
+                if isinstance(child_data, List):
+                    stack.append((child_data, children, child_index))
+                else:
+                    children[child_index] = Tree(data=child_data, children=[])
+        for node_data, children, siblings, index in reversed(pending):
+            siblings[index] = Tree(data=node_data, children=children)
+        return root[0]  # type: ignore
+
     def __len__(self) -> int:
         return self._length
 
     def __getitem__(self, index: int) -> TreeData:
-        orig = index
-        if index > len(self):
-            raise IndexError(f"No node found with index {orig}")
-
-        if index == 0:
-            return self._data
-
-        checked = 1
-        for child in self._children:
-            if len(child) > index - checked:
-                return child[index - checked]
-            checked += len(child)
-
-        raise Exception  # Shouldn't happen
+        return self.node(index)._data
 
     def to_list(self):
-        if not self._children:
-            return [self._data]
-        return self._to_list()
-
-    def _to_list(self):
-        if not self._children:
-            return self._data
-        return [self._data, *[child._to_list() for child in self._children]]
+        # Built top down with an explicit stack, as lists can be filled in
+        # after they are added to their parent.
+        result = [self._data]
+        stack = [(self, result)]
+        while stack:
+            node, node_list = stack.pop()
+            for child in node._children:
+                if child._children:
+                    child_list = [child._data]
+                    node_list.append(child_list)
+                    stack.append((child, child_list))
+                else:
+                    node_list.append(child._data)
+        return result
 
     @property
     def data(self) -> TreeData:
@@ -83,44 +91,61 @@ class Tree(Generic[TreeData]):
     def children(self) -> List["Tree"]:
         return self._children
 
+    @property
+    def parent(self) -> Optional["Tree[TreeData]"]:
+        """
+        Parent of this node within the tree it was indexed from, if any.
+        """
+        index = self._preorder()
+        parent = index.parents[self._offset]
+        return index.nodes[parent] if parent >= 0 else None
+
+    @property
+    def successor(self) -> Optional["Tree[TreeData]"]:
+        """
+        First node after this subtree, in preorder of the tree it was indexed from.
+        """
+        index = self._preorder()
+        end = index.ends[self._offset]
+        return index.nodes[end] if end < len(index.nodes) else None
+
     def __iter__(self) -> Iterator[TreeData]:
-        yield self._data
-        for child in self._children:
-            for data in child:
-                yield data
+        nodes = self._preorder().nodes
+        for i in range(self._offset, self._offset + self._length):
+            yield nodes[i]._data
 
     def nodes(self) -> Iterator["Tree[TreeData]"]:
-        yield self
-        for child in self._children:
-            for data in child.nodes():
-                yield data
+        nodes = self._preorder().nodes
+        for i in range(self._offset, self._offset + self._length):
+            yield nodes[i]
 
     def node(self, index: int) -> "Tree[TreeData]":
-        orig = index
-        if index > len(self):
-            raise IndexError(f"No node found with index {orig}")
+        if not 0 <= index < self._length:
+            raise IndexError(f"No node found with index {index}")
+        return self._preorder().nodes[self._offset + index]
 
-        if index == 0:
-            return self
-
-        checked = 1
-        for child in self._children:
-            if len(child) > index - checked:
-                return child.node(index - checked)
-            checked += len(child)
-
-        raise Exception  # Shouldn't happen
+    def _preorder(self) -> "_PreorderIndex[TreeData]":
+        if self._index is None:
+            _PreorderIndex(self)
+        return self._index  # type: ignore
 
     X = TypeVar("X")
 
     def map(self, f: Callable[[TreeData], X]) -> "Tree[X]":
-        try:
-            return Tree(
-                data=f(self._data), children=[child.map(f) for child in self._children]
+        preorder = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            preorder.append((node, f(node._data)))
+            stack.extend(reversed(node._children))
+        # Built bottom up, as in from_list, since nodes are sized from their
+        # children
+        mapped: Dict[int, Tree] = {}
+        for node, data in reversed(preorder):
+            mapped[id(node)] = Tree(
+                data=data, children=[mapped.pop(id(child)) for child in node._children]
             )
-        except Exception:
-            breakpoint()
-            raise
+        return mapped[id(self)]
 
     def sorted_search(
         self,
@@ -136,22 +161,23 @@ class Tree(Generic[TreeData]):
         :param strict: The search will only return an exact match, defaults to False
         :return:  The matching node, or nearest one if not strict
         """
-        l = 0
-        r = len(self) - 1
+        nodes = self._preorder().nodes
+        l = self._offset
+        r = self._offset + self._length - 1
         while l <= r:
-            m = int((l + r) / 2)
-            mid = self.node(m)
-            if key(mid.data) < target:
+            m = (l + r) // 2
+            mid = nodes[m]
+            if key(mid._data) < target:
                 l = m + 1
-            elif key(mid.data) > target:
+            elif key(mid._data) > target:
                 r = m - 1
             else:
                 return mid
 
-        if r < 0:
+        if r < self._offset:
             return None
 
-        return self.node(r) if not strict and key(self[r]) < target else None
+        return nodes[r] if not strict and key(nodes[r]._data) < target else None
 
     def search(
         self,
@@ -173,3 +199,27 @@ class Tree(Generic[TreeData]):
             result = child.search(target, key)
             if result:
                 return result
+
+
+class _PreorderIndex(Generic[TreeData]):
+    """
+    Flat preorder layout of a tree, shared by the root and all of its subtrees.
+
+    The node at position i owns the slice nodes[i:ends[i]] and its parent is at
+    parents[i] (-1 for the root).
+    """
+
+    def __init__(self, root: Tree[TreeData]) -> None:
+        self.nodes: List[Tree[TreeData]] = []
+        self.parents: List[int] = []
+        self.ends: List[int] = []
+        stack = [(root, -1)]
+        while stack:
+            node, parent = stack.pop()
+            offset = len(self.nodes)
+            node._index = self
+            node._offset = offset
+            self.nodes.append(node)
+            self.parents.append(parent)
+            self.ends.append(offset + len(node))
+            stack.extend((child, offset) for child in reversed(node._children))
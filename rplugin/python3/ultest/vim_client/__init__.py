@@ -1,25 +1,87 @@
+import os
+from concurrent.futures import Executor
+from dataclasses import replace
+from functools import lru_cache
+from threading import Lock
 from typing import Any, Callable, Coroutine, List
 
 from pynvim import Nvim
 
+from ..config import Config
+from ..logging import get_logger
 from .jobs import JobManager
 
+logger = get_logger()
+
 
 class VimClient:
     def __init__(self, vim_: Nvim):
         self._vim = vim_
-        num_threads = int(self.sync_eval("g:ultest_max_threads"))  # type: ignore
-        self._job_manager = JobManager(num_threads)
+        self._pending: List[List] = []
+        self._pending_lock = Lock()
+        self._flush_scheduled = False
+        self._batch = False
+        self._config = Config.from_vim(self.sync_eval(Config.expression()))
+        # Calls are only batched where nvim_call_atomic is available
+        self._batch = bool(self._config.nvim)
+        self._job_manager = JobManager(
+            int(self._config.max_threads),
+            lag_threshold=self._config.loop_lag_threshold / 1000,
+        )
+        if self._config.dict_watchers:
+            self.command(
+                " | ".join(
+                    f"call dictwatcheradd(g:, '{variable}', "
+                    "function('ultest#handler#refresh_config'))"
+                    for variable in [*Config.variables().values(), "test#*"]
+                )
+            )
 
     @property
     def semaphore(self):
         return self._job_manager.semaphore
 
+    @property
+    def executor(self) -> Executor:
+        return self._job_manager.executor
+
+    @property
+    def config(self) -> Config:
+        return self._config
+
+    def refresh_config(self):
+        """
+        Read settings from Vim again, called when any of them change.
+        """
+        self._config = Config.from_vim(self.sync_eval(Config.expression()))
+        logger.fdebug("Refreshed config {self._config}")
+
+    def set_cwd(self, cwd: str):
+        """
+        Record a change of the current directory, sent by Vim on DirChanged.
+        """
+        logger.fdebug("Current directory changed to {cwd}")
+        self._config = replace(self._config, cwd=cwd)
+
+    def absolute_path(self, path: str) -> str:
+        """
+        Equivalent of fnamemodify(path, ":p"), resolved without a request to
+        Vim where the current directory is kept up to date.
+
+        :param path: Path relative to the current directory of Vim.
+        """
+        if not self._config.dir_changed:
+            return self.sync_call("fnamemodify", path, ":p")
+        return _absolute_path(self._config.cwd, path)
+
     def message(self, message, sync=False):
         if not isinstance(message, str) or not message.endswith("\n"):
             message = str(message) + "\n"
         if sync:
+            self.flush()
             self._vim.out_write(message)
+        elif self._batch:
+            self._queue("nvim_out_write", message)
         else:
             self.schedule(self._vim.out_write, message)
 
@@ -33,6 +95,16 @@ class VimClient:
         """
         self._vim.async_call(func, *args, **kwargs)
 
+    def schedule_later(self, delay: float, func: Callable, *args) -> None:
+        """
+        Schedule a function to be called on Vim thread after a delay.
+
+        :param delay: Seconds to wait.
+        :param func: Function to run.
+        :param *args: Positional args for function.
+        """
+        self._job_manager.call_later(delay, self.schedule, func, *args)
+
     def launch(
         self,
         func: Coroutine,
@@ -70,8 +142,12 @@ class VimClient:
         :param callback: Function to supply resulting output to.
         """
 
+        expr = self.construct_command(command, *args, **kwargs)
+        if self._batch:
+            self._queue("nvim_command", expr)
+            return
+
         def runner():
-            expr = self.construct_command(command, *args, **kwargs)
             self._vim.command(expr, async_=True)
 
         self.schedule(runner)
@@ -84,6 +160,7 @@ class VimClient:
         :param command: Command to run
         """
         expr = self.construct_command(command, *args, **kwargs)
+        self.flush()
         output = self._vim.command_output(expr)
         return output.splitlines() if output else []  # type: ignore
 
@@ -101,10 +178,13 @@ class VimClient:
         :param args: Arguments for the function.
         :rtype: None
         """
-        expr = self.construct_function(func, *args)
+        args = self._convert_args(args)
+        if self._batch:
+            self._queue("nvim_call_function", func, args)
+            return
 
         def runner():
-            self._eval(expr, sync=False)
+            self._vim.call(func, *args, async_=True)
 
         self.schedule(runner)
 
@@ -117,30 +197,71 @@ class VimClient:
         :return: Result of function call.
         :rtype: Any
         """
-        expr = self.construct_function(func, *args)
-        return self._eval(expr, sync=True)
+        args = self._convert_args(args)
+        self.flush()
+        return self._vim.call(func, *args)
 
     def eval(self, expr: str) -> Any:
+        if self._batch:
+            self._queue("nvim_eval", expr)
+            return None
         return self._eval(expr, sync=False)
 
     def sync_eval(self, expr: str) -> Any:
         return self._eval(expr, sync=True)
 
-    def construct_function(self, func: str, *args):
-        func_args = ", ".join(self._convert_arg(arg) for arg in args)
-        return f"{func}({func_args})"
+    def flush(self) -> None:
+        """
+        Send all queued asynchronous calls now, in the order they were made.
+        Must be called from the main Vim thread.
+        """
+        with self._pending_lock:
+            calls, self._pending = self._pending, []
+            self._flush_scheduled = False
+        while calls:
+            try:
+                _, error = self._vim.request("nvim_call_atomic", calls)
+            except Exception:
+                logger.exception(f"Error sending {len(calls)} batched calls")
+                return
+            if not error:
+                return
+            # Calls stop at the first error, so the rest are sent again
+            index, _, message = error
+            logger.error(f"Error in batched call {calls[index]}: {message}")
+            calls = calls[index + 1 :]
+
+    def _queue(self, method: str, *args) -> None:
+        """
+        Queue an API call to be sent with all others made in the same tick of
+        the event loop, as a single atomic request.
+        """
+        with self._pending_lock:
+            self._pending.append([method, list(args)])
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        self.schedule(self.flush)
 
     def _eval(self, expr: str, sync: bool):
+        if sync:
+            self.flush()
         return self._vim.eval(expr, async_=not sync)
 
+    def _convert_args(self, args) -> List:
+        return [self._convert_arg(arg) for arg in args]
+
     def _convert_arg(self, arg):
-        if isinstance(arg, str) and self._needs_quotes(arg):
-            return f"'{arg}'"
+        # Positions, results and diffs are sent as dictionaries
+        if hasattr(arg, "dict"):
+            return arg.dict()
         if isinstance(arg, bool):
-            arg = 1 if arg else 0
-        return str(arg)
+            return 1 if arg else 0
+        if isinstance(arg, (list, tuple)):
+            return [self._convert_arg(item) for item in arg]
+        return arg
+
 
-    def _needs_quotes(self, arg: str) -> bool:
-        if not any(char in arg for char in "\"'("):
-            return not (len(arg) == 2 and arg[1] == ":")
-        return "://" in arg
+@lru_cache(maxsize=1024)
+def _absolute_path(cwd: str, path: str) -> str:
+    return os.path.normpath(os.path.join(cwd, os.path.expanduser(path)))
@@ -3,18 +3,33 @@ import sys
 import traceback
 from asyncio import CancelledError, Event, Semaphore
 from collections import defaultdict
-from typing import Coroutine, Dict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Coroutine, Dict
 from uuid import uuid4
 
 from ...logging import get_logger
+from .monitor import LoopMonitor
 
 logger = get_logger()
 
 
 class JobManager:
-    def __init__(self, num_threads: int = 2):
+    def __init__(self, num_threads: int = 2, lag_threshold: float = 0):
+        """
+        :param num_threads: Number of processes run at once, and of threads
+        for work which would block the event loop.
+        :param lag_threshold: Seconds the event loop can be blocked for before
+        it is logged, 0 to not monitor it.
+        """
         self._jobs: defaultdict[str, Dict[str, Event]] = defaultdict(dict)
         self._loop = asyncio.get_event_loop()
+        self._executor = ThreadPoolExecutor(
+            max_workers=num_threads, thread_name_prefix="ultest"
+        )
+        self._monitor = None
+        if lag_threshold:
+            self._monitor = LoopMonitor(self._loop, lag_threshold)
+            self._monitor.start()
         self._sem = Semaphore(num_threads)
         if sys.version_info < (3, 8):
             # Use the new default watcher from  >= 3.8, implemented locally
@@ -31,6 +46,14 @@ class JobManager:
     def semaphore(self) -> Semaphore:
         return self._sem
 
+    @property
+    def executor(self) -> Executor:
+        """
+        Bounded pool for file reading and parsing, so it doesn't block the
+        event loop.
+        """
+        return self._executor
+
     def run(self, cor: Coroutine, job_group: str):
         job_id = str(uuid4())
         # loop parameter has been deprecated since version 3.8
@@ -43,6 +66,13 @@ class JobManager:
         asyncio.run_coroutine_threadsafe(wrapped_cor, loop=self._loop)
         self._jobs[job_group][job_id] = cancel_event
 
+    def call_later(self, delay: float, func: Callable, *args):
+        """
+        Call a function on the event loop after a delay. Can be called from any
+        thread.
+        """
+        self._loop.call_soon_threadsafe(self._loop.call_later, delay, func, *args)
+
     def stop_jobs(self, group: str) -> bool:
         logger.finfo("Stopping jobs in group {group}")
         cancel_events = self._jobs[group]
@@ -0,0 +1,47 @@
+from asyncio import AbstractEventLoop
+
+from ...logging import get_logger
+
+logger = get_logger()
+
+
+class LoopMonitor:
+    """
+    Measures how late the event loop runs a callback scheduled at a fixed
+    interval. Work blocking the loop delays every job and process callback, so
+    stalls above the threshold are recorded and logged.
+    """
+
+    def __init__(
+        self, loop: AbstractEventLoop, threshold: float, interval: float = 0.1
+    ):
+        """
+        :param threshold: Seconds of lag to report as a stall.
+        :param interval: Seconds between checks.
+        """
+        self._loop = loop
+        self._threshold = threshold
+        self._interval = interval
+        self.stalls = 0
+        self.max_lag = 0.0
+
+    def start(self):
+        """
+        Start checking for stalls. Can be called from any thread.
+        """
+        self._loop.call_soon_threadsafe(self._schedule)
+
+    def _schedule(self):
+        expected = self._loop.time() + self._interval
+        self._loop.call_at(expected, self._check, expected)
+
+    def _check(self, expected: float):
+        lag = self._loop.time() - expected
+        self.max_lag = max(self.max_lag, lag)
+        if lag > self._threshold:
+            self.stalls += 1
+            logger.warn(
+                f"Event loop stalled for {lag * 1000:.0f}ms "
+                f"({self.stalls} stalls, longest {self.max_lag * 1000:.0f}ms)"
+            )
+        self._schedule()
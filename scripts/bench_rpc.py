@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Compare sending positions to Vim as eval expressions against native function
+calls with dictionary arguments.
+
+Encoding cost is always measured. If nvim is on the PATH, round trips to an
+embedded instance are measured as well.
+
+    python scripts/bench_rpc.py [number of calls]
+"""
+
+import json
+import shutil
+import sys
+import timeit
+from dataclasses import asdict
+
+import msgpack
+
+sys.path.insert(0, ".")
+
+from rplugin.python3.ultest.models import Test  # noqa: E402
+
+FUNC = "UltestBench"
+
+
+def eval_expression(test: Test) -> str:
+    # How calls were built before, with the name sent as character codes
+    props = asdict(test)
+    props["name"] = [ord(char) for char in test.name]
+    return f"{FUNC}({json.dumps(props)})"
+
+
+def encode_eval(tests):
+    for test in tests:
+        msgpack.packb([0, 0, "nvim_eval", [eval_expression(test)]])
+
+
+def encode_call(tests):
+    for test in tests:
+        msgpack.packb([0, 0, "nvim_call_function", [FUNC, [test.dict()]]])
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    tests = [
+        Test(
+            id=f"test_{index}_{'a' * 16}",
+            name=f"test_parametrized[case {index}]",
+            file="/home/user/project/tests/test_module.py",
+            line=index * 4,
+            col=1,
+            running=0,
+            namespaces=["TestClass3f1c1e5a", "TestNested9a8b7c6d"],
+        )
+        for index in range(count)
+    ]
+    for name, encode in [("eval", encode_eval), ("call", encode_call)]:
+        duration = min(timeit.repeat(lambda: encode(tests), number=1, repeat=5))
+        print(f"encode {name}: {duration / count * 1e6:.2f}us per call")
+
+    if not shutil.which("nvim"):
+        print("nvim not found, skipping round trips")
+        return
+
+    import pynvim
+
+    nvim = pynvim.attach("child", argv=["nvim", "--embed", "--headless", "-u", "NONE"])
+    nvim.api.exec(f"function! {FUNC}(test)\nreturn 0\nendfunction", False)
+    for name, send in [
+        ("eval", lambda test: nvim.eval(eval_expression(test))),
+        ("call", lambda test: nvim.call(FUNC, test.dict())),
+    ]:
+        duration = min(
+            timeit.repeat(lambda: [send(test) for test in tests], number=1, repeat=3)
+        )
+        print(f"round trip {name}: {duration / count * 1e6:.2f}us per call")
+    nvim.close()
+
+
+if __name__ == "__main__":
+    main()
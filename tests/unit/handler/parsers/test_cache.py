@@ -0,0 +1,81 @@
+import os
+from unittest.mock import Mock, patch
+
+import pytest
+
+from rplugin.python3.ultest.handler.parsers import FileParser, ParseCache
+from tests.mocks import get_test_file
+
+PATTERNS = {
+    "test": [r"\v^\s*%(async )?def (test_\w+)"],
+    "namespace": [r"\v^\s*class (\w+)"],
+}
+
+
+def test_cache_round_trip(tmp_path):
+    cache = ParseCache(str(tmp_path), 1024 * 1024)
+    cache.put("/a/test_a.py", "digest", "patterns", [["test", "test_a", 1, 1, 0]])
+
+    assert cache.get("/a/test_a.py", "digest", "patterns") == [
+        ["test", "test_a", 1, 1, 0]
+    ]
+    assert cache.get("/a/test_a.py", "changed", "patterns") is None
+    assert cache.get("/a/test_a.py", "digest", "changed") is None
+    assert cache.get("/a/test_b.py", "digest", "patterns") is None
+
+
+def test_cache_ignores_corrupt_entry(tmp_path):
+    cache = ParseCache(str(tmp_path), 1024 * 1024)
+    cache.put("/a/test_a.py", "digest", "patterns", [])
+    (entry,) = os.listdir(tmp_path)
+    with open(tmp_path / entry, "r+b") as entry_file:
+        entry_file.truncate(os.path.getsize(tmp_path / entry) - 2)
+
+    assert cache.get("/a/test_a.py", "digest", "patterns") is None
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ParseCache(str(tmp_path), 1)
+    cache.PRUNE_INTERVAL = 1
+    for index in range(3):
+        cache.put(f"/a/test_{index}.py", "digest", "patterns", [])
+        entry = cache._entry_path(f"/a/test_{index}.py")
+        os.utime(entry, (index, index))
+
+    cache.put("/a/test_new.py", "digest", "patterns", [])
+
+    assert os.listdir(tmp_path) == [
+        os.path.basename(cache._entry_path("/a/test_new.py"))
+    ]
+
+
+def test_cache_keeps_writes_in_progress(tmp_path):
+    cache = ParseCache(str(tmp_path), 1)
+    cache.PRUNE_INTERVAL = 1
+    in_progress = tmp_path / "in_progress.tmp"
+    in_progress.write_bytes(b"partial")
+    stale = tmp_path / "stale.tmp"
+    stale.write_bytes(b"partial")
+    os.utime(stale, (0, 0))
+
+    cache.put("/a/test_new.py", "digest", "patterns", [])
+
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        [os.path.basename(cache._entry_path("/a/test_new.py")), "in_progress.tmp"]
+    )
+
+
+@pytest.mark.asyncio
+async def test_parser_uses_cached_positions(tmp_path):
+    cache = ParseCache(str(tmp_path), 1024 * 1024)
+    file_name = get_test_file("python")
+    parsed = await FileParser(Mock(), cache=cache).parse_file_structure(
+        file_name, PATTERNS
+    )
+
+    parser = FileParser(Mock(), cache=cache)
+    with patch.object(parser, "_parse_position_tree") as parse:
+        cached = await parser.parse_file_structure(file_name, PATTERNS)
+
+    parse.assert_not_called()
+    assert cached.to_list() == parsed.to_list()
@@ -1,8 +1,13 @@
+import os
+import random
+import subprocess
+import sys
 from unittest.mock import Mock, patch
 
 import pytest
 
 from rplugin.python3.ultest.handler.parsers import FileParser
+from rplugin.python3.ultest.handler.parsers.file import LineChange
 from rplugin.python3.ultest.models import Namespace, Test
 from rplugin.python3.ultest.models.file import File
 from rplugin.python3.ultest.models.namespace import Namespace
@@ -336,3 +341,120 @@ async def test_parse_namespace_structure():
     ]
 
     assert tests.to_list() == expected
+
+
+PYTHON_PATTERNS = {
+    "test": [r"\v^\s*%(async )?def (test_\w+)"],
+    "namespace": [r"\v^\s*class (\w+)"],
+}
+
+
+async def _parse_edited(tmp_path, edit):
+    file_name = str(tmp_path / "test_edited.py")
+    with open(get_test_file("python")) as source:
+        lines = source.readlines()
+    with open(file_name, "w") as edited:
+        edited.writelines(lines)
+    parser = FileParser(vim)
+    previous = await parser.parse_file_structure(file_name, PYTHON_PATTERNS)
+    with open(file_name, "w") as edited:
+        edited.writelines(edit(lines))
+    incremental = await parser.parse_file_structure(file_name, PYTHON_PATTERNS)
+    full = await FileParser(vim).parse_file_structure(file_name, PYTHON_PATTERNS)
+    return previous, incremental, full
+
+
+@pytest.mark.asyncio
+async def test_incremental_parse_new_test_in_namespace(tmp_path):
+    def edit(lines):
+        return [*lines[:12], "    def test_new(self):\n", "        ...\n", *lines[12:]]
+
+    previous, incremental, full = await _parse_edited(tmp_path, edit)
+    assert incremental.to_list() == full.to_list()
+    assert "test_new" in [pos.name for pos in incremental]
+    # Positions before the edited namespace are reused
+    assert incremental[1] is previous[1]
+
+
+@pytest.mark.asyncio
+async def test_incremental_parse_shifts_following_positions(tmp_path):
+    def edit(lines):
+        return [*lines[:26], "        x = 1\n", "        y = 2\n", *lines[26:]]
+
+    previous, incremental, full = await _parse_edited(tmp_path, edit)
+    assert incremental.to_list() == full.to_list()
+    assert (
+        incremental[len(incremental) - 1].line == previous[len(previous) - 1].line + 2
+    )
+
+
+@pytest.mark.asyncio
+async def test_incremental_parse_removed_namespace_tests(tmp_path):
+    def edit(lines):
+        return [*lines[:25], *lines[30:]]
+
+    _, incremental, full = await _parse_edited(tmp_path, edit)
+    assert incremental.to_list() == full.to_list()
+    assert "TestMyClass" not in [pos.name for pos in incremental]
+
+
+@pytest.mark.asyncio
+async def test_incremental_parse_top_level_change(tmp_path):
+    def edit(lines):
+        return [*lines[:3], "def test_top():\n", "    ...\n", *lines[3:]]
+
+    _, incremental, full = await _parse_edited(tmp_path, edit)
+    assert incremental.to_list() == full.to_list()
+
+
+@pytest.mark.asyncio
+async def test_incremental_parse_unchanged_file(tmp_path):
+    previous, incremental, _ = await _parse_edited(tmp_path, lambda lines: lines)
+    assert incremental is previous
+
+
+def test_line_changes_combined():
+    rand = random.Random(0)
+    for _ in range(100):
+        old = [str(index) for index in range(20)]
+        lines = old
+        combined = None
+        for _ in range(3):
+            start = rand.randrange(0, len(lines) + 1)
+            end = rand.randrange(start, len(lines) + 1)
+            added = [f"new {rand.random()}" for _ in range(rand.randrange(3))]
+            lines = [*lines[:start], *added, *lines[end:]]
+            change = LineChange(start=start, old_end=end, new_end=start + len(added))
+            combined = combined.followed_by(change) if combined else change
+        assert old[: combined.start] == lines[: combined.start]
+        assert old[combined.old_end :] == lines[combined.new_end :]
+
+
+def test_converted_patterns_shared_by_runner():
+    patterns = {"runner": "python#pytest", **PYTHON_PATTERNS}
+    converted = FileParser(Mock())._convert_patterns(patterns)
+
+    assert file_parser._convert_patterns(dict(patterns)) is converted
+    assert (
+        file_parser._convert_patterns({**patterns, "runner": "python#nose"})
+        is not converted
+    )
+
+
+@pytest.mark.parametrize("seed", ["1", "2"])
+def test_position_ids_independent_of_hash_seed(seed):
+    script = (
+        "from unittest.mock import Mock;"
+        "from rplugin.python3.ultest.handler.parsers import FileParser;"
+        "print(FileParser(Mock())._position_id('/a/test_a.py', ['ns'], 'test_a'))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        env={**os.environ, "PYTHONHASHSEED": seed},
+        stdout=subprocess.PIPE,
+        check=True,
+    ).stdout
+
+    assert output.decode().strip() == file_parser._position_id(
+        "/a/test_a.py", ["ns"], "test_a"
+    )
@@ -0,0 +1,212 @@
+import re
+from typing import List, Optional, Pattern
+from unittest.mock import Mock
+
+import pytest
+
+from rplugin.python3.ultest.handler.parsers import FileParser
+from rplugin.python3.ultest.handler.parsers.file import INDENT_PATTERN
+from rplugin.python3.ultest.models import File, Namespace, Test, Tree
+from tests.mocks import get_test_file
+
+file_parser = FileParser(Mock())
+
+PATTERNS = {
+    "python": {
+        "test": [r"\v^\s*%(async )?def (test_\w+)"],
+        "namespace": [r"\v^\s*class (\w+)"],
+    },
+    "java": {
+        "test": [r"\v^\s*%(\zs\@Test\s+\ze)?%(\zspublic\s+\ze)?void\s+(\w+)"],
+        "namespace": [r"\v^\s*%(\zspublic\s+\ze)?class\s+(\w+)"],
+    },
+    "jest": {
+        "test": [r'\v^\s*%(it|test)\s*[( ]\s*%("|' '|`)(.*)%("|' "|`)"],
+        "namespace": [
+            r'\v^\s*%(describe|suite|context)\s*[( ]\s*%("|' '|`)(.*)%("|' "|`)"
+        ],
+    },
+}
+
+
+def _convert(vim_regex: str) -> Pattern:
+    regex = vim_regex
+    for pattern, repl in {
+        r"\\v": "",
+        r"%\((.*?)\)": r"(?:\1)",
+        r"\\zs": "",
+        r"\\ze": "",
+    }.items():
+        regex = re.sub(pattern, repl, regex)
+    return re.compile(regex)
+
+
+def _find_match(line: str, patterns: List[Pattern]) -> Optional[str]:
+    for pattern in patterns:
+        matched = pattern.match(line)
+        if matched:
+            return matched[1]
+    return None
+
+
+def recursive_parse(
+    file_name,
+    test_patterns,
+    namespace_patterns,
+    lines,
+    init_line=1,
+    init_indent=-1,
+    current_namespaces=None,
+    last_test_indent=-1,
+):
+    """
+    The original recursive parser, kept as a reference for the single pass
+    parser.
+    """
+    positions = []
+    current_namespaces = current_namespaces or []
+    line_no = init_line
+    while line_no - init_line < len(lines):
+        line = lines[line_no - init_line]
+        test_name = _find_match(line, test_patterns)
+        namespace_name = _find_match(line, namespace_patterns)
+
+        if test_name:
+            cls = Test
+            name = test_name
+            children = None
+        elif namespace_name:
+            cls = Namespace
+            name = namespace_name
+        else:
+            line_no += 1
+            continue
+
+        current_indent = INDENT_PATTERN.match(line)
+        if current_indent and len(current_indent[1]) <= init_indent:
+            consumed = max(line_no - 1 - init_line, 1)
+            return positions, consumed
+
+        if cls is Test:
+            last_test_indent = len(current_indent[1])
+
+        position = cls(
+            id=file_parser._position_id(file_name, current_namespaces, name),
+            file=file_name,
+            line=line_no,
+            col=1,
+            name=name,
+            running=0,
+            namespaces=current_namespaces,
+        )
+
+        if cls is Namespace:
+            children, lines_consumed = recursive_parse(
+                file_name,
+                test_patterns,
+                namespace_patterns,
+                lines[line_no - init_line + 1 :],
+                init_line=line_no + 1,
+                init_indent=len(current_indent[1]),
+                current_namespaces=[*current_namespaces, position.id],
+                last_test_indent=last_test_indent,
+            )
+            lines_consumed += 1
+            if children and (
+                last_test_indent == -1 or last_test_indent >= len(current_indent[1])
+            ):
+                positions.append([position, *children])
+        else:
+            lines_consumed = 1
+            positions.append(position)
+
+        line_no += lines_consumed
+    return positions, line_no
+
+
+@pytest.mark.parametrize("name", PATTERNS.keys())
+@pytest.mark.asyncio
+async def test_single_pass_matches_recursive_parser(name):
+    file_name = get_test_file(name)
+    patterns = PATTERNS[name]
+    with open(file_name) as test_file:
+        lines = test_file.readlines()
+    expected, _ = recursive_parse(
+        file_name,
+        [_convert(pattern) for pattern in patterns["test"]],
+        [_convert(pattern) for pattern in patterns["namespace"]],
+        lines,
+    )
+    expected_tree = Tree.from_list(
+        [File(id=file_name, name=file_name, file=file_name, running=0), *expected]
+    )
+
+    result = await FileParser(Mock()).parse_file_structure(file_name, patterns)
+
+    assert result.to_list() == expected_tree.to_list()
+
+
+@pytest.mark.asyncio
+async def test_single_pass_deep_nesting(tmp_path):
+    depth = 2000
+    file_name = str(tmp_path / "test_deep.py")
+    with open(file_name, "w") as test_file:
+        for level in range(depth):
+            test_file.write(" " * level + f"class Level{level}:\n")
+        test_file.write(" " * depth + "def test_deepest(self):\n")
+
+    result = await FileParser(Mock()).parse_file_structure(
+        file_name, PATTERNS["python"]
+    )
+
+    assert len(result) == depth + 2
+    assert result[depth + 1].name == "test_deepest"
+    assert len(result[depth + 1].namespaces) == depth
+
+
+@pytest.mark.asyncio
+async def test_position_directly_after_namespace_parsed(tmp_path):
+    file_name = str(tmp_path / "test_adjacent.py")
+    lines = ["class TestEmpty:\n", "class TestA:\n", "    def test_a(self):\n"]
+    with open(file_name, "w") as test_file:
+        test_file.writelines(lines)
+
+    result = await FileParser(Mock()).parse_file_structure(
+        file_name, PATTERNS["python"]
+    )
+
+    # The recursive parser skipped a position on the line after a namespace it
+    # closed, leaving test_a outside of TestA
+    assert [(pos.name, pos.line) for pos in result] == [
+        (file_name, 0),
+        ("TestA", 2),
+        ("test_a", 3),
+    ]
+    assert result[2].namespaces == [result[1].id]
+    expected, _ = recursive_parse(
+        file_name,
+        [_convert(pattern) for pattern in PATTERNS["python"]["test"]],
+        [_convert(pattern) for pattern in PATTERNS["python"]["namespace"]],
+        lines,
+    )
+    assert [pos.name for pos in expected] == ["test_a"]
+
+
+@pytest.mark.asyncio
+async def test_incremental_parse_drops_emptied_namespaces(tmp_path):
+    file_name = str(tmp_path / "test_edited.js")
+    with open(get_test_file("jest")) as source:
+        lines = source.readlines()
+    with open(file_name, "w") as edited:
+        edited.writelines(lines)
+    parser = FileParser(Mock())
+    await parser.parse_file_structure(file_name, PATTERNS["jest"])
+    # Remove the only test, which is in the nested namespace
+    with open(file_name, "w") as edited:
+        edited.writelines(line for line in lines if "test(" not in line)
+
+    incremental = await parser.parse_file_structure(file_name, PATTERNS["jest"])
+    full = await FileParser(Mock()).parse_file_structure(file_name, PATTERNS["jest"])
+
+    assert incremental.to_list() == full.to_list()
+    assert [pos.type for pos in incremental] == ["file"]
@@ -0,0 +1,68 @@
+import re
+from unittest import TestCase
+
+from rplugin.python3.ultest.handler.parsers import PositionPatterns
+from tests.mocks import get_test_file
+
+PYTHON = PositionPatterns(
+    tests=[re.compile(r"^\s*(?:async )?def (test_\w+)")],
+    namespaces=[re.compile(r"^\s*class (\w+)")],
+)
+
+JEST = PositionPatterns(
+    tests=[re.compile(r"^\s*(?:it|test)\s*[( ]\s*(?:\"|'|`)(.*)(?:\"|'|`)")],
+    namespaces=[
+        re.compile(r"^\s*(?:describe|suite|context)\s*[( ]\s*(?:\"|'|`)(.*)(?:\"|'|`)")
+    ],
+)
+
+
+class TestPositionPatterns(TestCase):
+    def assert_same_as_each(self, patterns: PositionPatterns, file: str):
+        with open(get_test_file(file)) as test_file:
+            for line in test_file:
+                self.assertEqual(patterns.match(line), patterns._match_each(line))
+
+    def test_python_matches_each_pattern(self):
+        self.assert_same_as_each(PYTHON, "python")
+
+    def test_jest_matches_each_pattern(self):
+        self.assert_same_as_each(JEST, "jest")
+
+    def test_match_types(self):
+        self.assertEqual(PYTHON.match("    def test_a(self):"), ("test", "test_a"))
+        self.assertEqual(PYTHON.match("class TestA:"), ("namespace", "TestA"))
+        self.assertIsNone(PYTHON.match("    x = 3"))
+
+    def test_tests_take_priority(self):
+        patterns = PositionPatterns(
+            tests=[re.compile(r"^(\w+)_test")], namespaces=[re.compile(r"^(\w+)")]
+        )
+        self.assertEqual(patterns.match("a_test"), ("test", "a"))
+        self.assertEqual(patterns.match("a"), ("namespace", "a"))
+
+    def test_unnamed_match_falls_through_to_namespaces(self):
+        patterns = PositionPatterns(
+            tests=[re.compile(r"^def (x)?"), re.compile(r"^def (\w+)")],
+            namespaces=[re.compile(r"^(def)")],
+        )
+        self.assertEqual(patterns.match("def y"), patterns._match_each("def y"))
+        self.assertEqual(patterns.match("def y"), ("namespace", "def"))
+
+    def test_required_literals(self):
+        self.assertEqual(PYTHON._literals, {"def test_", "class "})
+        self.assertEqual(JEST._literals, {"it", "test", "describe", "suite", "context"})
+
+    def test_no_literals_disables_prefilter(self):
+        patterns = PositionPatterns(
+            tests=[re.compile(r"^\s*(\w+)")], namespaces=[re.compile(r"^class (\w+)")]
+        )
+        self.assertIsNone(patterns._literals)
+        self.assertEqual(patterns.match("  abc"), ("test", "abc"))
+
+    def test_backreferences_are_not_combined(self):
+        patterns = PositionPatterns(
+            tests=[re.compile(r"^(['\"])(\w+)\1")], namespaces=[]
+        )
+        self.assertIsNone(patterns._combined)
+        self.assertEqual(patterns.match("'abc'"), ("test", "'"))
@@ -0,0 +1,146 @@
+import json
+
+import pytest
+
+from rplugin.python3.ultest.handler.parsers import ReportParser, ReportResult
+
+RUNNERS = ["python#pytest", "php#phpunit", "go#gotest", "javascript#jest"]
+
+
+@pytest.fixture
+def parser():
+    return ReportParser(RUNNERS, [])
+
+
+def _parse(parser, tmp_path, runner, report):
+    path = tmp_path / "report"
+    path.write_text(report)
+    return list(parser.parse(runner, str(path)))
+
+
+def test_parse_junit_pytest(parser, tmp_path):
+    report = """<?xml version="1.0" encoding="utf-8"?>
+<testsuites>
+  <testsuite name="pytest" errors="0" failures="1" tests="3">
+    <testcase classname="tests.test_a.TestMyClass" name="test_d" time="0.5">
+      <failure message="assert False">def test_d(self): ...</failure>
+    </testcase>
+    <testcase classname="tests.test_a" name="test_parametrize[1-2]" time="0.25" />
+    <testcase classname="tests.test_a" name="test_skipped" time="0">
+      <skipped message="skip" />
+    </testcase>
+  </testsuite>
+</testsuites>
+"""
+    assert _parse(parser, tmp_path, "python#pytest", report) == [
+        ReportResult(
+            name="test_d",
+            namespaces=["tests", "test_a", "TestMyClass"],
+            passed=False,
+            duration=0.5,
+        ),
+        ReportResult(
+            name="test_parametrize",
+            namespaces=["tests", "test_a"],
+            passed=True,
+            duration=0.25,
+        ),
+        ReportResult(
+            name="test_skipped",
+            namespaces=["tests", "test_a"],
+            passed=True,
+            duration=0.0,
+        ),
+    ]
+
+
+def test_parse_junit_phpunit(parser, tmp_path):
+    report = """<?xml version="1.0" encoding="UTF-8"?>
+<testsuites>
+  <testsuite name="Tests\\ExampleTest" tests="2">
+    <testcase name="testSum with data set #0" class="Tests\\ExampleTest"
+      classname="Tests.ExampleTest" time="0.001">
+      <error type="Exception">Exception: Broken</error>
+    </testcase>
+    <testcase name="testOther" class="Tests\\ExampleTest"
+      classname="Tests.ExampleTest" time="0.002" />
+  </testsuite>
+</testsuites>
+"""
+    assert _parse(parser, tmp_path, "php#phpunit", report) == [
+        ReportResult(
+            name="testSum",
+            namespaces=["Tests", "ExampleTest"],
+            passed=False,
+            duration=0.001,
+        ),
+        ReportResult(
+            name="testOther",
+            namespaces=["Tests", "ExampleTest"],
+            passed=True,
+            duration=0.002,
+        ),
+    ]
+
+
+def test_parse_go_json(parser, tmp_path):
+    events = [
+        {"Action": "run", "Test": "TestA"},
+        {"Action": "output", "Test": "TestA", "Output": "=== RUN   TestA\n"},
+        {"Action": "fail", "Test": "TestA/sub_test", "Elapsed": 0.1},
+        {"Action": "pass", "Test": "TestB", "Elapsed": 0.2},
+        {"Action": "fail", "Elapsed": 0.3},
+    ]
+    report = "# build output\n" + "\n".join(json.dumps(event) for event in events)
+    assert _parse(parser, tmp_path, "go#gotest", report) == [
+        ReportResult(name="sub_test", namespaces=["TestA"], passed=False, duration=0.1),
+        ReportResult(name="TestB", namespaces=[], passed=True, duration=0.2),
+    ]
+
+
+def test_parse_jest_json(parser, tmp_path):
+    report = {
+        "testResults": [
+            {
+                "assertionResults": [
+                    {
+                        "ancestorTitles": ["First namespace", "Another"],
+                        "title": "it fails",
+                        "status": "failed",
+                        "duration": 25,
+                    },
+                    {
+                        "ancestorTitles": [],
+                        "title": "it passes",
+                        "status": "passed",
+                        "duration": None,
+                    },
+                ]
+            }
+        ]
+    }
+    assert _parse(parser, tmp_path, "javascript#jest", json.dumps(report)) == [
+        ReportResult(
+            name="it fails",
+            namespaces=["First namespace", "Another"],
+            passed=False,
+            duration=0.025,
+        ),
+        ReportResult(name="it passes", namespaces=[], passed=True, duration=None),
+    ]
+
+
+def test_report_paths_and_args(parser):
+    assert parser.report_path("python#pytest", "/tmp/out") == "/tmp/out_report"
+    assert parser.args("python#pytest", "/tmp/out_report") == [
+        "--junitxml=/tmp/out_report"
+    ]
+    assert parser.report_path("go#gotest", "/tmp/out") == "/tmp/out"
+    assert parser.args("go#gotest", "/tmp/out") == ["-json"]
+
+
+def test_only_enabled_runners_parsed():
+    parser = ReportParser(["python#pytest", "go#gotest"], ["go#gotest"])
+    assert parser.can_parse("python#pytest")
+    assert not parser.can_parse("go#gotest")
+    assert not parser.can_parse("javascript#jest")
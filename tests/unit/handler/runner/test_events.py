@@ -0,0 +1,115 @@
+import asyncio
+import inspect
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from rplugin.python3.ultest.handler.runner import pytest_plugin
+from rplugin.python3.ultest.handler.runner.events import EventServer, TestEvent
+
+
+async def _send(path, *events):
+    _, writer = await asyncio.open_unix_connection(str(path))
+    for event in events:
+        writer.write(json.dumps(event).encode() + b"\n")
+    await writer.drain()
+    writer.close()
+    # Let the server accept the connection, as it would while a process runs
+    await asyncio.sleep(0.05)
+
+
+@pytest.mark.asyncio
+async def test_events_sent_to_process_handler(tmp_path):
+    server = EventServer(str(tmp_path / "events.sock"))
+    received = []
+    await server.subscribe("group", received.append)
+
+    await _send(
+        server.path,
+        {"event": "connect", "process": "group"},
+        {"event": "start", "name": "test_a", "namespaces": ["TestClass"]},
+        {"event": "finish", "name": "test_a", "passed": False, "duration": 0.5},
+    )
+    await server.finish("group")
+    await server.close()
+
+    assert received == [
+        TestEvent(event="start", name="test_a", namespaces=["TestClass"]),
+        TestEvent(
+            event="finish", name="test_a", namespaces=[], passed=False, duration=0.5
+        ),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_events_from_unknown_process_ignored(tmp_path):
+    server = EventServer(str(tmp_path / "events.sock"))
+    received = []
+    await server.subscribe("group", received.append)
+
+    await _send(
+        server.path,
+        {"event": "connect", "process": "other"},
+        {"event": "start", "name": "test_a"},
+    )
+    await _send(server.path, {"event": "start", "name": "test_a"})
+    await server.finish("group")
+    await server.close()
+
+    assert received == []
+
+
+@pytest.mark.asyncio
+async def test_pytest_plugin_sends_events(tmp_path):
+    plugin_dir = tmp_path / "plugins"
+    plugin_dir.mkdir()
+    (plugin_dir / "ultest_pytest.py").write_text(inspect.getsource(pytest_plugin))
+    (tmp_path / "test_example.py").write_text(
+        "import pytest\n"
+        "class TestClass:\n"
+        "    def test_a(self):\n"
+        "        assert False\n"
+        "@pytest.mark.parametrize('value', [1, 2])\n"
+        "def test_b(value):\n"
+        "    pass\n"
+    )
+    server = EventServer(str(tmp_path / "events.sock"))
+    received = []
+    await server.subscribe("group", received.append)
+
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-m",
+        "pytest",
+        "-p",
+        "ultest_pytest",
+        "-p",
+        "no:cacheprovider",
+        str(tmp_path / "test_example.py"),
+        cwd=str(tmp_path),
+        stdout=subprocess.DEVNULL,
+        env={
+            **os.environ,
+            "PYTHONPATH": str(plugin_dir),
+            "ULTEST_EVENT_SOCKET": server.path,
+            "ULTEST_EVENT_ID": "group",
+        },
+    )
+    assert await process.wait() == 1
+    await server.finish("group")
+    await server.close()
+
+    assert [
+        (event.event, event.name, event.namespaces, event.passed) for event in received
+    ] == [
+        ("start", "test_a", ["TestClass"], True),
+        ("finish", "test_a", ["TestClass"], False),
+        ("start", "test_b", [], True),
+        ("finish", "test_b", [], True),
+        ("start", "test_b", [], True),
+        ("finish", "test_b", [], True),
+    ]
+    assert all(event.duration is not None for event in received[1::2])
@@ -0,0 +1,49 @@
+from rplugin.python3.ultest.handler.runner.merge import merge_commands
+
+
+def test_merge_name_patterns():
+    commands = [
+        ["go", "test", "-run", "^TestA$", "./pkg"],
+        ["go", "test", "-run", "^TestB$", "./pkg"],
+    ]
+    assert merge_commands("go#gotest", commands) == [
+        "go",
+        "test",
+        "-run",
+        "^(TestA|TestB)$",
+        "./pkg",
+    ]
+
+
+def test_merge_line_numbers():
+    commands = [["rspec", "spec/a_spec.rb:3"], ["rspec", "spec/a_spec.rb:10"]]
+    assert merge_commands("ruby#rspec", commands) == ["rspec", "spec/a_spec.rb:3:10"]
+
+
+def test_merge_separate_arguments():
+    commands = [["pytest", "test_a.py::test_a"], ["pytest", "test_a.py::test_b"]]
+    assert merge_commands("python#pytest", commands) == [
+        "pytest",
+        "test_a.py::test_a",
+        "test_a.py::test_b",
+    ]
+
+
+def test_unmergeable_commands():
+    assert (
+        merge_commands(
+            "go#gotest",
+            [
+                ["go", "test", "-run", "^TestA$/^sub$"],
+                ["go", "test", "-run", "^TestB$"],
+            ],
+        )
+        is None
+    )
+    assert (
+        merge_commands(
+            "python#pytest", [["pytest", "-x", "a::test_a"], ["pytest", "b::test_b"]]
+        )
+        is None
+    )
+    assert merge_commands("lua#busted", [["busted", "a"], ["busted", "b"]]) is None
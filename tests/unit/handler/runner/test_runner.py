@@ -0,0 +1,438 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from unittest.mock import Mock, patch
+
+import pytest
+
+from rplugin.python3.ultest.config import Config
+from rplugin.python3.ultest.handler import runner as runner_module
+from rplugin.python3.ultest.handler.parsers.output import ParseResult
+from rplugin.python3.ultest.handler.parsers.reports import ReportParser
+from rplugin.python3.ultest.handler.runner import PositionRunner
+from rplugin.python3.ultest.handler.runner.events import TestEvent
+from rplugin.python3.ultest.models import File, Result, Test, Tree
+
+FILE = "/project/test_a.py"
+
+
+def _tree(count: int) -> Tree:
+    tests = [
+        Test(
+            id=f"test_{index}",
+            name=f"test_{index}",
+            file=FILE,
+            line=index * 2 + 1,
+            col=1,
+            running=0,
+            namespaces=[],
+        )
+        for index in range(count)
+    ]
+    return Tree.from_list([File(id=FILE, name=FILE, file=FILE, running=0), *tests])
+
+
+def _build_cmds(func, *args):
+    if func == "ultest#adapter#get_runner":
+        return "python#pytest"
+    if func == "ultest#adapter#build_cmds":
+        tests, _ = args
+        return [["pytest", f"{test.file}::{test.name}"] for test in tests]
+    raise ValueError(func)
+
+
+@pytest.fixture
+def vim():
+    vim = Mock()
+    vim.config = Config(dict_watchers=1, cwd="/project")
+    vim.sync_call.side_effect = _build_cmds
+    vim.launch.side_effect = lambda coroutine, _: coroutine.close()
+    return vim
+
+
+@pytest.fixture
+def runner(vim):
+    output_parser = Mock()
+    output_parser.can_parse.return_value = False
+    return PositionRunner(vim=vim, process_manager=Mock(), output_parser=output_parser)
+
+
+def _build_calls(vim):
+    return [
+        call
+        for call in vim.sync_call.call_args_list
+        if call[0][0] == "ultest#adapter#build_cmds"
+    ]
+
+
+def test_separate_commands_built_in_one_request(vim, runner):
+    tree = _tree(50)
+
+    runner.run(tree, tree, FILE, Mock(), Mock())
+
+    assert len(_build_calls(vim)) == 1
+    assert vim.launch.call_count == 50
+
+
+def test_commands_cached_between_runs(vim, runner):
+    tree = _tree(3)
+
+    runner.run(tree, tree, FILE, Mock(), Mock())
+    runner._running.clear()
+    runner.run(tree, tree, FILE, Mock(), Mock())
+
+    assert len(_build_calls(vim)) == 1
+    runner_calls = [
+        call
+        for call in vim.sync_call.call_args_list
+        if call[0][0] == "ultest#adapter#get_runner"
+    ]
+    assert len(runner_calls) == 1
+
+
+def test_cleared_commands_built_again(vim, runner):
+    tree = _tree(3)
+
+    runner.run(tree, tree, FILE, Mock(), Mock())
+    runner.clear_cache(FILE)
+    runner.run(tree, tree, FILE, Mock(), Mock())
+
+    assert len(_build_calls(vim)) == 2
+
+
+def test_commands_not_cached_without_watchers(vim, runner):
+    vim.config = Config(dict_watchers=0, cwd="/project")
+    tree = _tree(3)
+
+    runner.run(tree, tree, FILE, Mock(), Mock())
+    runner.run(tree, tree, FILE, Mock(), Mock())
+
+    assert len(_build_calls(vim)) == 2
+
+
+def test_status_follows_run(vim, runner):
+    tree = _tree(2)
+    runner.reset_status(FILE, tree)
+    on_finish = Mock()
+
+    runner.run(tree, tree, FILE, Mock(), on_finish)
+
+    assert runner.file_status(FILE)["file"]["running"] == 2
+    first = tree.to_list()[1]
+    runner._register_result(
+        first, Result(id=first.id, file=FILE, code=1, output=""), on_finish
+    )
+    assert runner.file_status(FILE)["file"] == {
+        "tests": 2,
+        "passed": 0,
+        "failed": 1,
+        "running": 1,
+    }
+
+
+@pytest.mark.asyncio
+async def test_failures_read_off_event_loop(runner, tmp_path):
+    tree = _tree(2)
+    output = tmp_path / "output"
+    output.write_text("FAILED test_1\n")
+    executor = Mock()
+    executor.submit.side_effect = lambda func, *args: _done(func(*args))
+    runner._executor = executor
+    runner._parser.parse_failed.side_effect = lambda _, lines: [
+        ParseResult(name=line.split()[1], namespaces=[]) for line in lines
+    ]
+    on_finish = Mock()
+    for pos in tree:
+        runner._register_started(pos, Mock())
+
+    await runner._process_results(
+        tree, tree, 1, str(output), "python#pytest", on_finish
+    )
+
+    executor.submit.assert_called_once()
+    assert {position.id: result.code for position, result in _finished(on_finish)} == {
+        FILE: 1,
+        "test_0": 0,
+        "test_1": 1,
+    }
+
+
+def _done(value) -> Future:
+    future: Future = Future()
+    future.set_result(value)
+    return future
+
+
+def _finished(on_finish: Mock):
+    return [call[0] for call in on_finish.call_args_list]
+
+
+@pytest.mark.asyncio
+async def test_failures_registered_while_group_runs(vim, runner, tmp_path):
+    tree = _tree(3)
+    output = tmp_path / "output"
+    runner._processes.output_path.return_value = str(output)
+    runner._parser.can_parse.return_value = True
+    runner._parser.parse_failed.side_effect = lambda _, lines: [
+        ParseResult(name=line.split()[1], namespaces=[])
+        for line in lines
+        if line.startswith("FAILED")
+    ]
+    on_finish = Mock()
+    finished_during_run = []
+
+    async def run_process(*args, **kwargs):
+        output.write_text("FAILED test_1\n")
+        await asyncio.sleep(0.1)
+        finished_during_run.extend(_finished(on_finish))
+        with output.open("a") as output_file:
+            output_file.write("FAILED test_2")
+        return 1, str(output)
+
+    runner._processes.run.side_effect = run_process
+    launched = []
+    vim.launch.side_effect = lambda coroutine, _: launched.append(coroutine)
+
+    with patch.object(runner_module, "OUTPUT_POLL_INTERVAL", 0.01):
+        runner.run(tree, tree, FILE, Mock(), on_finish)
+        await launched[0]
+
+    assert [(pos.id, result.code) for pos, result in finished_during_run] == [
+        ("test_1", 1)
+    ]
+    assert [(pos.id, result.code) for pos, result in _finished(on_finish)] == [
+        ("test_1", 1),
+        (FILE, 1),
+        ("test_0", 0),
+        ("test_2", 1),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_failures_kept_when_group_exits_during_read(vim, runner, tmp_path):
+    tree = _tree(3)
+    output = tmp_path / "output"
+    runner._processes.output_path.return_value = str(output)
+    runner._parser.can_parse.return_value = True
+    reading = threading.Event()
+
+    def parse_failed(_, lines):
+        if lines:
+            reading.set()
+            # Still reading when the process exits
+            time.sleep(0.1)
+        return [ParseResult(name=line.split()[1], namespaces=[]) for line in lines]
+
+    runner._parser.parse_failed.side_effect = parse_failed
+
+    async def run_process(*args, **kwargs):
+        output.write_text("FAILED test_1\n")
+        while not reading.is_set():
+            await asyncio.sleep(0.01)
+        return 1, str(output)
+
+    runner._processes.run.side_effect = run_process
+    launched = []
+    vim.launch.side_effect = lambda coroutine, _: launched.append(coroutine)
+    on_finish = Mock()
+
+    with patch.object(runner_module, "OUTPUT_POLL_INTERVAL", 0.01):
+        runner.run(tree, tree, FILE, Mock(), on_finish)
+        await launched[0]
+
+    assert {pos.id: result.code for pos, result in _finished(on_finish)} == {
+        FILE: 1,
+        "test_0": 0,
+        "test_1": 1,
+        "test_2": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_group_results_read_from_report(vim, tmp_path):
+    tree = _tree(3)
+    output = tmp_path / "output"
+    runner = PositionRunner(
+        vim=vim,
+        process_manager=Mock(),
+        output_parser=Mock(can_parse=Mock(return_value=False)),
+        report_parser=ReportParser(["python#pytest"], []),
+    )
+    runner._processes.output_path.return_value = str(output)
+
+    async def run_process(cmd, *args, **kwargs):
+        assert cmd[-1] == f"--junitxml={output}_report"
+        (tmp_path / "output_report").write_text("""<testsuites><testsuite>
+            <testcase classname="test_a" name="test_0" time="0.5" />
+            <testcase classname="test_a" name="test_1[a]" time="0.25">
+              <failure />
+            </testcase>
+            <testcase classname="test_a" name="test_1[b]" time="0.25" />
+            </testsuite></testsuites>""")
+        return 1, str(output)
+
+    runner._processes.run.side_effect = run_process
+    launched = []
+    vim.launch.side_effect = lambda coroutine, _: launched.append(coroutine)
+    on_finish = Mock()
+
+    runner.run(tree, tree, FILE, Mock(), on_finish)
+    await launched[0]
+
+    assert {
+        pos.id: (result.code, result.duration) for pos, result in _finished(on_finish)
+    } == {
+        FILE: (1, 1.0),
+        "test_0": (0, 0.5),
+        "test_1": (1, 0.5),
+        # Missing from the report, so given the code of the group
+        "test_2": (1, None),
+    }
+
+
+@pytest.mark.asyncio
+async def test_group_results_registered_from_events(vim, runner):
+    vim.config = Config(
+        dict_watchers=1, cwd="/project", event_runners=["python#pytest"]
+    )
+    tree = _tree(3)
+    runner._processes.output_path.return_value = "output"
+    on_finish = Mock()
+    finished_during_run = []
+
+    async def run_process(cmd, *args, on_event, **kwargs):
+        assert cmd[-2:] == ["-p", "ultest_pytest"]
+        on_event(TestEvent(event="start", name="test_0", namespaces=[]))
+        on_event(TestEvent(event="finish", name="test_0", namespaces=[], passed=False))
+        on_event(TestEvent(event="finish", name="test_1", namespaces=[], duration=1))
+        on_event(TestEvent(event="start", name="test_1", namespaces=[]))
+        on_event(TestEvent(event="finish", name="test_1", namespaces=[], duration=2))
+        finished_during_run.extend(_finished(on_finish))
+        return 1, "output"
+
+    runner._processes.run.side_effect = run_process
+    launched = []
+    vim.launch.side_effect = lambda coroutine, _: launched.append(coroutine)
+
+    runner.run(tree, tree, FILE, Mock(), on_finish)
+    await launched[0]
+
+    assert [
+        (pos.id, result.code, result.duration) for pos, result in finished_during_run
+    ] == [("test_0", 1, None), ("test_1", 0, 1), ("test_1", 0, 3)]
+    assert [(pos.id, result.code) for pos, result in _finished(on_finish)][3:] == [
+        (FILE, 1),
+        # Not sent, so found from the failures, as with parsed output
+        ("test_2", 0),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_bisect_runs_passing_group_once(vim, runner):
+    vim.config = Config(dict_watchers=1, cwd="/project", bisect=1)
+    tree = _tree(3)
+    runner._processes.run.side_effect = _async_return((0, "output"))
+    launched = []
+    vim.launch.side_effect = lambda coroutine, _: launched.append(coroutine)
+    on_finish = Mock()
+
+    runner.run(tree, tree, FILE, Mock(), on_finish)
+    await launched[0]
+
+    assert runner._processes.run.call_count == 1
+    assert {pos.id: result.code for pos, result in _finished(on_finish)} == {
+        FILE: 0,
+        "test_0": 0,
+        "test_1": 0,
+        "test_2": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_bisect_finds_failure_in_halves(vim, runner):
+    vim.config = Config(dict_watchers=1, cwd="/project", bisect=1)
+    tree = _tree(16)
+    commands = []
+
+    async def run_process(cmd, group_id, process_id, **kwargs):
+        commands.append(cmd)
+        failed = process_id == FILE or f"{FILE}::test_5" in cmd
+        return int(failed), f"{process_id}_out"
+
+    runner._processes.run.side_effect = run_process
+    launched = []
+    vim.launch.side_effect = lambda coroutine, _: launched.append(coroutine)
+    on_finish = Mock()
+
+    runner.run(tree, tree, FILE, Mock(), on_finish)
+    await launched[0]
+
+    # The group, then halves of the tests down to the failure, instead of 16
+    assert [len(cmd) - 1 for cmd in commands] == [1, 8, 4, 4, 2, 1, 1, 2, 8]
+    results = {pos.id: result for pos, result in _finished(on_finish)}
+    assert {pos_id for pos_id, result in results.items() if result.code} == {
+        FILE,
+        "test_5",
+    }
+    assert results["test_5"].output == "test_5_out"
+    assert results["test_0"].output == "test_0..test_3_out"
+
+
+@pytest.mark.asyncio
+async def test_bisect_runs_second_half_alone(vim, runner):
+    vim.config = Config(dict_watchers=1, cwd="/project", bisect=1)
+    tree = _tree(2)
+
+    async def run_process(cmd, group_id, process_id, **kwargs):
+        return int(process_id in (FILE, "test_1")), f"{process_id}_out"
+
+    runner._processes.run.side_effect = run_process
+    launched = []
+    vim.launch.side_effect = lambda coroutine, _: launched.append(coroutine)
+    on_finish = Mock()
+
+    runner.run(tree, tree, FILE, Mock(), on_finish)
+    await launched[0]
+
+    # test_1 is run alone although test_0 passing means it failed the group
+    assert runner._processes.run.call_count == 3
+    assert {
+        pos.id: (result.code, result.output) for pos, result in _finished(on_finish)
+    } == {
+        FILE: (1, f"{FILE}_out"),
+        "test_0": (0, "test_0_out"),
+        "test_1": (1, "test_1_out"),
+    }
+
+
+@pytest.mark.asyncio
+async def test_bisect_interacting_tests_fail_group_only(vim, runner):
+    vim.config = Config(dict_watchers=1, cwd="/project", bisect=1)
+    tree = _tree(2)
+
+    async def run_process(cmd, group_id, process_id, **kwargs):
+        return int(process_id == FILE), f"{process_id}_out"
+
+    runner._processes.run.side_effect = run_process
+    launched = []
+    vim.launch.side_effect = lambda coroutine, _: launched.append(coroutine)
+    on_finish = Mock()
+
+    runner.run(tree, tree, FILE, Mock(), on_finish)
+    await launched[0]
+
+    assert {
+        pos.id: (result.code, result.output) for pos, result in _finished(on_finish)
+    } == {
+        FILE: (1, f"{FILE}_out"),
+        "test_0": (0, "test_0_out"),
+        "test_1": (0, "test_1_out"),
+    }
+
+
+def _async_return(value):
+    async def func(*args, **kwargs):
+        return value
+
+    return func
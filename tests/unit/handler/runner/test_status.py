@@ -0,0 +1,69 @@
+from rplugin.python3.ultest.handler.runner.status import StatusCounter
+from rplugin.python3.ultest.models import Namespace, Test
+
+FILE = "/tests/test_a.py"
+
+
+def _test(name: str, namespaces=()) -> Test:
+    return Test(
+        id=name,
+        name=name,
+        file=FILE,
+        line=1,
+        col=1,
+        running=0,
+        namespaces=list(namespaces),
+    )
+
+
+def _counts(tests=0, passed=0, failed=0, running=0):
+    return {"tests": tests, "passed": passed, "failed": failed, "running": running}
+
+
+def test_reset_counts_tests_only():
+    namespace = Namespace(
+        id="TestA", name="TestA", file=FILE, line=1, col=1, running=0, namespaces=[]
+    )
+    counter = StatusCounter()
+
+    counter.reset(
+        FILE,
+        [
+            (namespace, "running"),
+            (_test("a", ["TestA"]), "passed"),
+            (_test("b", ["TestA"]), None),
+            (_test("c"), "failed"),
+        ],
+    )
+
+    assert counter.file_status(FILE) == {
+        "file": _counts(tests=3, passed=1, failed=1),
+        "namespaces": {"TestA": _counts(tests=2, passed=1)},
+    }
+
+
+def test_moves_update_file_and_namespaces():
+    test = _test("a", ["TestA", "TestB"])
+    counter = StatusCounter()
+    counter.reset(FILE, [(test, None)])
+
+    counter.move(test, None, "running")
+    counter.move(test, "running", "failed")
+
+    status = counter.file_status(FILE)
+    assert status["file"] == _counts(tests=1, failed=1)
+    assert status["namespaces"]["TestA"] == _counts(tests=1, failed=1)
+    assert status["namespaces"]["TestB"] == _counts(tests=1, failed=1)
+
+
+def test_clear_results_keeps_running():
+    counter = StatusCounter()
+    counter.reset(FILE, [(_test("a"), "running"), (_test("b"), "passed")])
+
+    counter.clear_results(FILE)
+
+    assert counter.file_status(FILE)["file"] == _counts(tests=2, running=1)
+
+
+def test_unknown_file_empty():
+    assert StatusCounter().file_status(FILE) == {"file": _counts(), "namespaces": {}}
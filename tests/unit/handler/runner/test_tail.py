@@ -0,0 +1,28 @@
+from rplugin.python3.ultest.handler.runner.tail import OutputTail
+
+
+def test_lines_read_as_written(tmp_path):
+    output = tmp_path / "output"
+    tail = OutputTail(str(output))
+
+    assert tail.read() == []
+
+    output.write_bytes(b"first\nsec")
+    assert tail.read() == ["first\n"]
+
+    with output.open("ab") as output_file:
+        output_file.write(b"ond\nthird")
+    assert tail.read() == ["second\n"]
+    assert tail.read(final=True) == ["third"]
+
+
+def test_split_characters_decoded(tmp_path):
+    output = tmp_path / "output"
+    encoded = "● failed\n".encode()
+    output.write_bytes(encoded[:1])
+    tail = OutputTail(str(output))
+
+    assert tail.read() == []
+
+    output.write_bytes(encoded)
+    assert tail.read() == ["● failed\n"]
@@ -0,0 +1,144 @@
+import json
+from typing import Any, List
+
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from rplugin.python3.ultest.handler.diff import diff_trees
+from rplugin.python3.ultest.models import File, Namespace, Test, Tree
+
+FILE = "/tests/test_a.py"
+
+
+def _test(name: str, line: int, namespaces: List[str] = []) -> Test:
+    return Test(
+        id=name,
+        name=name,
+        file=FILE,
+        line=line,
+        col=1,
+        running=0,
+        namespaces=namespaces,
+    )
+
+
+def _namespace(name: str, line: int) -> Namespace:
+    return Namespace(
+        id=name, name=name, file=FILE, line=line, col=1, running=0, namespaces=[]
+    )
+
+
+def _tree(*children) -> Tree:
+    return Tree.from_list([File(id=FILE, name=FILE, file=FILE, running=0), *children])
+
+
+def _structure(tree: Tree) -> Any:
+    return tree.map(lambda pos: {"type": pos.type, "id": pos.id}).to_list()
+
+
+def _apply(structure: List, splices) -> List:
+    structure = json.loads(json.dumps(structure))
+    for path, start, end, items in splices:
+        target = structure
+        for index in path:
+            target = target[index]
+        target[start:end] = items
+    return structure
+
+
+def test_diff_new_tree():
+    new = _tree(_test("test_a", 1))
+
+    diff = diff_trees(None, new)
+
+    assert _apply([], diff.structure) == _structure(new)
+    assert _apply([], diff.sorted_tests) == [FILE, "test_a"]
+    assert [pos.id for pos in diff.inserted] == [FILE, "test_a"]
+
+
+def test_diff_inserted_namespace():
+    old = _tree(_test("test_a", 1), _test("test_b", 3))
+    new = _tree(
+        _test("test_a", 1),
+        [_namespace("TestNew", 3), _test("test_c", 4, ["TestNew"])],
+        _test("test_b", 6),
+    )
+
+    diff = diff_trees(old, new)
+
+    assert _apply(_structure(old), diff.structure) == _structure(new)
+    assert [pos.id for pos in diff.inserted] == ["TestNew", "test_c"]
+    assert [pos.id for pos in diff.moved] == ["test_b"]
+    assert not diff.removed
+
+
+def test_diff_removed_nested_test():
+    old = _tree(
+        [_namespace("TestA", 1), _test("test_a", 2, ["TestA"])],
+        [
+            _namespace("TestB", 4),
+            _test("test_b", 5, ["TestB"]),
+            _test("test_c", 7, ["TestB"]),
+        ],
+    )
+    new = _tree(
+        [_namespace("TestA", 1), _test("test_a", 2, ["TestA"])],
+        [_namespace("TestB", 4), _test("test_c", 5, ["TestB"])],
+    )
+
+    diff = diff_trees(old, new)
+
+    assert diff.structure == [([2], 1, 2, [])]
+    assert [pos.id for pos in diff.removed] == ["test_b"]
+    assert [pos.id for pos in diff.moved] == ["test_c"]
+
+
+def test_diff_renamed_test():
+    old = _tree(_test("test_a", 1), _test("test_b", 3))
+    new = _tree(_test("test_a", 1), _test("test_renamed", 3))
+
+    diff = diff_trees(old, new)
+
+    assert [(old.id, new.id) for old, new in diff.renamed] == [
+        ("test_b", "test_renamed")
+    ]
+    assert not diff.inserted and not diff.removed
+    assert diff.sorted_tests == [([], 2, 3, ["test_renamed"])]
+
+
+def test_diff_unchanged_tree_empty():
+    tree = _tree([_namespace("TestA", 1), _test("test_a", 2, ["TestA"])])
+
+    assert not diff_trees(tree, _tree(*tree.to_list()[1:]))
+
+
+namespaces = st.lists(
+    st.lists(st.sampled_from("abcdef"), max_size=4, unique=True),
+    max_size=4,
+)
+
+
+def _generated(groups: List[List[str]]) -> Tree:
+    children = []
+    line = 1
+    for index, names in enumerate(groups):
+        namespace = _namespace(f"Test{index}", line)
+        line += 1
+        tests = []
+        for name in names:
+            tests.append(_test(f"test_{name}{index}", line, [namespace.id]))
+            line += 2
+        children.append([namespace, *tests] if tests else _test(f"test_{index}", line))
+        line += 1
+    return _tree(*children)
+
+
+@settings(deadline=None)
+@given(namespaces, namespaces)
+def test_diff_applies_to_old_structure(old_groups, new_groups):
+    old, new = _generated(old_groups), _generated(new_groups)
+
+    diff = diff_trees(old, new)
+
+    assert _apply(_structure(old), diff.structure) == _structure(new)
+    assert _apply([pos.id for pos in old], diff.sorted_tests) == [pos.id for pos in new]
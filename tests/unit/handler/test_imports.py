@@ -0,0 +1,31 @@
+import subprocess
+import sys
+
+PACKAGE = "rplugin.python3.ultest.handler"
+
+# Only needed once tests are run or the summary is opened
+DEFERRED = [
+    "parsers.output",
+    "parsers.reports",
+    "runner.attach",
+    "runner.events",
+    "runner.handle",
+    "runner.merge",
+    "runner.tail",
+    "summary",
+]
+
+
+def test_run_time_modules_not_imported_with_handler():
+    script = (
+        f"import sys, {PACKAGE}\n"
+        f"print(*(name for name in {DEFERRED!r} if '{PACKAGE}.' + name in sys.modules))"
+    )
+    imported = subprocess.run(
+        [sys.executable, "-c", script],
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    ).stdout.split()
+
+    assert imported == []
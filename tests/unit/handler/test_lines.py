@@ -0,0 +1,99 @@
+import random
+from typing import List
+
+from rplugin.python3.ultest.handler.lines import LineShifts
+from rplugin.python3.ultest.models import File, Test, Tree
+
+FILE = "/tests/test_a.py"
+
+
+def _tree(lines: List[int]) -> Tree:
+    return Tree.from_list(
+        [
+            File(id=FILE, name=FILE, file=FILE, running=0),
+            *[
+                Test(
+                    id=f"test_{line}",
+                    name=f"test_{line}",
+                    file=FILE,
+                    line=line,
+                    col=1,
+                    running=0,
+                    namespaces=[],
+                )
+                for line in lines
+            ],
+        ]
+    )
+
+
+def _expected(lines: List[int], first: int, last: int, new_last: int) -> List[int]:
+    delta = new_last - last
+    target = max(first, new_last - 1) + 1
+    return [
+        (
+            line + delta
+            if line > last
+            else (target if delta < 0 and line > target else line)
+        )
+        for line in lines
+    ]
+
+
+def _lines(shifts: LineShifts, count: int) -> List[int]:
+    return [shifts.line(index + 1) for index in range(count)]
+
+
+def test_inserted_lines_shift_following_positions():
+    shifts = LineShifts(_tree([2, 5, 8]))
+
+    shifts.edit(3, 3, 5)
+
+    assert _lines(shifts, 3) == [2, 7, 10]
+
+
+def test_positions_on_deleted_lines_kept_in_order():
+    shifts = LineShifts(_tree([2, 5, 6, 8]))
+
+    shifts.edit(3, 7, 3)
+
+    assert _lines(shifts, 4) == [2, 4, 4, 4]
+
+
+def test_applied_tree_reuses_unmoved_positions():
+    tree = _tree([2, 5, 8])
+    shifts = LineShifts(tree)
+
+    shifts.edit(6, 6, 7)
+    shifted, moved = shifts.apply()
+
+    assert [pos.line for pos in shifted] == [0, 2, 5, 9]
+    assert [pos.id for pos in moved] == ["test_8"]
+    assert shifted[1] is tree[1]
+    assert tree[3].line == 8
+
+
+def test_unedited_tree_returned():
+    tree = _tree([2, 5])
+    shifts = LineShifts(tree)
+
+    shifts.edit(1, 2, 2)
+
+    assert not shifts.edited
+    assert shifts.apply() == (tree, [])
+
+
+def test_edits_match_shifting_every_position():
+    rand = random.Random(0)
+    for _ in range(50):
+        lines = sorted(rand.sample(range(1, 200), 20))
+        shifts = LineShifts(_tree(lines))
+        for _ in range(10):
+            first = rand.randrange(0, 200)
+            last = rand.randrange(first, 201)
+            new_last = rand.randrange(first, 201)
+            shifts.edit(first, last, new_last)
+            lines = _expected(lines, first, last, new_last)
+            assert _lines(shifts, len(lines)) == lines
+        shifted, _ = shifts.apply()
+        assert [pos.line for pos in shifted][1:] == lines
@@ -0,0 +1,176 @@
+from unittest.mock import Mock, call
+
+import pytest
+
+from rplugin.python3.ultest.config import Config
+from rplugin.python3.ultest.handler.scheduler import UpdateScheduler
+from rplugin.python3.ultest.models import Result, Test
+
+FILE = "/tests/test_a.py"
+OTHER_FILE = "/tests/test_b.py"
+
+
+def _test(index: int, file: str = FILE) -> Test:
+    return Test(
+        id=f"test_{index}",
+        name=f"test_{index}",
+        file=file,
+        line=index,
+        col=1,
+        running=1,
+        namespaces=[],
+    )
+
+
+def _result(index: int) -> Result:
+    return Result(id=f"test_{index}", file=FILE, code=0, output="out")
+
+
+@pytest.fixture
+def vim():
+    vim = Mock()
+    vim.config = Config(max_update_rate=30)
+    return vim
+
+
+@pytest.fixture
+def scheduler(vim):
+    return UpdateScheduler(vim, status=lambda file_name: {"file": file_name})
+
+
+def _run_scheduled(vim):
+    scheduled = [args for args, _ in vim.schedule.call_args_list] + [
+        args[1:] for args, _ in vim.schedule_later.call_args_list
+    ]
+    vim.schedule.reset_mock()
+    vim.schedule_later.reset_mock()
+    for func, *args in scheduled:
+        func(*args)
+
+
+def _process_calls(vim):
+    return [
+        process_call
+        for process_call in vim.call.call_args_list
+        if process_call[0][0] != "setbufvar"
+    ]
+
+
+def test_events_in_frame_sent_in_one_call(vim, scheduler):
+    tests = [_test(index) for index in range(3)]
+    for test in tests:
+        scheduler.queue("start", FILE, test)
+
+    vim.schedule.assert_called_once()
+    _run_scheduled(vim)
+
+    assert _process_calls(vim) == [call("ultest#process#start_many", tests)]
+
+
+def test_event_order_kept(vim, scheduler):
+    scheduler.queue("start", FILE, _test(1))
+    scheduler.queue("exit", FILE, [_test(1), _result(1)])
+    scheduler.queue("exit", FILE, [_test(2), _result(2)])
+    scheduler.queue("start", FILE, _test(1))
+
+    _run_scheduled(vim)
+
+    assert _process_calls(vim) == [
+        call("ultest#process#start_many", [_test(1)]),
+        call(
+            "ultest#process#exit_many",
+            [[_test(1), _result(1)], [_test(2), _result(2)]],
+        ),
+        call("ultest#process#start_many", [_test(1)]),
+    ]
+
+
+def test_events_after_flush_delayed_to_next_frame(vim, scheduler):
+    scheduler.queue("start", FILE, _test(1))
+    _run_scheduled(vim)
+
+    scheduler.queue("start", FILE, _test(2))
+
+    vim.schedule.assert_not_called()
+    delay = vim.schedule_later.call_args[0][0]
+    assert 0 < delay <= 1 / 30
+
+
+def test_no_delay_without_rate_limit(vim, scheduler):
+    vim.config = Config(max_update_rate=0)
+    scheduler.queue("start", FILE, _test(1))
+    _run_scheduled(vim)
+
+    scheduler.queue("start", FILE, _test(2))
+
+    vim.schedule.assert_called_once()
+    vim.schedule_later.assert_not_called()
+
+
+def test_hidden_file_events_held_until_shown(vim, scheduler):
+    scheduler.set_visible([FILE])
+    scheduler.queue("start", OTHER_FILE, _test(1, OTHER_FILE))
+    scheduler.queue("start", FILE, _test(2))
+    scheduler.queue("start", OTHER_FILE, _test(3, OTHER_FILE))
+
+    _run_scheduled(vim)
+
+    assert _process_calls(vim) == [call("ultest#process#start_many", [_test(2)])]
+    vim.call.reset_mock()
+
+    scheduler.set_visible([OTHER_FILE])
+    _run_scheduled(vim)
+
+    assert _process_calls(vim) == [
+        call(
+            "ultest#process#start_many",
+            [_test(1, OTHER_FILE), _test(3, OTHER_FILE)],
+        )
+    ]
+
+
+def test_events_for_held_file_kept_behind_held_events(vim, scheduler):
+    scheduler.set_visible([])
+    scheduler.queue("start", FILE, _test(1))
+    _run_scheduled(vim)
+
+    scheduler.set_visible([FILE])
+    scheduler.queue("exit", FILE, [_test(1), _result(1)])
+    _run_scheduled(vim)
+
+    assert _process_calls(vim) == [
+        call("ultest#process#start_many", [_test(1)]),
+        call("ultest#process#exit_many", [[_test(1), _result(1)]]),
+    ]
+
+
+def test_status_sent_for_files_with_events(vim, scheduler):
+    scheduler.set_visible([FILE])
+    scheduler.queue("start", FILE, _test(1))
+    scheduler.queue("start", OTHER_FILE, _test(2, OTHER_FILE))
+
+    _run_scheduled(vim)
+
+    vim.call.assert_any_call("setbufvar", FILE, "ultest_status", {"file": FILE})
+    assert all(
+        sent[0][1] != OTHER_FILE
+        for sent in vim.call.call_args_list
+        if sent[0][0] == "setbufvar"
+    )
+
+
+def test_positions_moved_to_current_lines_when_sent(vim):
+    scheduler = UpdateScheduler(
+        vim,
+        status=lambda file_name: {"file": file_name},
+        current=lambda position: _test(int(position.id[-1]) + 10),
+    )
+    scheduler.queue("start", FILE, _test(1))
+    scheduler.queue("exit", FILE, [_test(2), _result(2)])
+
+    _run_scheduled(vim)
+
+    assert _process_calls(vim) == [
+        call("ultest#process#start_many", [_test(11)]),
+        call("ultest#process#exit_many", [[_test(12), _result(2)]]),
+    ]
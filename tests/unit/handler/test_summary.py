@@ -0,0 +1,131 @@
+from unittest.mock import Mock
+
+import pytest
+
+from rplugin.python3.ultest.config import Config
+from rplugin.python3.ultest.handler.summary import SummaryModel
+from rplugin.python3.ultest.models import File, Namespace, Result, Test, Tree
+
+FILE = "/project/test_a.py"
+
+
+def _positions() -> Tree:
+    namespace = Namespace(
+        id="TestA", name="TestA", file=FILE, line=1, col=1, running=0, namespaces=[]
+    )
+    tests = [
+        Test(
+            id=f"test_{index}",
+            name=f"test_{index}",
+            file=FILE,
+            line=index + 2,
+            col=1,
+            running=0,
+            namespaces=["TestA"],
+        )
+        for index in range(2)
+    ]
+    return Tree.from_list(
+        [File(id=FILE, name=FILE, file=FILE, running=0), [namespace, *tests]]
+    )
+
+
+@pytest.fixture
+def results():
+    return {}
+
+
+@pytest.fixture
+def model(results):
+    vim = Mock()
+    vim.config = Config(cwd="/project")
+    tracker = Mock()
+    tracker.file_positions.side_effect = lambda file_name: (
+        _positions() if file_name == FILE else None
+    )
+    runner = Mock()
+    runner.get_result.side_effect = lambda pos_id, _: results.get(pos_id)
+    runner.is_running.return_value = 0
+    return SummaryModel(vim, tracker=tracker, runner=runner)
+
+
+def _patches(model):
+    return [call[0][1] for call in model._vim.call.call_args_list]
+
+
+def test_first_render_replaces_buffer(model):
+    model.render([FILE], reset=True)
+
+    ((splice,),) = _patches(model)
+    start, end, rows = splice
+    assert (start, end) == (0, -1)
+    assert [row["text"] for row in rows] == [
+        "~ test_a.py",
+        "  ~ TestA",
+        "    ~ test_0",
+        "    ~ test_1",
+    ]
+    assert rows[0]["highlights"] == [
+        ["UltestDefault", 0, 1],
+        ["UltestSummaryFile", 2, 11],
+    ]
+    assert (rows[2]["file"], rows[2]["id"]) == (FILE, "test_0")
+
+
+def test_only_changed_rows_sent(model, results):
+    model.render([FILE], reset=True)
+    model._vim.reset_mock()
+
+    results["test_1"] = Result(id="test_1", file=FILE, code=1, output="")
+    model.render([FILE])
+
+    ((splice,),) = _patches(model)
+    start, end, rows = splice
+    assert (start, end) == (3, 4)
+    assert rows[0]["text"] == "    X test_1"
+    assert rows[0]["highlights"] == [["UltestFail", 4, 5]]
+
+
+def test_unchanged_render_sends_nothing(model):
+    model.render([FILE], reset=True)
+    model._vim.reset_mock()
+
+    model.render([FILE])
+
+    model._vim.call.assert_not_called()
+
+
+def test_collapsed_children_not_rendered(model):
+    model.render([FILE], reset=True)
+    model._vim.reset_mock()
+
+    model.toggle(FILE, "TestA")
+
+    ((splice,),) = _patches(model)
+    assert splice == [
+        1,
+        4,
+        [
+            {
+                "text": "  ~ TestA ▶",
+                "highlights": [
+                    ["UltestDefault", 2, 3],
+                    ["UltestSummaryNamespace", 4, 9],
+                ],
+                "file": FILE,
+                "id": "TestA",
+            }
+        ],
+    ]
+
+
+def test_splices_sent_last_first(model, results):
+    model.render([FILE], reset=True)
+    model._vim.reset_mock()
+
+    results["test_0"] = Result(id="test_0", file=FILE, code=0, output="")
+    results[FILE] = Result(id=FILE, file=FILE, code=0, output="")
+    model.render([FILE])
+
+    (splices,) = _patches(model)
+    assert [splice[0] for splice in splices] == [2, 0]
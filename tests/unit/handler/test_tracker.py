@@ -0,0 +1,224 @@
+import asyncio
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from rplugin.python3.ultest.handler.parsers.file import LineChange
+from rplugin.python3.ultest.handler.tracker import PositionTracker
+from rplugin.python3.ultest.models import File, Namespace, Test, Tree
+
+FILE = "/tests/test_a.py"
+
+
+def _positions(shift: int = 0, extra: bool = False) -> Tree:
+    namespace = Namespace(
+        id="TestA", name="TestA", file=FILE, line=1, col=1, running=0, namespaces=[]
+    )
+    tests = [
+        Test(
+            id=f"test_{index}",
+            name=f"test_{index}",
+            file=FILE,
+            line=index * 3 + 2 + shift,
+            col=1,
+            running=0,
+            namespaces=["TestA"],
+        )
+        for index in range(3 if extra else 2)
+    ]
+    return Tree.from_list(
+        [File(id=FILE, name=FILE, file=FILE, running=0), [namespace, *tests]]
+    )
+
+
+def _done(value) -> asyncio.Future:
+    future = asyncio.get_event_loop().create_future()
+    future.set_result(value)
+    return future
+
+
+async def _update(tracker: PositionTracker, positions: Tree):
+    tracker._file_parser.parse_file_structure = Mock(return_value=_done(positions))
+    tracker._vim.reset_mock()
+    await tracker._async_update(FILE, {}, None)
+
+
+def _diff_calls(tracker: PositionTracker):
+    return [
+        call[0]
+        for call in tracker._vim.call.call_args_list
+        if call[0][0] == "ultest#process#apply_diff"
+    ]
+
+
+@pytest.fixture
+def tracker():
+    runner = Mock()
+    runner.get_result.return_value = None
+    runner.is_running.return_value = 0
+    return PositionTracker(vim=Mock(), file_parser=Mock(), runner=runner)
+
+
+@pytest.mark.asyncio
+async def test_identical_positions_not_sent(tracker):
+    await _update(tracker, _positions())
+    original = tracker._stored_positions[FILE]
+
+    await _update(tracker, _positions())
+
+    tracker._vim.call.assert_not_called()
+    tracker._vim.command.assert_not_called()
+    assert tracker._stored_positions[FILE] is original
+
+
+@pytest.mark.asyncio
+async def test_shifted_positions_only_moved(tracker):
+    await _update(tracker, _positions())
+
+    await _update(tracker, _positions(shift=2))
+
+    ((func, file_name, diff),) = _diff_calls(tracker)
+    assert (func, file_name) == ("ultest#process#apply_diff", FILE)
+    assert [pos.id for pos in diff.moved] == ["test_0", "test_1"]
+    assert not diff.structure and not diff.sorted_tests and not diff.inserted
+
+
+@pytest.mark.asyncio
+async def test_new_position_with_result_replaced(tracker):
+    await _update(tracker, _positions())
+    tracker._runner.get_result.side_effect = lambda pos_id, _: (
+        "result" if pos_id == "test_2" else None
+    )
+
+    await _update(tracker, _positions(extra=True))
+
+    ((_, _, diff),) = _diff_calls(tracker)
+    assert [(pos.id, result) for pos, result in diff.replaced] == [("test_2", "result")]
+    assert not diff.inserted
+
+
+@pytest.mark.asyncio
+async def test_status_sent_with_diff(tracker):
+    tracker._runner.file_status.return_value = {"file": {}, "namespaces": {}}
+
+    await _update(tracker, _positions())
+
+    tracker._runner.reset_status.assert_called_once()
+    assert tracker._vim.call.call_args_list[0][0] == (
+        "setbufvar",
+        FILE,
+        "ultest_status",
+        {"file": {}, "namespaces": {}},
+    )
+
+
+def _move_calls(tracker: PositionTracker):
+    return [
+        call[0][1]
+        for call in tracker._vim.call.call_args_list
+        if call[0][0] == "ultest#process#move_many"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_edited_lines_shift_positions_when_read(tracker):
+    tracker._vim.absolute_path.side_effect = lambda path: path
+    await _update(tracker, _positions())
+    tracker._vim.reset_mock()
+
+    tracker.lines_changed(FILE, [[3, 3, 5]])
+
+    tracker._vim.call.assert_not_called()
+    assert [pos.line for pos in tracker.file_positions(FILE)] == [0, 1, 2, 7]
+    (moved,) = _move_calls(tracker)
+    assert [(pos.id, pos.line) for pos in moved] == [("test_1", 7)]
+    assert tracker.find_position(FILE, "test_1").data.line == 7
+
+
+@pytest.mark.asyncio
+async def test_edited_positions_sent_when_idle(tracker):
+    tracker._vim.absolute_path.side_effect = lambda path: path
+    await _update(tracker, _positions())
+
+    tracker.lines_changed(FILE, [[0, 0, 1]])
+    tracker.lines_changed(FILE, [[0, 0, 1]])
+
+    ((delay, settle, file_name),) = [
+        call[0] for call in tracker._vim.schedule_later.call_args_list
+    ]
+    with patch("time.monotonic", return_value=time.monotonic() + delay):
+        settle(file_name)
+
+    (moved,) = _move_calls(tracker)
+    assert [pos.line for pos in moved] == [3, 4, 7]
+
+
+@pytest.mark.asyncio
+async def test_current_line_of_running_position(tracker):
+    tracker._vim.absolute_path.side_effect = lambda path: path
+    await _update(tracker, _positions())
+    running = tracker.find_position(FILE, "test_0").data
+
+    tracker.lines_changed(FILE, [[0, 0, 1]])
+    tracker._vim.absolute_path.reset_mock()
+
+    assert tracker.current(running).line == 3
+    tracker._vim.absolute_path.assert_not_called()
+    tracker._vim.sync_call.assert_not_called()
+    assert running.line == 2
+
+
+@pytest.mark.asyncio
+async def test_edited_span_passed_to_parser(tracker):
+    tracker._vim.absolute_path.side_effect = lambda path: path
+    await _update(tracker, _positions())
+    tracker._get_file_patterns = Mock(return_value={"test": []})
+    launched = []
+    tracker._vim.launch.side_effect = lambda coroutine, _: launched.append(coroutine)
+
+    tracker.lines_changed(FILE, [[3, 3, 5], [1, 2, 2]])
+    with patch("os.path.isfile", return_value=True):
+        tracker.update(FILE)
+    await launched[0]
+
+    tracker._file_parser.parse_file_structure.assert_called_with(
+        FILE, {"test": []}, LineChange(start=1, old_end=3, new_end=5)
+    )
+
+
+@pytest.mark.asyncio
+async def test_reloaded_buffer_drops_edits(tracker):
+    tracker._vim.absolute_path.side_effect = lambda path: path
+    await _update(tracker, _positions())
+
+    tracker.lines_changed(FILE, [[0, 0, 1]])
+    tracker.lines_changed(FILE, None)
+    tracker.lines_changed(FILE, [[5, 5, 5]])
+
+    assert [pos.line for pos in tracker.file_positions(FILE)] == [0, 1, 2, 5]
+    assert tracker._changes == {FILE: None}
+
+
+@pytest.mark.asyncio
+async def test_shared_ids_found_first_or_last(tracker):
+    tracker._vim.absolute_path.side_effect = lambda path: path
+    positions = [
+        Test(
+            id="test_a",
+            name="test_a",
+            file=FILE,
+            line=line,
+            col=1,
+            running=0,
+            namespaces=[],
+        )
+        for line in (2, 5)
+    ]
+    await _update(
+        tracker,
+        Tree.from_list([File(id=FILE, name=FILE, file=FILE, running=0), *positions]),
+    )
+
+    assert tracker.find_position(FILE, "test_a").data.line == 2
+    assert tracker.find_position(FILE, "test_a", last=True).data.line == 5
@@ -59,3 +59,73 @@ def test_get_nearest_from_non_strict_no_match(tests: List[Union[Test, Namespace]
     tree = Tree[Position].from_list([File(file="", name="", id=""), *tests])
     result = tree.sorted_search(line, lambda pos: pos.line, strict=False)
     assert result is None
+
+
+def nested_tree() -> Tree[int]:
+    return Tree[int].from_list([0, [1, 2, [3, 4], 5], 6, [7, 8]])
+
+
+def test_index_access_is_preorder():
+    tree = nested_tree()
+    assert [tree[i] for i in range(len(tree))] == list(range(9))
+    assert list(tree) == list(range(9))
+
+
+def test_subtree_access_is_relative():
+    tree = nested_tree()
+    subtree = tree.node(1)
+    assert list(subtree) == [1, 2, 3, 4, 5]
+    assert subtree[2] == 3
+    assert [node.data for node in subtree.node(2).nodes()] == [3, 4]
+
+
+def test_index_out_of_range():
+    tree = nested_tree()
+    try:
+        tree.node(len(tree))
+    except IndexError:
+        return
+    assert False
+
+
+def test_parent():
+    tree = nested_tree()
+    assert tree.parent is None
+    assert tree.node(4).parent.data == 3
+    assert tree.node(5).parent.data == 1
+    assert tree.node(8).parent.data == 7
+
+
+def test_sorted_search_within_subtree():
+    tree = nested_tree()
+    subtree = tree.node(7)
+    assert subtree.sorted_search(8, lambda data: data, strict=True).data == 8
+    assert subtree.sorted_search(3, lambda data: data, strict=False) is None
+
+
+def test_map_keeps_shape():
+    tree = nested_tree()
+    assert tree.map(lambda data: data * 2).to_list() == [
+        0,
+        [2, 4, [6, 8], 10],
+        12,
+        [14, 16],
+    ]
+    assert Tree[int].from_list([0]).map(str).to_list() == ["0"]
+
+
+def test_deep_tree_mapped_and_listed():
+    depth = 5000
+    nested = [depth]
+    for level in reversed(range(depth)):
+        nested = [level, nested]
+    tree = Tree[int].from_list(nested)
+
+    mapped = tree.map(lambda data: -data)
+    as_list = mapped.to_list()
+
+    assert list(mapped) == [-level for level in range(depth + 1)]
+    for level in range(depth):
+        assert as_list[0] == -level
+        as_list = as_list[1]
+    assert as_list == -depth
@@ -0,0 +1,29 @@
+import asyncio
+import time
+
+import pytest
+
+from rplugin.python3.ultest.vim_client.jobs.monitor import LoopMonitor
+
+
+@pytest.mark.asyncio
+async def test_blocked_loop_recorded():
+    monitor = LoopMonitor(asyncio.get_event_loop(), threshold=0.05, interval=0.01)
+    monitor.start()
+    await asyncio.sleep(0.02)
+
+    time.sleep(0.1)
+    await asyncio.sleep(0.02)
+
+    assert monitor.stalls == 1
+    assert monitor.max_lag >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_idle_loop_not_recorded():
+    monitor = LoopMonitor(asyncio.get_event_loop(), threshold=0.05, interval=0.01)
+    monitor.start()
+
+    await asyncio.sleep(0.1)
+
+    assert monitor.stalls == 0
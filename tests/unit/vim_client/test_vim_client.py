@@ -0,0 +1,156 @@
+import dataclasses
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from rplugin.python3.ultest.config import Config
+from rplugin.python3.ultest.models import Test
+from rplugin.python3.ultest.vim_client import VimClient
+
+
+class TestVimClientBatching(TestCase):
+    def setUp(self):
+        patcher = patch("rplugin.python3.ultest.vim_client.JobManager")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.nvim = Mock()
+        self.nvim.eval.return_value = {"nvim": 1}
+        self.nvim.request.return_value = [[], None]
+        self.scheduled = []
+        self.nvim.async_call.side_effect = lambda func, *args: self.scheduled.append(
+            (func, args)
+        )
+        self.client = VimClient(self.nvim)
+
+    def run_scheduled(self):
+        scheduled, self.scheduled = self.scheduled, []
+        for func, args in scheduled:
+            func(*args)
+
+    def test_calls_in_tick_sent_together(self):
+        self.client.call("ultest#process#start", "a")
+        self.client.command("doau", "User", "UltestPositionsUpdate")
+        self.client.call("ultest#process#exit", "b")
+
+        self.assertEqual(len(self.scheduled), 1)
+        self.run_scheduled()
+
+        self.nvim.request.assert_called_once_with(
+            "nvim_call_atomic",
+            [
+                ["nvim_call_function", ["ultest#process#start", ["a"]]],
+                ["nvim_command", ["doau User UltestPositionsUpdate "]],
+                ["nvim_call_function", ["ultest#process#exit", ["b"]]],
+            ],
+        )
+
+    def test_sync_call_flushes_queue(self):
+        self.client.call("ultest#process#start", "a")
+
+        self.client.sync_call("getbufvar", "a", "ultest_tests")
+
+        self.nvim.request.assert_called_once_with(
+            "nvim_call_atomic",
+            [["nvim_call_function", ["ultest#process#start", ["a"]]]],
+        )
+        self.nvim.call.assert_called_once_with("getbufvar", "a", "ultest_tests")
+        self.run_scheduled()
+        self.nvim.request.assert_called_once()
+
+    def test_calls_after_error_resent(self):
+        self.nvim.request.side_effect = [[[], [1, 0, "E121"]], [[], None]]
+        for func in ["a", "b", "c"]:
+            self.client.call(func)
+
+        self.run_scheduled()
+
+        self.assertEqual(
+            self.nvim.request.call_args_list[-1][0],
+            ("nvim_call_atomic", [["nvim_call_function", ["c", []]]]),
+        )
+
+    def test_no_batching_in_vim(self):
+        self.nvim.eval.return_value = {"nvim": 0}
+        client = VimClient(self.nvim)
+
+        client.call("ultest#process#start", "a")
+        self.run_scheduled()
+
+        self.nvim.request.assert_not_called()
+        self.nvim.call.assert_called_with("ultest#process#start", "a", async_=True)
+
+    def test_config_read_in_one_request(self):
+        self.nvim.eval.return_value = {"nvim": 1, "max_threads": 4, "env": None}
+        client = VimClient(self.nvim)
+
+        self.nvim.eval.assert_called_with(Config.expression(), async_=False)
+        self.assertEqual(client.config, Config(nvim=1, max_threads=4))
+
+    def test_positions_sent_as_dicts(self):
+        test = Test(
+            id="test_a",
+            name="test_a",
+            file="/test_a.py",
+            line=1,
+            col=1,
+            running=0,
+            namespaces=[],
+        )
+
+        self.client.sync_call("ultest#process#new", test, True)
+
+        self.nvim.call.assert_called_once_with(
+            "ultest#process#new", dataclasses.asdict(test), 1
+        )
+
+    def test_positions_in_lists_sent_as_dicts(self):
+        test = Test(
+            id="test_a",
+            name="test_a",
+            file="/test_a.py",
+            line=1,
+            col=1,
+            running=0,
+            namespaces=[],
+        )
+
+        self.client.sync_call("ultest#process#start_many", [test], [[test, test]])
+
+        self.nvim.call.assert_called_once_with(
+            "ultest#process#start_many",
+            [dataclasses.asdict(test)],
+            [[dataclasses.asdict(test), dataclasses.asdict(test)]],
+        )
+
+
+class TestVimClientPaths(TestCase):
+    def setUp(self):
+        patcher = patch("rplugin.python3.ultest.vim_client.JobManager")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.nvim = Mock()
+        self.nvim.eval.return_value = {"nvim": 1, "dir_changed": 1, "cwd": "/project"}
+        self.client = VimClient(self.nvim)
+
+    def test_relative_path_resolved_without_request(self):
+        path = self.client.absolute_path("tests/../tests/test_a.py")
+
+        self.assertEqual(path, "/project/tests/test_a.py")
+        self.nvim.call.assert_not_called()
+
+    def test_absolute_path_unchanged(self):
+        self.assertEqual(self.client.absolute_path("/other/a.py"), "/other/a.py")
+
+    def test_path_follows_cwd_change(self):
+        self.client.absolute_path("a.py")
+
+        self.client.set_cwd("/project/sub")
+
+        self.assertEqual(self.client.absolute_path("a.py"), "/project/sub/a.py")
+
+    def test_fnamemodify_used_without_dir_changed(self):
+        self.nvim.eval.return_value = {"nvim": 1, "dir_changed": 0, "cwd": "/project"}
+        self.nvim.call.return_value = "/project/a.py"
+        client = VimClient(self.nvim)
+
+        self.assertEqual(client.absolute_path("a.py"), "/project/a.py")
+        self.nvim.call.assert_called_once_with("fnamemodify", "a.py", ":p")